@@ -5,81 +5,105 @@ load_dotenv()
 
 from crewai import Agent, LLM
 
-from tools import search_tool, read_data_tool
+from llm_cache import CachedLLM, make_backend
+from tools import search_tool, read_data_tool, search_document_tool, extract_facts_tool, InvestmentTool, RiskTool
 
 ### Loading LLM
-llm = LLM(model="gemini/gemini-2.5-flash", api_key=os.getenv("GEMINI_API_KEY"))
+def build_llm() -> LLM:
+    """The Gemini client shared by all agents (built once per worker process by crew_factory).
+    Identical completion requests are answered from the LLM response cache (LLM_CACHE_BACKEND)."""
+    return CachedLLM(model="gemini/gemini-2.5-flash", api_key=os.getenv("GEMINI_API_KEY"), cache=make_backend())
 
-# Creating an Experienced Financial Analyst agent
-financial_analyst=Agent(
-    role="Senior Financial Analyst",
-    goal="Thoroughly analyze financial documents and provide accurate, data-driven insights for the query: {query}",
-    verbose=True,
-    memory=True,
-    backstory=(
-        "You are an experienced financial analyst with deep expertise in reading and interpreting financial statements, SEC filings, and market data. "
-        "You carefully examine revenue trends, profit margins, cash flow, debt levels, and key financial ratios. "
-        "You provide balanced, well-reasoned analysis grounded in the actual data from the documents. "
-        "You always cite specific numbers and metrics from the reports to support your conclusions. "
-        "You follow regulatory compliance standards and clearly distinguish between facts and opinions."
-    ),
-    tools=[read_data_tool],
-    llm=llm,
-    max_iter=15,
-    max_rpm=10,
-    allow_delegation=True  # Allow delegation to other specialists
-)
 
-# Creating a document verifier agent
-verifier = Agent(
-    role="Financial Document Verifier",
-    goal="Carefully verify that uploaded documents are valid financial documents and validate the accuracy of extracted data.",
-    verbose=True,
-    memory=True,
-    backstory=(
-        "You are a meticulous financial document verification specialist with experience in compliance and auditing. "
-        "You carefully examine documents to confirm they are legitimate financial reports (e.g., 10-K, 10-Q, earnings reports, balance sheets). "
-        "You flag any inconsistencies, missing data, or signs that a document is not a genuine financial report. "
-        "You prioritize accuracy and regulatory compliance over speed."
-    ),
-    llm=llm,
-    max_iter=15,
-    max_rpm=10,
-    allow_delegation=True
-)
+### Creating agents
+def build_agents(llm: LLM) -> dict[str, Agent]:
+    """The four agents, keyed by name, all using the given LLM client."""
+    # Creating an Experienced Financial Analyst agent
+    financial_analyst=Agent(
+        role="Senior Financial Analyst",
+        goal="Thoroughly analyze financial documents and provide accurate, data-driven insights for the query: {query}",
+        verbose=True,
+        memory=True,
+        backstory=(
+            "You are an experienced financial analyst with deep expertise in reading and interpreting financial statements, SEC filings, and market data. "
+            "You carefully examine revenue trends, profit margins, cash flow, debt levels, and key financial ratios. "
+            "You provide balanced, well-reasoned analysis grounded in the actual data from the documents. "
+            "You always cite specific numbers and metrics from the reports to support your conclusions. "
+            "You follow regulatory compliance standards and clearly distinguish between facts and opinions."
+        ),
+        tools=[
+            read_data_tool,
+            search_document_tool,
+            extract_facts_tool,
+            InvestmentTool.analyze_investment_tool,
+            InvestmentTool.dcf_valuation_tool,
+            InvestmentTool.peer_comparison_tool,
+            RiskTool.create_risk_assessment_tool,
+            RiskTool.market_risk_metrics_tool,
+        ],
+        llm=llm,
+        max_iter=15,
+        max_rpm=10,
+        allow_delegation=True  # Allow delegation to other specialists
+    )
 
+    # Creating a document verifier agent
+    verifier = Agent(
+        role="Financial Document Verifier",
+        goal="Carefully verify that uploaded documents are valid financial documents and validate the accuracy of extracted data.",
+        verbose=True,
+        memory=True,
+        backstory=(
+            "You are a meticulous financial document verification specialist with experience in compliance and auditing. "
+            "You carefully examine documents to confirm they are legitimate financial reports (e.g., 10-K, 10-Q, earnings reports, balance sheets). "
+            "You flag any inconsistencies, missing data, or signs that a document is not a genuine financial report. "
+            "You prioritize accuracy and regulatory compliance over speed."
+        ),
+        llm=llm,
+        max_iter=15,
+        max_rpm=10,
+        allow_delegation=True
+    )
 
-investment_advisor = Agent(
-    role="Investment Advisor",
-    goal="Provide well-researched, balanced investment recommendations based on the financial document analysis.",
-    verbose=True,
-    backstory=(
-        "You are a certified investment advisor with deep knowledge of equities, fixed income, ETFs, and portfolio construction. "
-        "You base all recommendations on thorough fundamental analysis and the specific financial data provided. "
-        "You always consider the investor's risk tolerance, time horizon, and diversification needs. "
-        "You follow SEC compliance guidelines and clearly disclose that your analysis is not personalized financial advice. "
-        "You present both bull and bear cases for any investment thesis."
-    ),
-    llm=llm,
-    max_iter=15,
-    max_rpm=10,
-    allow_delegation=False
-)
 
+    investment_advisor = Agent(
+        role="Investment Advisor",
+        goal="Provide well-researched, balanced investment recommendations based on the financial document analysis.",
+        verbose=True,
+        backstory=(
+            "You are a certified investment advisor with deep knowledge of equities, fixed income, ETFs, and portfolio construction. "
+            "You base all recommendations on thorough fundamental analysis and the specific financial data provided. "
+            "You always consider the investor's risk tolerance, time horizon, and diversification needs. "
+            "You follow SEC compliance guidelines and clearly disclose that your analysis is not personalized financial advice. "
+            "You present both bull and bear cases for any investment thesis."
+        ),
+        llm=llm,
+        max_iter=15,
+        max_rpm=10,
+        allow_delegation=False
+    )
 
-risk_assessor = Agent(
-    role="Risk Assessment Analyst",
-    goal="Identify and evaluate financial risks, market risks, and operational risks based on the document data.",
-    verbose=True,
-    backstory=(
-        "You are a seasoned risk management professional with expertise in market risk, credit risk, and operational risk assessment. "
-        "You use established frameworks like Value at Risk (VaR), stress testing, and scenario analysis. "
-        "You evaluate debt levels, liquidity ratios, market exposure, and regulatory risks methodically. "
-        "You always recommend appropriate risk mitigation strategies such as diversification, hedging, and position sizing. "
-        "You follow industry best practices and regulatory standards in all risk assessments."
-    ),
-    llm=llm,
-    max_iter=15,
-    max_rpm=10,
-    allow_delegation=False
-)
+
+    risk_assessor = Agent(
+        role="Risk Assessment Analyst",
+        goal="Identify and evaluate financial risks, market risks, and operational risks based on the document data.",
+        verbose=True,
+        backstory=(
+            "You are a seasoned risk management professional with expertise in market risk, credit risk, and operational risk assessment. "
+            "You use established frameworks like Value at Risk (VaR), stress testing, and scenario analysis. "
+            "You evaluate debt levels, liquidity ratios, market exposure, and regulatory risks methodically. "
+            "You always recommend appropriate risk mitigation strategies such as diversification, hedging, and position sizing. "
+            "You follow industry best practices and regulatory standards in all risk assessments."
+        ),
+        llm=llm,
+        max_iter=15,
+        max_rpm=10,
+        allow_delegation=False
+    )
+
+    return {
+        "financial_analyst": financial_analyst,
+        "verifier": verifier,
+        "investment_advisor": investment_advisor,
+        "risk_assessor": risk_assessor,
+    }
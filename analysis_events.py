@@ -0,0 +1,110 @@
+"""
+Progress events of an analysis, published by the worker over Redis pub/sub and
+relayed to clients as Server-Sent Events by GET /analyses/{task_id}/events.
+
+Events (SSE event name -> JSON data):
+
+    status  {"status": ...}                      the worker started, resumed or is waiting to retry
+    step    {"step": ..., "output": ...}         a crew task completed (verification, analysis, ...)
+    done    {"analysis": ..., "cached_from": ...} the analysis succeeded; last event
+    failed  {"error": ...}                       the analysis failed for good; last event
+
+The stream subscribes to the analysis's channel before reading the database,
+so nothing published in between is lost. It then replays the checkpointed
+steps and relays live events, skipping steps it already sent. Checkpoints are
+deleted once an analysis finishes, so one that is already finished (including
+cached ones) gets just its final event, which carries the whole analysis,
+right away. While waiting, the stream sends a heartbeat comment every
+EVENTS_HEARTBEAT_SECONDS and re-checks the database, so it also ends if the
+final event was missed.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import AsyncIterator
+
+import redis
+import redis.asyncio as aioredis
+
+from db import get_analysis_by_task_id, get_analysis_checkpoints
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+
+TERMINAL_EVENTS = ("done", "failed")
+
+_publisher: redis.Redis | None = None
+
+
+def channel(task_id: str) -> str:
+    return f"analysis-events:{task_id}"
+
+
+def publish_event(task_id: str, event: str, data: dict) -> None:
+    """Publish an event for an analysis (worker side). Never raises: events are best-effort."""
+    global _publisher
+    try:
+        if _publisher is None:
+            _publisher = redis.Redis.from_url(REDIS_URL)
+        _publisher.publish(channel(task_id), json.dumps({"event": event, "data": data}))
+    except Exception as exc:
+        logger.warning("Could not publish %s event for %s: %s", event, task_id, exc)
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _final_event(record: dict) -> tuple[str, dict] | None:
+    if record["status"] == "success":
+        return "done", {"analysis": record["analysis"], "cached_from": record.get("cached_from")}
+    if record["status"] == "failed":
+        return "failed", {"error": record["error"]}
+    return None
+
+
+async def stream_events(task_id: str) -> AsyncIterator[str]:
+    """SSE stream of an analysis's events: stored steps first, then live events until it finishes."""
+    client = aioredis.Redis.from_url(REDIS_URL)
+    pubsub = client.pubsub()
+    try:
+        await pubsub.subscribe(channel(task_id))
+
+        sent_steps = set()
+        for step, output in (await asyncio.to_thread(get_analysis_checkpoints, task_id)).items():
+            sent_steps.add(step)
+            yield format_sse("step", {"step": step, "output": output})
+        record = await asyncio.to_thread(get_analysis_by_task_id, task_id)
+        final = _final_event(record) if record else None
+        if final:
+            yield format_sse(*final)
+            return
+
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=EVENTS_HEARTBEAT_SECONDS)
+            if message is None:
+                yield ": heartbeat\n\n"
+                record = await asyncio.to_thread(get_analysis_by_task_id, task_id)
+                final = _final_event(record) if record else None
+                if final:
+                    yield format_sse(*final)
+                    return
+                continue
+
+            payload = json.loads(message["data"])
+            event, data = payload["event"], payload["data"]
+            if event == "step":
+                if data["step"] in sent_steps:
+                    continue
+                sent_steps.add(data["step"])
+            yield format_sse(event, data)
+            if event in TERMINAL_EVENTS:
+                return
+    finally:
+        await pubsub.unsubscribe(channel(task_id))
+        await pubsub.aclose()
+        await client.aclose()
@@ -0,0 +1,57 @@
+"""
+Per-analysis crew setup cost: building everything per task vs reusing a worker's crew objects.
+
+"rebuild" is what analyze_document_task did before crew_factory: construct the
+LLM client, the four agents, the four tasks and a Crew for every analysis.
+"reuse" is what it does now: reset the per-run state of the process's CrewKit
+and fetch a cached crew. No LLM request is made (GEMINI_API_KEY may be unset).
+
+Usage:
+    python benchmarks/bench_crew_setup.py
+    python benchmarks/bench_crew_setup.py --runs 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from crewai import Crew, Process  # noqa: E402
+
+from agents import build_agents, build_llm  # noqa: E402
+from crew_factory import build_crew_kit  # noqa: E402
+from task import build_tasks  # noqa: E402
+
+TASKS = ("verification", "analyze_financial_document", "investment_analysis", "risk_assessment")
+
+
+def rebuild() -> Crew:
+    agents = build_agents(build_llm())
+    tasks = build_tasks(agents)
+    return Crew(agents=list(agents.values()), tasks=[tasks[name] for name in TASKS], process=Process.sequential)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    kit = build_crew_kit()
+    kit.crew(TASKS)
+    print(f"worker init (once per process): {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    for name, setup in (("rebuild", rebuild), ("reuse", lambda: (kit.reset_run_state(), kit.crew(TASKS)))):
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            setup()
+            timings.append((time.perf_counter() - start) * 1e3)
+        print(f"{name:8} median {statistics.median(timings):8.3f} ms   max {max(timings):8.3f} ms per analysis")
+
+
+if __name__ == "__main__":
+    main()
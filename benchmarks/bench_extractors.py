@@ -0,0 +1,114 @@
+"""
+Throughput and memory benchmark for the PDF extraction backends.
+
+Each (backend, document) pair runs in a fresh subprocess so that peak RSS is
+attributable to that run alone. Documents are data/TSLA-Q2-2025-Update.pdf
+plus synthetic PDFs of dense numeric tables generated on the fly.
+
+Usage:
+    python benchmarks/bench_extractors.py
+    python benchmarks/bench_extractors.py --pages 100,1000 --backends pdfium,pypdf
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+SAMPLE_PDF = os.path.join(ROOT, "data", "TSLA-Q2-2025-Update.pdf")
+LINES_PER_PAGE = 60
+
+
+def write_synthetic_pdf(path: str, pages: int):
+    """Write a PDF with `pages` pages of dense statement-style table rows."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for p in range(pages):
+        rows = [b"BT /F1 8 Tf 36 770 Td 10 TL"]
+        for line in range(LINES_PER_PAGE):
+            values = " ".join(f"{(p * 7919 + line * 104729 + c * 13) % 99999:,}" for c in range(8))
+            rows.append(f"(Line item {p + 1}.{line + 1} {values} ({line * 17 % 999:,})) '".encode())
+        rows.append(b"ET")
+        stream = b"\n".join(rows)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(kids) + b"] /Count %d >>" % pages
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def _run(path: str, backend: str, queue):
+    from pdf_extract import iter_pages
+
+    start = time.perf_counter()
+    pages = chars = 0
+    for _, text in iter_pages(path, backend=backend):
+        pages += 1
+        chars += len(text)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((pages, chars, elapsed, peak_kb))
+
+
+def measure(path: str, backend: str) -> tuple[int, int, float, int]:
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    proc = context.Process(target=_run, args=(path, backend, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default="100,500", help="comma-separated synthetic document sizes")
+    parser.add_argument("--backends", default="pdfium,pypdf", help="comma-separated backends to compare")
+    args = parser.parse_args()
+
+    documents = []
+    if os.path.exists(SAMPLE_PDF):
+        documents.append(("TSLA-Q2-2025-Update.pdf", SAMPLE_PDF))
+    tmpdir = tempfile.mkdtemp(prefix="bench_pdf_")
+    for pages in (int(p) for p in args.pages.split(",")):
+        path = os.path.join(tmpdir, f"synthetic_{pages}.pdf")
+        write_synthetic_pdf(path, pages)
+        documents.append((f"synthetic ({pages} pages)", path))
+
+    print(f"{'document':<28} {'backend':<8} {'pages':>6} {'seconds':>9} {'pages/s':>9} {'chars':>11} {'peak RSS':>10}")
+    for label, path in documents:
+        for backend in args.backends.split(","):
+            pages, chars, elapsed, peak_kb = measure(path, backend)
+            print(
+                f"{label:<28} {backend:<8} {pages:>6} {elapsed:>9.3f} "
+                f"{pages / elapsed:>9.1f} {chars:>11,} {peak_kb / 1024:>8.1f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Hit latency of the LLM response cache.
+
+Stores responses for N prompts shaped like a crew step (system prompt, task
+prompt and a long tool observation), then times key computation plus lookup
+for every one of them. A hit should stay well under 5 ms.
+
+Usage:
+    python benchmarks/bench_llm_cache.py
+    python benchmarks/bench_llm_cache.py --backend redis --prompt-kb 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from llm_cache import RedisBackend, SQLiteBackend, cache_key  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("sqlite", "redis"), default="sqlite")
+    parser.add_argument("--prompts", type=int, default=500)
+    parser.add_argument("--prompt-kb", type=int, default=60, help="size of the tool observation in each prompt")
+    args = parser.parse_args()
+
+    if args.backend == "redis":
+        backend = RedisBackend(prefix="llmcache-bench")
+    else:
+        backend = SQLiteBackend(os.path.join(tempfile.mkdtemp(prefix="bench_llm_cache_"), "cache.sqlite3"))
+    observation = ("Revenue 25,500 24,927 22,496 19,335 21,301\n" * (args.prompt_kb * 1024 // 43))[: args.prompt_kb * 1024]
+    params = {"temperature": 0.2, "stop": ["\nObservation:"]}
+
+    def messages(i: int) -> list[dict]:
+        return [
+            {"role": "system", "content": "You are Senior Financial Analyst."},
+            {"role": "user", "content": f"Task {i}: analyze the document.\nObservation: {observation}"},
+        ]
+
+    for i in range(args.prompts):
+        backend.set(cache_key("gemini/gemini-2.5-flash", messages(i), params), "model", f"Final Answer: {i}", 3600)
+
+    timings = []
+    for i in range(args.prompts):
+        start = time.perf_counter()
+        assert backend.get(cache_key("gemini/gemini-2.5-flash", messages(i), params)) is not None
+        timings.append((time.perf_counter() - start) * 1e3)
+    timings.sort()
+    print(
+        f"{args.backend} hit ({args.prompt_kb} KB prompt): median {statistics.median(timings):.3f} ms, "
+        f"p99 {timings[int(len(timings) * 0.99) - 1]:.3f} ms, max {timings[-1]:.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Micro-benchmark for text_normalize.normalize_text.
+
+Times normalization of synthetic filing text from 10 KB to 50 MB and prints
+throughput plus time-per-byte relative to the smallest size; a flat ratio
+means linear scaling. The old replace/slice loops from tools.py are timed
+alongside for the sizes where they finish in reasonable time.
+
+Usage:
+    python benchmarks/bench_normalize.py
+    python benchmarks/bench_normalize.py --sizes 10K,1M,50M --legacy-limit 200K
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from text_normalize import normalize_text  # noqa: E402
+
+SAMPLE_PAGE = (
+    "F I N A N C I A L   S U M M A R Y\n\n\n"
+    "($ in millions, except percentages)  Q2-2024  Q3-2024  Q4-2024\n"
+    "Total revenues   25,500   25,182   25,707\n\n"
+    "Capital expenditures  (2,272)  (3,513)  (2,780)\n"
+    "Operating margin − 6.3%— 10.8% — 6.2%\n"
+    "Quarter-end cash was impacted by opera-\ntions and working capi-\ntal changes.\n\n\n\n"
+)
+
+
+def _parse_size(value: str) -> int:
+    units = {"K": 1_000, "M": 1_000_000}
+    value = value.strip().upper()
+    if value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+def _make_text(size: int) -> str:
+    repeats = size // len(SAMPLE_PAGE) + 1
+    return (SAMPLE_PAGE * repeats)[:size]
+
+
+def _legacy_normalize(content: str) -> str:
+    """The replace/slice loops previously used in tools.py."""
+    while "\n\n" in content:
+        content = content.replace("\n\n", "\n")
+    i = 0
+    while i < len(content):
+        if content[i:i + 2] == "  ":
+            content = content[:i] + content[i + 1:]
+        else:
+            i += 1
+    return content
+
+
+def _time(fn, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10K,100K,1M,10M,50M", help="comma-separated text sizes")
+    parser.add_argument("--legacy-limit", default="100K", help="largest size to time the legacy loops on")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size (best is reported)")
+    args = parser.parse_args()
+
+    sizes = [_parse_size(s) for s in args.sizes.split(",")]
+    legacy_limit = _parse_size(args.legacy_limit)
+
+    print(f"{'size':>10} {'normalize':>12} {'MB/s':>8} {'ns/byte':>9} {'vs first':>9} {'legacy':>12}")
+    baseline = None
+    for size in sizes:
+        text = _make_text(size)
+        repeat = args.repeat if size <= 10_000_000 else 1
+        elapsed = _time(normalize_text, text, repeat)
+        per_byte = elapsed / size * 1e9
+        baseline = baseline or per_byte
+        legacy = f"{_time(_legacy_normalize, text, 1):.4f}s" if size <= legacy_limit else "skipped"
+        print(
+            f"{size:>10,} {elapsed:>11.4f}s {size / elapsed / 1e6:>8.1f} "
+            f"{per_byte:>9.1f} {per_byte / baseline:>8.2f}x {legacy:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Scale benchmark for the memory-mapped price store.
+
+Writes synthetic daily histories for N tickers x Y years into a temporary
+store, then times a single-day append for every ticker, a full-history load
+plus rolling volatility/drawdown/beta for a sample of tickers, and a
+last-year slice. Peak RSS is reported to show that the store is not loaded
+into memory as a whole.
+
+Usage:
+    python benchmarks/bench_price_store.py
+    python benchmarks/bench_price_store.py --tickers 5000 --years 20
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from price_store import (  # noqa: E402
+    TRADING_DAYS,
+    PriceStore,
+    aligned_returns,
+    drawdown,
+    log_returns,
+    rolling_beta,
+    rolling_volatility,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--sample", type=int, default=200, help="tickers to run metrics on")
+    args = parser.parse_args()
+
+    store = PriceStore(tempfile.mkdtemp(prefix="bench_prices_"))
+    rows = args.years * TRADING_DAYS
+    days = np.arange(rows, dtype=np.int32) + 10_000
+    rng = np.random.default_rng(0)
+    market = rng.normal(0, 0.01, rows)
+
+    start = time.perf_counter()
+    for i in range(args.tickers):
+        closes = 100 * np.exp(np.cumsum(market + rng.normal(0, 0.015, rows)))
+        store.append(f"T{i}", days, closes)
+    write = time.perf_counter() - start
+    store.append("MKT", days, 100 * np.exp(np.cumsum(market)))
+    size_mb = args.tickers * rows * 12 / 1e6
+    print(f"write    {args.tickers} tickers x {rows} days ({size_mb:.0f} MB) in {write:.2f}s")
+
+    start = time.perf_counter()
+    for i in range(args.tickers):
+        store.append(f"T{i}", [rows + 10_000], [100.0])
+    print(f"append   1 day to every ticker: {(time.perf_counter() - start) / args.tickers * 1e6:.0f} us/ticker")
+
+    bench_days, bench_closes = store.load("MKT")
+    start = time.perf_counter()
+    for i in range(args.sample):
+        d, c = store.load(f"T{i}")
+        returns = log_returns(c)
+        rolling_volatility(returns, 63)
+        drawdown(c)
+        _, a, b = aligned_returns(d, c, bench_days, bench_closes)
+        rolling_beta(a, b, TRADING_DAYS)
+    per_ticker = (time.perf_counter() - start) / args.sample
+    print(f"metrics  full history, vol+drawdown+beta: {per_ticker * 1e3:.2f} ms/ticker")
+
+    start = time.perf_counter()
+    for i in range(args.sample):
+        store.load(f"T{i}", last=TRADING_DAYS)
+    print(f"slice    last year: {(time.perf_counter() - start) / args.sample * 1e6:.0f} us/ticker")
+    print(f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Micro-benchmark for ratios.compute_ratios.
+
+Builds a synthetic fact table with every line item filled for N consecutive
+quarters and times a full ratio computation (all quotient and growth ratios
+for all periods).
+
+Usage:
+    python benchmarks/bench_ratios.py
+    python benchmarks/bench_ratios.py --quarters 8,40,400 --repeat 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from financial_facts import FactTable  # noqa: E402
+from ratios import RATIO_NAMES, compute_ratios  # noqa: E402
+
+
+def synthetic_facts(quarters: int) -> FactTable:
+    periods = [f"Q{i % 4 + 1}-{2000 + i // 4}" for i in range(quarters)]
+    table = FactTable(periods=periods)
+    rng = np.random.default_rng(0)
+    table.values[:] = rng.uniform(100, 10_000, size=table.values.shape)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quarters", default="8,40,400", help="comma-separated period counts")
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'quarters':>8} {'ratios':>7} {'values':>8} {'us/call':>10}")
+    for quarters in (int(q) for q in args.quarters.split(",")):
+        facts = synthetic_facts(quarters)
+        compute_ratios(facts)  # warm-up
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            compute_ratios(facts)
+        per_call = (time.perf_counter() - start) / args.repeat
+        print(f"{quarters:>8} {len(RATIO_NAMES):>7} {len(RATIO_NAMES) * quarters:>8} {per_call * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
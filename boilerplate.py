@@ -0,0 +1,87 @@
+"""
+Detection and removal of repeated page boilerplate.
+
+Headers, footers, page numbers and legal footnotes repeat on many pages of a
+filing. A line is treated as boilerplate when its key (lowercased, digits
+masked, whitespace collapsed) appears among the first or last EDGE_LINES
+lines of at least MIN_PAGES pages. Only edge lines are ever removed, so table
+rows in the body of a page are left alone even if they repeat elsewhere.
+
+The first page on which a boilerplate line appears keeps it, so each
+disclaimer or section header still reaches the reader once.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterable
+
+BOILERPLATE_MIN_PAGES = 3
+BOILERPLATE_EDGE_LINES = 4
+# Rough characters-per-token ratio used to report token savings
+CHARS_PER_TOKEN = 4
+
+_DIGITS = re.compile(r"\d+")
+
+
+@dataclass
+class BoilerplateStats:
+    lines_removed: int = 0
+    chars_removed: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.chars_removed // CHARS_PER_TOKEN
+
+
+def _line_key(line: str) -> str:
+    return " ".join(_DIGITS.sub("#", line.lower()).split())
+
+
+def _edge_indexes(line_count: int, edge_lines: int) -> range | list[int]:
+    if line_count <= 2 * edge_lines:
+        return range(line_count)
+    return list(range(edge_lines)) + list(range(line_count - edge_lines, line_count))
+
+
+def find_boilerplate(
+    pages: Iterable[str],
+    min_pages: int = BOILERPLATE_MIN_PAGES,
+    edge_lines: int = BOILERPLATE_EDGE_LINES,
+) -> dict[str, int]:
+    """Map each boilerplate line key to the (0-based) index of the first page it appears on.
+
+    pages is consumed once and only edge lines are kept, so it can be a generator over a large document."""
+    page_counts: dict[str, int] = {}
+    first_page: dict[str, int] = {}
+    for index, page in enumerate(pages):
+        lines = page.split("\n")
+        keys = {_line_key(lines[i]) for i in _edge_indexes(len(lines), edge_lines)}
+        keys.discard("")
+        for key in keys:
+            page_counts[key] = page_counts.get(key, 0) + 1
+            first_page.setdefault(key, index)
+    return {key: first_page[key] for key, count in page_counts.items() if count >= min_pages}
+
+
+def strip_boilerplate(
+    page: str,
+    page_index: int,
+    boilerplate: dict[str, int],
+    stats: BoilerplateStats | None = None,
+    edge_lines: int = BOILERPLATE_EDGE_LINES,
+) -> str:
+    """Remove boilerplate edge lines from one page (except on the page where each first appears)."""
+    if not boilerplate:
+        return page
+    lines = page.split("\n")
+    drop = set()
+    for i in _edge_indexes(len(lines), edge_lines):
+        first = boilerplate.get(_line_key(lines[i]))
+        if first is not None and first != page_index:
+            drop.add(i)
+    if not drop:
+        return page
+    if stats is not None:
+        stats.lines_removed += len(drop)
+        stats.chars_removed += sum(len(lines[i]) + 1 for i in drop)
+    return "\n".join(line for i, line in enumerate(lines) if i not in drop)
@@ -19,4 +19,6 @@ celery.conf.update(
     result_expires=3600,  # Results expire after 1 hour
     task_acks_late=True,  # Don't ack until task completes (crash safety)
     worker_prefetch_multiplier=1,  # Only fetch 1 task at a time per worker
+    # CPU-bound PDF parsing runs on its own queue so it scales separately from LLM workers
+    task_routes={"parse_document": {"queue": "parsing"}},
 )
@@ -0,0 +1,141 @@
+"""
+Per-worker-process crew objects.
+
+The LLM client, agents, tasks and crews are built once per Celery worker
+process (in worker_process_init) instead of on every analysis; a prefork worker
+process runs one analysis at a time, so they are reused run after run. Between
+runs only per-run state is reset:
+
+    task.output          a stale output would become the next run's task context
+    agent.tools_results  tool results collected during the previous run
+
+Descriptions and goals are re-interpolated from their originals by every
+kickoff, so reused tasks pick up the new query and file path. Crews are built
+lazily for each (tasks, agents) combination the worker runs and then cached,
+with CrewAI's crew-lifetime tool cache disabled (tool_memo covers repeats
+within a run).
+
+Every task reports its output on completion to the listener installed with
+on_task_complete() for the current run (checkpoints, progress events). Outputs
+of steps finished by an earlier attempt are put back with restore_output, so
+tasks that depend on them get them as context.
+
+Each agent's max_rpm limiter is wrapped so time spent blocked in it is recorded
+as an rpm_wait span of the current run (see profiling.py).
+"""
+
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable
+
+from crewai import LLM, Agent, Crew, Process, Task
+from crewai.tasks.task_output import TaskOutput
+
+from agents import build_agents, build_llm
+from profiling import timed_rpm_wait
+from task import build_tasks
+
+logger = logging.getLogger(__name__)
+
+# Receives (task name, raw output) when a task completes; set per run, seen by branch threads through copied contexts
+_task_listener: ContextVar[Callable[[str, str], None] | None] = ContextVar("task_listener", default=None)
+
+
+@contextmanager
+def on_task_complete(listener: Callable[[str, str], None]):
+    token = _task_listener.set(listener)
+    try:
+        yield
+    finally:
+        _task_listener.reset(token)
+
+
+def _notify(task_name: str, output: TaskOutput) -> None:
+    listener = _task_listener.get()
+    if listener is not None:
+        listener(task_name, output.raw)
+
+
+@dataclass
+class CrewKit:
+    llm: LLM
+    agents: dict[str, Agent]
+    tasks: dict[str, Task]
+    crews: dict[tuple[tuple[str, ...], tuple[str, ...]], Crew] = field(default_factory=dict)
+    # Held for a whole run: reused agents and tasks must not be shared by concurrent runs (e.g. a threads pool)
+    run_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def crew(self, task_names: tuple[str, ...], agent_names: tuple[str, ...] | None = None) -> Crew:
+        """Cached sequential crew of the named tasks (agents default to all four)."""
+        agent_names = tuple(agent_names or self.agents)
+        key = (task_names, agent_names)
+        crew = self.crews.get(key)
+        if crew is None:
+            crew = Crew(
+                agents=[self.agents[name] for name in agent_names],
+                tasks=[self.tasks[name] for name in task_names],
+                process=Process.sequential,
+                # CrewAI's tool cache lives as long as the crew, i.e. the whole worker process, and
+                # would keep every tool output of every analysis; tool_memo memoizes per run instead
+                cache=False,
+            )
+            self.crews[key] = crew
+        return crew
+
+    def agent_of(self, task_name: str) -> str:
+        agent = self.tasks[task_name].agent
+        return next(name for name, a in self.agents.items() if a is agent)
+
+    def restore_output(self, task_name: str, raw: str) -> None:
+        """Mark a task as done with an output produced by an earlier attempt of this run."""
+        task = self.tasks[task_name]
+        task.output = TaskOutput(description=task.description, raw=raw, agent=task.agent.role)
+
+    def output_of(self, task_name: str) -> str:
+        output = self.tasks[task_name].output
+        return output.raw if output is not None else ""
+
+    def reset_run_state(self) -> None:
+        for task in self.tasks.values():
+            task.output = None
+        for agent in self.agents.values():
+            if getattr(agent, "tools_results", None):
+                agent.tools_results = []
+
+
+def build_crew_kit() -> CrewKit:
+    llm = build_llm()
+    agents = build_agents(llm)
+    tasks = build_tasks(agents)
+    for name, task in tasks.items():
+        task.callback = functools.partial(_notify, name)
+    for name, agent in agents.items():
+        # Time the max_rpm limiter; the controller is a pydantic model, so bypass its field validation
+        controller = getattr(agent, "_rpm_controller", None)
+        if controller is not None:
+            object.__setattr__(controller, "check_or_wait", timed_rpm_wait(controller.check_or_wait, name))
+    return CrewKit(llm=llm, agents=agents, tasks=tasks)
+
+
+_kit: CrewKit | None = None
+_kit_lock = threading.Lock()
+
+
+def init_crew_kit() -> CrewKit:
+    """Build this process's crew objects (called from worker_process_init)."""
+    global _kit
+    with _kit_lock:
+        start = time.perf_counter()
+        _kit = build_crew_kit()
+        logger.info("Built crew objects in %.1f ms", (time.perf_counter() - start) * 1000)
+    return _kit
+
+
+def get_crew_kit() -> CrewKit:
+    """This process's crew objects, built on first use if worker_process_init did not run (e.g. eager mode)."""
+    return _kit if _kit is not None else init_crew_kit()
@@ -5,7 +5,8 @@ Uses Python's built-in sqlite3 — no external dependencies required.
 
 import sqlite3
 import os
-from datetime import datetime, timezone
+import json
+from datetime import datetime, timedelta, timezone
 from contextlib import contextmanager
 
 DB_PATH = os.getenv("DB_PATH", "financial_analyzer.db")
@@ -28,9 +29,34 @@ def get_db():
         conn.close()
 
 
+def _add_missing_columns(conn, table: str, columns: dict[str, str]):
+    """Add columns (name -> SQL type/default) that an older database is missing."""
+    existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if not existing:
+        return  # table not created yet; CREATE TABLE below has every column
+    for name, definition in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
 def init_db():
     """Create tables if they don't exist. Called on app startup."""
     with get_db() as conn:
+        # Upgrade databases created by older releases (indexes on new columns are created below)
+        _add_missing_columns(
+            conn,
+            "analyses",
+            {
+                "doc_hash": "TEXT",
+                "query_norm": "TEXT",
+                "cached_from": "TEXT",
+                "classifier_label": "TEXT",
+                "classifier_confidence": "REAL",
+                "classifier_ms": "REAL",
+            },
+        )
+        _add_missing_columns(conn, "documents", {"file_size": "INTEGER", "metadata": "TEXT", "parsed_at": "TEXT"})
+
         conn.executescript("""
             CREATE TABLE IF NOT EXISTS users (
                 id          INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -45,7 +71,13 @@ def init_db():
                 user_id       INTEGER REFERENCES users(id) ON DELETE SET NULL,
                 filename      TEXT NOT NULL,
                 file_size     INTEGER NOT NULL DEFAULT 0,
+                doc_hash      TEXT,
                 query         TEXT NOT NULL,
+                query_norm    TEXT,
+                cached_from   TEXT,
+                classifier_label       TEXT,
+                classifier_confidence  REAL,
+                classifier_ms          REAL,
                 status        TEXT NOT NULL DEFAULT 'queued',
                 analysis      TEXT,
                 error         TEXT,
@@ -56,8 +88,89 @@ def init_db():
             CREATE INDEX IF NOT EXISTS idx_analyses_task_id ON analyses(task_id);
             CREATE INDEX IF NOT EXISTS idx_analyses_user_id ON analyses(user_id);
             CREATE INDEX IF NOT EXISTS idx_analyses_status  ON analyses(status);
+
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_hash        TEXT PRIMARY KEY,
+                page_count      INTEGER NOT NULL,
+                format_version  INTEGER NOT NULL,
+                file_size       INTEGER,
+                metadata        TEXT,
+                created_at      TEXT NOT NULL DEFAULT (datetime('now')),
+                parsed_at       TEXT
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_analyses_doc_hash ON analyses(doc_hash);
+            CREATE INDEX IF NOT EXISTS idx_analyses_doc_query ON analyses(doc_hash, query_norm, status);
+
+            CREATE TABLE IF NOT EXISTS document_pages (
+                id           INTEGER PRIMARY KEY,
+                doc_hash     TEXT NOT NULL REFERENCES documents(doc_hash) ON DELETE CASCADE,
+                page_number  INTEGER NOT NULL,
+                content      TEXT NOT NULL,
+                UNIQUE (doc_hash, page_number)
+            );
+
+            -- Full-text index over document_pages (external content, kept in sync by triggers)
+            CREATE VIRTUAL TABLE IF NOT EXISTS document_pages_fts USING fts5(
+                content,
+                content='document_pages',
+                content_rowid='id',
+                tokenize='porter unicode61'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS document_pages_ai AFTER INSERT ON document_pages BEGIN
+                INSERT INTO document_pages_fts(rowid, content) VALUES (new.id, new.content);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS document_pages_ad AFTER DELETE ON document_pages BEGIN
+                INSERT INTO document_pages_fts(document_pages_fts, rowid, content)
+                VALUES ('delete', old.id, old.content);
+            END;
+
+            -- Output of each completed crew task of an analysis, so a retried analysis resumes after it
+            CREATE TABLE IF NOT EXISTS analysis_checkpoints (
+                task_id     TEXT NOT NULL,
+                step        TEXT NOT NULL,
+                output      TEXT NOT NULL,
+                created_at  TEXT NOT NULL DEFAULT (datetime('now')),
+                PRIMARY KEY (task_id, step)
+            );
+
+            -- Timing and token spans of analysis runs (see profiling.py)
+            CREATE TABLE IF NOT EXISTS analysis_spans (
+                id                 INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id            TEXT NOT NULL,
+                attempt            INTEGER NOT NULL DEFAULT 0,
+                kind               TEXT NOT NULL,
+                name               TEXT NOT NULL,
+                step               TEXT,
+                started_at         REAL NOT NULL,
+                duration_ms        REAL NOT NULL,
+                prompt_tokens      INTEGER,
+                completion_tokens  INTEGER,
+                wait_ms            REAL,
+                cached             INTEGER,
+                status             TEXT NOT NULL DEFAULT 'ok',
+                error              TEXT
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_analysis_spans_task_id ON analysis_spans(task_id, started_at);
+
+            -- Portfolio risk results, keyed by a hash of the holdings, weights and price data used
+            CREATE TABLE IF NOT EXISTS portfolio_results (
+                input_hash  TEXT PRIMARY KEY,
+                task_ids    TEXT NOT NULL,
+                result      TEXT NOT NULL,
+                created_at  TEXT NOT NULL DEFAULT (datetime('now'))
+            );
         """)
 
+        # Analyses recorded before query_norm existed
+        rows = conn.execute("SELECT id, query FROM analyses WHERE query_norm IS NULL").fetchall()
+        conn.executemany(
+            "UPDATE analyses SET query_norm = ? WHERE id = ?", [(normalize_query(r["query"]), r["id"]) for r in rows]
+        )
+
 
 # ── User CRUD ──────────────────────────────────────────────────────────────────
 
@@ -98,13 +211,37 @@ def list_users(limit: int = 50, offset: int = 0) -> list[dict]:
 
 # ── Analysis CRUD ──────────────────────────────────────────────────────────────
 
-def create_analysis(task_id: str, filename: str, file_size: int, query: str, user_id: int = None) -> dict:
-    """Record a new analysis submission."""
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used to find identical past analyses."""
+    return " ".join(query.lower().split())
+
+
+def create_analysis(
+    task_id: str,
+    filename: str,
+    file_size: int,
+    query: str,
+    user_id: int = None,
+    doc_hash: str = None,
+    cached_from: dict = None,
+) -> dict:
+    """Record a new analysis submission, or, given a prior successful analysis record
+    in cached_from, a completed analysis that reuses its result."""
+    if cached_from is None:
+        status, analysis, source_task_id, completed_at = "queued", None, None, None
+    else:
+        status, analysis, source_task_id = "success", cached_from["analysis"], cached_from["task_id"]
+        completed_at = datetime.now(timezone.utc).isoformat()
     with get_db() as conn:
         conn.execute(
-            """INSERT INTO analyses (task_id, user_id, filename, file_size, query, status)
-               VALUES (?, ?, ?, ?, ?, 'queued')""",
-            (task_id, user_id, filename, file_size, query),
+            """INSERT INTO analyses
+                   (task_id, user_id, filename, file_size, doc_hash, query, query_norm, status, analysis,
+                    cached_from, completed_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                task_id, user_id, filename, file_size, doc_hash, query, normalize_query(query), status, analysis,
+                source_task_id, completed_at,
+            ),
         )
         row = conn.execute("SELECT * FROM analyses WHERE task_id = ?", (task_id,)).fetchone()
         return dict(row) if row else None
@@ -124,6 +261,22 @@ def get_analysis_by_task_id(task_id: str) -> dict | None:
         return dict(row) if row else None
 
 
+def find_cached_analysis(doc_hash: str, query: str, max_age_hours: float) -> dict | None:
+    """Most recent successful, non-empty analysis of the same document and normalized query
+    completed within max_age_hours, or None. Only analyses that actually ran are matched: a
+    reuse is stamped with its own completion time, so matching reuses would extend the window forever."""
+    cutoff = (datetime.now(timezone.utc) - timedelta(hours=max_age_hours)).isoformat()
+    with get_db() as conn:
+        row = conn.execute(
+            """SELECT * FROM analyses
+               WHERE doc_hash = ? AND query_norm = ? AND status = 'success'
+                 AND analysis IS NOT NULL AND analysis != '' AND cached_from IS NULL AND completed_at >= ?
+               ORDER BY completed_at DESC LIMIT 1""",
+            (doc_hash, normalize_query(query), cutoff),
+        ).fetchone()
+        return dict(row) if row else None
+
+
 def update_analysis_status(task_id: str, status: str, analysis: str = None, error: str = None):
     """Update analysis status. Sets completed_at when status is success or failed."""
     completed_at = datetime.now(timezone.utc).isoformat() if status in ("success", "failed") else None
@@ -137,11 +290,23 @@ def update_analysis_status(task_id: str, status: str, analysis: str = None, erro
         )
 
 
+def update_analysis_classification(task_id: str, label: str, confidence: float, latency_ms: float):
+    """Record the local document classifier's decision for an analysis."""
+    with get_db() as conn:
+        conn.execute(
+            """UPDATE analyses
+               SET classifier_label = ?, classifier_confidence = ?, classifier_ms = ?
+               WHERE task_id = ?""",
+            (label, confidence, latency_ms, task_id),
+        )
+
+
 def list_analyses(
     user_id: int = None,
     status: str = None,
     limit: int = 20,
     offset: int = 0,
+    task_ids: list[str] = None,
 ) -> list[dict]:
     """List analyses with optional filters and pagination."""
     query = "SELECT * FROM analyses WHERE 1=1"
@@ -153,6 +318,9 @@ def list_analyses(
     if status is not None:
         query += " AND status = ?"
         params.append(status)
+    if task_ids is not None:
+        query += f" AND task_id IN ({', '.join('?' * len(task_ids))})"
+        params.extend(task_ids)
 
     query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
     params.extend([limit, offset])
@@ -182,7 +350,175 @@ def get_analysis_stats(user_id: int = None) -> dict:
 
 
 def delete_analysis(task_id: str) -> bool:
-    """Delete an analysis record by task_id. Returns True if a row was deleted."""
+    """Delete an analysis record (and its checkpoints and spans) by task_id. Returns True if a row was deleted."""
     with get_db() as conn:
+        conn.execute("DELETE FROM analysis_checkpoints WHERE task_id = ?", (task_id,))
+        conn.execute("DELETE FROM analysis_spans WHERE task_id = ?", (task_id,))
         cursor = conn.execute("DELETE FROM analyses WHERE task_id = ?", (task_id,))
         return cursor.rowcount > 0
+
+
+# ── Analysis Checkpoints ───────────────────────────────────────────────────────
+
+def save_analysis_checkpoint(task_id: str, step: str, output: str):
+    """Store the output of a completed crew task (step) of an analysis."""
+    with get_db() as conn:
+        conn.execute(
+            """INSERT INTO analysis_checkpoints (task_id, step, output) VALUES (?, ?, ?)
+               ON CONFLICT(task_id, step) DO UPDATE SET output = excluded.output, created_at = datetime('now')""",
+            (task_id, step, output),
+        )
+
+
+def get_analysis_checkpoints(task_id: str) -> dict[str, str]:
+    """Completed steps of an analysis (step -> output), in completion order."""
+    with get_db() as conn:
+        rows = conn.execute(
+            "SELECT step, output FROM analysis_checkpoints WHERE task_id = ? ORDER BY created_at, rowid",
+            (task_id,),
+        ).fetchall()
+        return {r["step"]: r["output"] for r in rows}
+
+
+def delete_analysis_checkpoints(task_id: str):
+    """Drop the checkpoints of an analysis that finished (its result is in analyses.analysis)."""
+    with get_db() as conn:
+        conn.execute("DELETE FROM analysis_checkpoints WHERE task_id = ?", (task_id,))
+
+
+# ── Analysis Spans ─────────────────────────────────────────────────────────────
+
+_SPAN_COLUMNS = (
+    "attempt", "kind", "name", "step", "started_at", "duration_ms",
+    "prompt_tokens", "completion_tokens", "wait_ms", "cached", "status", "error",
+)
+
+
+def save_analysis_spans(task_id: str, spans: list[dict]):
+    """Append the timing/token spans recorded during one run of an analysis."""
+    if not spans:
+        return
+    with get_db() as conn:
+        conn.executemany(
+            f"""INSERT INTO analysis_spans (task_id, {', '.join(_SPAN_COLUMNS)})
+                VALUES (?, {', '.join('?' * len(_SPAN_COLUMNS))})""",
+            [(task_id, *(span.get(c) for c in _SPAN_COLUMNS)) for span in spans],
+        )
+
+
+def get_analysis_spans(task_id: str) -> list[dict]:
+    """All spans of an analysis (every attempt), in start order."""
+    with get_db() as conn:
+        rows = conn.execute(
+            f"SELECT {', '.join(_SPAN_COLUMNS)} FROM analysis_spans WHERE task_id = ? ORDER BY started_at, id",
+            (task_id,),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+# ── Document Pages ─────────────────────────────────────────────────────────────
+
+def store_document_pages(doc_hash: str, pages: list[str], format_version: int):
+    """Store (or replace) the extracted pages of a document and index them for search."""
+    parsed_at = datetime.now(timezone.utc).isoformat()
+    with get_db() as conn:
+        conn.execute(
+            """INSERT INTO documents (doc_hash, page_count, format_version, parsed_at) VALUES (?, ?, ?, ?)
+               ON CONFLICT(doc_hash) DO UPDATE SET
+                   page_count = excluded.page_count,
+                   format_version = excluded.format_version,
+                   parsed_at = excluded.parsed_at""",
+            (doc_hash, len(pages), format_version, parsed_at),
+        )
+        conn.execute("DELETE FROM document_pages WHERE doc_hash = ?", (doc_hash,))
+        conn.executemany(
+            "INSERT INTO document_pages (doc_hash, page_number, content) VALUES (?, ?, ?)",
+            [(doc_hash, number, content) for number, content in enumerate(pages, start=1)],
+        )
+
+
+def update_document_metadata(doc_hash: str, file_size: int, metadata: dict):
+    """Record file size and PDF metadata (title, author, ...) for a stored document."""
+    with get_db() as conn:
+        conn.execute(
+            "UPDATE documents SET file_size = ?, metadata = ? WHERE doc_hash = ?",
+            (file_size, json.dumps(metadata), doc_hash),
+        )
+
+
+def get_document(doc_hash: str) -> dict | None:
+    """Get a stored document's record by content hash (metadata decoded)."""
+    with get_db() as conn:
+        row = conn.execute("SELECT * FROM documents WHERE doc_hash = ?", (doc_hash,)).fetchone()
+        if not row:
+            return None
+        record = dict(row)
+        record["metadata"] = json.loads(record["metadata"]) if record["metadata"] else {}
+        return record
+
+
+def get_document_pages(doc_hash: str, format_version: int) -> list[str] | None:
+    """Get a document's pages in order, or None if not stored in the given format version."""
+    with get_db() as conn:
+        doc = conn.execute(
+            "SELECT page_count FROM documents WHERE doc_hash = ? AND format_version = ?",
+            (doc_hash, format_version),
+        ).fetchone()
+        if not doc:
+            return None
+        rows = conn.execute(
+            "SELECT content FROM document_pages WHERE doc_hash = ? ORDER BY page_number",
+            (doc_hash,),
+        ).fetchall()
+        if len(rows) != doc["page_count"]:
+            return None
+        return [r["content"] for r in rows]
+
+
+def _fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every word quoted (no operators), all required."""
+    words = "".join(c if c.isalnum() else " " for c in text).split()
+    return " ".join(f'"{w}"' for w in words)
+
+
+def search_document_pages(query: str, doc_hash: str = None, limit: int = 10) -> list[dict]:
+    """Full-text search over stored pages, optionally within one document. Best matches first."""
+    match = _fts_query(query)
+    if not match:
+        return []
+
+    sql = """SELECT p.doc_hash, p.page_number,
+                    snippet(document_pages_fts, 0, '[', ']', ' ... ', 24) AS snippet,
+                    -bm25(document_pages_fts) AS score
+             FROM document_pages_fts
+             JOIN document_pages p ON p.id = document_pages_fts.rowid
+             WHERE document_pages_fts MATCH ?"""
+    params = [match]
+    if doc_hash is not None:
+        sql += " AND p.doc_hash = ?"
+        params.append(doc_hash)
+    sql += " ORDER BY score DESC LIMIT ?"
+    params.append(limit)
+
+    with get_db() as conn:
+        rows = conn.execute(sql, params).fetchall()
+        return [dict(r) for r in rows]
+
+
+# ── Portfolio Results ──────────────────────────────────────────────────────────
+
+def get_portfolio_result(input_hash: str) -> dict | None:
+    """Cached portfolio risk result for an input hash, if any."""
+    with get_db() as conn:
+        row = conn.execute("SELECT result FROM portfolio_results WHERE input_hash = ?", (input_hash,)).fetchone()
+        return json.loads(row["result"]) if row else None
+
+
+def store_portfolio_result(input_hash: str, task_ids: list[str], result: dict):
+    """Save a portfolio risk result under its input hash."""
+    with get_db() as conn:
+        conn.execute(
+            """INSERT INTO portfolio_results (input_hash, task_ids, result) VALUES (?, ?, ?)
+               ON CONFLICT(input_hash) DO UPDATE SET result = excluded.result, created_at = datetime('now')""",
+            (input_hash, json.dumps(task_ids), json.dumps(result)),
+        )
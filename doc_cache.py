@@ -0,0 +1,198 @@
+"""
+Content-addressed cache for parsed PDF documents.
+
+Documents are keyed by the SHA-256 of the file bytes, so the same report is
+parsed once no matter how many tasks read it or what it was named on upload.
+Two tiers:
+
+- an in-process LRU bounded by the total number of characters it holds
+- a disk tier of JSON files under DOC_CACHE_DIR, shared by every worker process
+
+Derived data computed from a document (search indexes, extracted facts) is
+stored next to it as named artifacts, so it is also built once per document.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+DOC_CACHE_DIR = os.getenv("DOC_CACHE_DIR", ".cache/documents")
+DOC_CACHE_MAX_CHARS = int(os.getenv("DOC_CACHE_MAX_CHARS", "50000000"))
+DOC_CACHE_MAX_ARTIFACTS = int(os.getenv("DOC_CACHE_MAX_ARTIFACTS", "256"))
+
+# Bump when the page text format changes so stale disk entries are re-parsed.
+CACHE_FORMAT_VERSION = 4
+
+
+@dataclass
+class ParsedDocument:
+    """Normalized text of a PDF, one string per page."""
+
+    doc_hash: str
+    pages: list[str]
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    @property
+    def char_count(self) -> int:
+        return sum(len(p) for p in self.pages)
+
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DocumentCache:
+    """Two-tier (memory LRU + disk) cache of ParsedDocument keyed by content hash."""
+
+    def __init__(
+        self,
+        cache_dir: str = DOC_CACHE_DIR,
+        max_chars: int = DOC_CACHE_MAX_CHARS,
+        max_artifacts: int = DOC_CACHE_MAX_ARTIFACTS,
+    ):
+        self.cache_dir = cache_dir
+        self.max_chars = max_chars
+        self.max_artifacts = max_artifacts
+        self._entries: OrderedDict[str, ParsedDocument] = OrderedDict()
+        self._artifacts: OrderedDict[tuple[str, str], dict] = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    # ── Memory tier ────────────────────────────────────────────────────────────
+
+    def _remember(self, doc: ParsedDocument):
+        with self._lock:
+            old = self._entries.pop(doc.doc_hash, None)
+            if old is not None:
+                self._chars -= old.char_count
+            if doc.char_count > self.max_chars:
+                return
+            self._entries[doc.doc_hash] = doc
+            self._chars += doc.char_count
+            while self._chars > self.max_chars:
+                _, evicted = self._entries.popitem(last=False)
+                self._chars -= evicted.char_count
+
+    def _recall(self, doc_hash: str) -> ParsedDocument | None:
+        with self._lock:
+            doc = self._entries.get(doc_hash)
+            if doc is not None:
+                self._entries.move_to_end(doc_hash)
+            return doc
+
+    # ── Disk tier ──────────────────────────────────────────────────────────────
+
+    def _path_for(self, doc_hash: str, artifact: str | None = None) -> str:
+        filename = f"{doc_hash}.{artifact}.json" if artifact else f"{doc_hash}.json"
+        return os.path.join(self.cache_dir, doc_hash[:2], filename)
+
+    def _read_json(self, path: str) -> dict | None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Entries are {"version": ..., "payload": ...} so the version never leaks into the payload
+        if not isinstance(payload, dict) or payload.get("version") != CACHE_FORMAT_VERSION or "payload" not in payload:
+            return None
+        return payload["payload"]
+
+    def _write_json(self, path: str, payload: dict):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_FORMAT_VERSION, "payload": payload}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _read_disk(self, doc_hash: str) -> ParsedDocument | None:
+        payload = self._read_json(self._path_for(doc_hash))
+        if payload is None:
+            return None
+        return ParsedDocument(doc_hash=doc_hash, pages=payload["pages"])
+
+    def _write_disk(self, doc: ParsedDocument):
+        self._write_json(self._path_for(doc.doc_hash), {"pages": doc.pages})
+
+    # ── Public API ─────────────────────────────────────────────────────────────
+
+    def get(self, doc_hash: str) -> ParsedDocument | None:
+        """Look up a document by hash, promoting disk hits into memory."""
+        doc = self._recall(doc_hash)
+        if doc is not None:
+            self.stats["memory_hits"] += 1
+            return doc
+        doc = self._read_disk(doc_hash)
+        if doc is not None:
+            self.stats["disk_hits"] += 1
+            self._remember(doc)
+        return doc
+
+    def put(self, doc: ParsedDocument):
+        """Store a document in both tiers."""
+        self._remember(doc)
+        self._write_disk(doc)
+
+    def get_or_parse(self, path: str, parse: Callable[[str, str], list[str]]) -> ParsedDocument:
+        """Return the cached document for the file at path, calling parse(path, doc_hash) on a miss."""
+        doc_hash = hash_file(path)
+        doc = self.get(doc_hash)
+        if doc is not None:
+            return doc
+        self.stats["misses"] += 1
+        doc = ParsedDocument(doc_hash=doc_hash, pages=parse(path, doc_hash))
+        self.put(doc)
+        return doc
+
+    def get_artifact(self, doc_hash: str, name: str) -> dict | None:
+        """Look up a named artifact (e.g. "bm25") derived from a document."""
+        key = (doc_hash, name)
+        with self._lock:
+            payload = self._artifacts.get(key)
+            if payload is not None:
+                self._artifacts.move_to_end(key)
+                return payload
+        payload = self._read_json(self._path_for(doc_hash, name))
+        if payload is not None:
+            self._remember_artifact(key, payload)
+        return payload
+
+    def put_artifact(self, doc_hash: str, name: str, payload: dict):
+        """Store a named artifact for a document in both tiers."""
+        self._remember_artifact((doc_hash, name), payload)
+        self._write_json(self._path_for(doc_hash, name), payload)
+
+    def _remember_artifact(self, key: tuple[str, str], payload: dict):
+        with self._lock:
+            self._artifacts[key] = payload
+            self._artifacts.move_to_end(key)
+            while len(self._artifacts) > self.max_artifacts:
+                self._artifacts.popitem(last=False)
+
+    def clear_memory(self):
+        """Drop the in-memory tier (the disk tier is left intact)."""
+        with self._lock:
+            self._entries.clear()
+            self._artifacts.clear()
+            self._chars = 0
+
+
+document_cache = DocumentCache()
@@ -0,0 +1,133 @@
+"""
+Deterministic check that an upload is a financial document.
+
+Three signals, each scored 0-1, are combined into a confidence:
+
+    keywords  density of financial vocabulary per 1,000 words
+    tables    statement line items found by financial_facts (period-column tables)
+    totals    accounting identities that hold within tolerance on the extracted
+              facts (gross profit = revenue - cost of revenue, FCF = OCF - capex,
+              assets = liabilities + equity, ...), as a fraction of those checkable
+
+Confidence >= CLASSIFIER_ACCEPT is labelled "financial" (the LLM verification
+task is skipped), <= CLASSIFIER_REJECT is "non_financial" (the upload is
+rejected before any LLM call), anything in between is "uncertain" and goes
+through LLM verification as before.
+"""
+
+import os
+import re
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from doc_cache import ParsedDocument
+from financial_facts import FactTable, get_facts
+
+CLASSIFIER_ACCEPT = float(os.getenv("CLASSIFIER_ACCEPT", "0.75"))
+CLASSIFIER_REJECT = float(os.getenv("CLASSIFIER_REJECT", "0.15"))
+
+# Keyword hits per 1,000 words at which the keyword signal saturates
+KEYWORD_DENSITY_FULL = 25.0
+# Distinct statement line items at which the table signal saturates
+LINE_ITEMS_FULL = 8
+# Relative tolerance for accounting identities (rounding, minority interests, ...)
+TOTALS_TOLERANCE = 0.02
+SIGNAL_WEIGHTS = {"keywords": 0.35, "tables": 0.35, "totals": 0.30}
+
+_FINANCIAL_TERMS = frozenset(
+    """
+    revenue revenues income assets liabilities equity cash earnings operating expenses margin margins
+    fiscal quarter quarterly annual dividend dividends shares share eps ebitda gaap profit loss losses
+    financial statements capital debt interest tax taxes depreciation amortization inventory receivable
+    receivables payable payables liquidity balance sheet flows flow net gross diluted basic outlook
+    guidance segment segments shareholders stockholders million millions billion billions thousands
+    audited unaudited consolidated expenditures investments securities borrowings leases
+    """.split()
+)
+_WORD = re.compile(r"[a-z]+")
+
+# (left, right-hand side terms) identities: left = sum(sign * item)
+_IDENTITIES: tuple[tuple[str, tuple[tuple[int, str], ...]], ...] = (
+    ("gross_profit", ((1, "revenue"), (-1, "cost_of_revenue"))),
+    ("operating_income", ((1, "gross_profit"), (-1, "operating_expenses"))),
+    ("free_cash_flow", ((1, "operating_cash_flow"), (-1, "capex"))),
+    ("total_assets", ((1, "total_liabilities"), (1, "equity"))),
+    ("pretax_income", ((1, "net_income"), (1, "income_tax"))),
+)
+
+
+@dataclass
+class Classification:
+    label: str  # "financial", "uncertain" or "non_financial"
+    confidence: float
+    latency_ms: float
+    signals: dict[str, float] = field(default_factory=dict)
+    totals_checked: int = 0
+    totals_passed: int = 0
+
+    @property
+    def is_financial(self) -> bool:
+        return self.label == "financial"
+
+    @property
+    def is_rejected(self) -> bool:
+        return self.label == "non_financial"
+
+
+def keyword_density(pages: list[str]) -> float:
+    """Financial keyword hits per 1,000 words."""
+    words = total = 0
+    for page in pages:
+        tokens = _WORD.findall(page.lower())
+        words += len(tokens)
+        total += sum(1 for t in tokens if t in _FINANCIAL_TERMS)
+    return 1000.0 * total / words if words else 0.0
+
+
+def check_totals(facts: FactTable, tolerance: float = TOTALS_TOLERANCE) -> tuple[int, int]:
+    """(identities checkable, identities holding) over every period where all their items were reported."""
+    checked = passed = 0
+    for left, terms in _IDENTITIES:
+        lhs = facts.get(left)
+        rhs = sum(sign * facts.get(item) for sign, item in terms)
+        both = ~np.isnan(lhs) & ~np.isnan(rhs)
+        if not both.any():
+            continue
+        scale = np.maximum(np.abs(lhs[both]), 1.0)
+        checked += int(both.sum())
+        passed += int((np.abs(lhs[both] - rhs[both]) <= tolerance * scale).sum())
+    return checked, passed
+
+
+def label_for(confidence: float) -> str:
+    """"financial" at or above CLASSIFIER_ACCEPT, "non_financial" at or below CLASSIFIER_REJECT, else "uncertain"."""
+    if confidence >= CLASSIFIER_ACCEPT:
+        return "financial"
+    if confidence <= CLASSIFIER_REJECT:
+        return "non_financial"
+    return "uncertain"
+
+
+def classify_document(doc: ParsedDocument) -> Classification:
+    """Score a parsed document as financial / uncertain / non_financial without any LLM call."""
+    start = time.perf_counter()
+    facts = get_facts(doc)
+    density = keyword_density(doc.pages)
+    checked, passed = check_totals(facts)
+    signals = {
+        "keywords": min(density / KEYWORD_DENSITY_FULL, 1.0),
+        "tables": min(len(facts.found_items()) / LINE_ITEMS_FULL, 1.0),
+        "totals": passed / checked if checked else 0.0,
+    }
+    # Rounded before labelling, so the reported confidence and the label always agree
+    confidence = round(sum(SIGNAL_WEIGHTS[name] * value for name, value in signals.items()), 4)
+    return Classification(
+        label=label_for(confidence),
+        confidence=confidence,
+        latency_ms=round((time.perf_counter() - start) * 1000, 2),
+        signals={name: round(value, 4) for name, value in signals.items()},
+        totals_checked=checked,
+        totals_passed=passed,
+    )
@@ -0,0 +1,123 @@
+"""
+Page-level BM25 retrieval over parsed documents.
+
+Each page is split into passages of whole lines (up to PASSAGE_MAX_CHARS
+characters) and indexed in an in-process inverted index. The index is built
+once per document hash and persisted as a "bm25" artifact in the document
+cache, so later tasks and later runs load it instead of rebuilding it.
+"""
+
+import heapq
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+from doc_cache import DocumentCache, ParsedDocument, document_cache
+
+PASSAGE_MAX_CHARS = 800
+
+# BM25 parameters (standard Okapi defaults)
+K1 = 1.5
+B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were which with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase alphanumeric terms with common English stopwords removed."""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def split_passages(page: str, max_chars: int = PASSAGE_MAX_CHARS) -> list[tuple[int, int]]:
+    """Split a page into (start, end) character spans of whole lines, each at most max_chars long
+    (a single longer line becomes its own passage)."""
+    spans = []
+    start = pos = 0
+    for line in page.split("\n"):
+        line_end = pos + len(line)
+        if line_end - start > max_chars and pos > start:
+            spans.append((start, pos - 1))  # end before the newline preceding this line
+            start = pos
+        pos = line_end + 1
+    if start < len(page):
+        spans.append((start, len(page)))
+    return spans
+
+
+@dataclass
+class Passage:
+    page: int
+    text: str
+    score: float
+
+
+class BM25Index:
+    """Inverted index over the passages of one document."""
+
+    def __init__(self, spans: list[list[int]], postings: dict[str, list[list[int]]], lengths: list[int]):
+        self.spans = spans  # [page_number, start, end] per passage
+        self.postings = postings  # term -> [[passage_id, term_frequency], ...]
+        self.lengths = lengths  # token count per passage
+        self.avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+    @classmethod
+    def build(cls, doc: ParsedDocument) -> "BM25Index":
+        spans, lengths = [], []
+        postings: dict[str, list[list[int]]] = {}
+        for page_number, page in enumerate(doc.pages, start=1):
+            for start, end in split_passages(page):
+                terms = Counter(tokenize(page[start:end]))
+                if not terms:
+                    continue
+                passage_id = len(spans)
+                spans.append([page_number, start, end])
+                lengths.append(sum(terms.values()))
+                for term, tf in terms.items():
+                    postings.setdefault(term, []).append([passage_id, tf])
+        return cls(spans, postings, lengths)
+
+    def to_dict(self) -> dict:
+        return {"spans": self.spans, "postings": self.postings, "lengths": self.lengths}
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> "BM25Index":
+        return cls(payload["spans"], payload["postings"], payload["lengths"])
+
+    def search(self, query: str, top_k: int = 5) -> list[tuple[int, float]]:
+        """Return up to top_k (passage_id, score) pairs, best first."""
+        n = len(self.lengths)
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for passage_id, tf in postings:
+                norm = K1 * (1 - B + B * self.lengths[passage_id] / self.avg_length)
+                scores[passage_id] = scores.get(passage_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+def get_index(doc: ParsedDocument, cache: DocumentCache = document_cache) -> BM25Index:
+    """Load the document's BM25 index from the cache, building and storing it on a miss."""
+    payload = cache.get_artifact(doc.doc_hash, "bm25")
+    if payload is not None:
+        return BM25Index.from_dict(payload)
+    index = BM25Index.build(doc)
+    cache.put_artifact(doc.doc_hash, "bm25", index.to_dict())
+    return index
+
+
+def search_document(doc: ParsedDocument, query: str, top_k: int = 5) -> list[Passage]:
+    """Top-k passages of a document for a free-text query."""
+    index = get_index(doc)
+    results = []
+    for passage_id, score in index.search(query, top_k):
+        page_number, start, end = index.spans[passage_id]
+        results.append(Passage(page=page_number, text=doc.pages[page_number - 1][start:end], score=score))
+    return results
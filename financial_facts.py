@@ -0,0 +1,240 @@
+"""
+Deterministic extraction of financial statement line items.
+
+Scans parsed pages for table headers with period columns (Q2-2024, Q2'25,
+30-Jun-24, FY2024, ...) and unit declarations ("$ in millions", "In thousands
+of USD"), then matches the rows below them against a fixed catalogue of line
+items (revenue, gross profit, operating income, free cash flow, ...).
+
+Values are parsed with parenthesized negatives and dash-for-nil handled, scaled
+to USD millions (per-share items are left as-is; outflows such as capex are
+stored as positive magnitudes) and collected into a FactTable:
+a NumPy array of shape (items, periods) with NaN where a value was not found.
+The table for a document is cached as a "facts" artifact under its hash.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from doc_cache import DocumentCache, ParsedDocument, document_cache
+
+# Canonical line items: key -> label patterns (matched against the lowercased row label).
+# Order matters only for presentation; the first row found for an item/period wins.
+LINE_ITEMS: dict[str, tuple[str, ...]] = {
+    "revenue": (r"^total revenues?$", r"^revenues?$", r"^total net (sales|revenues?)$", r"^net (sales|revenues?)$"),
+    "cost_of_revenue": (r"^total cost of (revenues?|sales)$", r"^cost of (revenues?|sales)$"),
+    "gross_profit": (r"^(total )?gross profit$",),
+    "research_and_development": (r"^research and development$",),
+    "sga": (r"^selling, general and administrative$",),
+    "operating_expenses": (r"^total operating expenses$", r"^operating expenses$"),
+    "operating_income": (r"^income from operations$", r"^operating income$", r"^(loss|income) \(loss\) from operations$"),
+    "interest_expense": (r"^interest expense$",),
+    "pretax_income": (r"^income before income taxes$",),
+    "income_tax": (r"^provision for income taxes$", r"^income tax expense$"),
+    "net_income": (r"^net income$", r"^net income \(loss\)$"),
+    "net_income_common": (r"^net income attributable to common stockholders( \(gaap\))?$",),
+    "eps_diluted": (r"^eps attributable to common stockholders, diluted \(gaap\)$", r"^diluted eps$", r"^diluted$"),
+    "shares_diluted": (r"^shares used in eps calculation, diluted.*$", r"^weighted average diluted shares.*$"),
+    "ebitda": (r"^adjusted ebitda( \(non-gaap\))?$", r"^ebitda$"),
+    "depreciation": (r"^depreciation, amortization( and impairment)?$", r"^depreciation and amortization$"),
+    "stock_compensation": (r"^stock-based compensation( expense)?$",),
+    "operating_cash_flow": (r"^net cash provided by( \(used in\))? operating activities$",),
+    "capex": (r"^capital expenditures$", r"^purchases of property(, plant)? and equipment.*$"),
+    "free_cash_flow": (r"^free cash flow$",),
+    "cash": (r"^cash, cash equivalents and investments$", r"^cash and cash equivalents$"),
+    "accounts_receivable": (r"^accounts receivable, net$", r"^accounts receivable$"),
+    "inventory": (r"^inventor(y|ies)$",),
+    "current_assets": (r"^total current assets$",),
+    "total_assets": (r"^total assets$",),
+    "accounts_payable": (r"^accounts payable$",),
+    "current_debt": (r"^current portion of (long-term )?debt( and finance leases)?$",),
+    "current_liabilities": (r"^total current liabilities$",),
+    "long_term_debt": (r"^debt and finance leases, net of current portion$", r"^long-term debt.*$"),
+    "total_liabilities": (r"^total liabilities$",),
+    "equity": (r"^total (stockholders|shareholders)' equity$",),
+}
+ITEMS = list(LINE_ITEMS)
+PER_SHARE_ITEMS = {"eps_diluted"}
+# Outflows reported with either sign depending on the table; stored as positive magnitudes
+MAGNITUDE_ITEMS = {"interest_expense", "capex"}
+
+_ITEM_PATTERNS = [(key, re.compile(p)) for key, patterns in LINE_ITEMS.items() for p in patterns]
+
+_MONTH_QUARTER = {
+    "jan": 1, "feb": 1, "mar": 1, "apr": 2, "may": 2, "jun": 2,
+    "jul": 3, "aug": 3, "sep": 3, "oct": 4, "nov": 4, "dec": 4,
+}
+_PERIOD_TOKEN = re.compile(
+    r"^(?:"
+    r"Q(?P<q1>[1-4])[-' ]?(?P<y1>(?:19|20)?\d{2})"                                   # Q2-2024, Q2'25
+    r"|(?P<q2>[1-4])Q[-' ]?(?P<y2>(?:19|20)?\d{2})"                                  # 2Q24
+    r"|\d{1,2}-(?P<mon>[A-Za-z]{3})-(?P<y3>\d{2}|\d{4})"                             # 30-Jun-24
+    r"|(?:FY)?(?P<y4>(?:19|20)\d{2})"                                                # 2024, FY2024
+    r")$",
+    re.IGNORECASE,
+)
+_UNIT = re.compile(r"\bin (thousands|millions|billions)\b", re.IGNORECASE)
+_UNIT_SCALE = {"thousands": 0.001, "millions": 1.0, "billions": 1000.0}  # relative to millions
+_NUMBER = re.compile(r"^\(?-?\$?\d[\d,]*(?:\.\d+)?\)?$")
+_FOOTNOTE = re.compile(r"(\s\(\d\))+$")
+
+
+@dataclass
+class FactTable:
+    """Line items x periods, in USD millions (per-share items in USD)."""
+
+    periods: list[str]
+    items: list[str] = field(default_factory=lambda: list(ITEMS))
+    values: np.ndarray = None
+    sources: dict[str, int] = field(default_factory=dict)  # item -> first page it was read from
+
+    def __post_init__(self):
+        if self.values is None:
+            self.values = np.full((len(self.items), len(self.periods)), np.nan)
+
+    def get(self, item: str) -> np.ndarray:
+        """Row of values for one item across all periods (NaN where missing)."""
+        return self.values[self.items.index(item)]
+
+    def latest(self, item: str) -> float:
+        """Most recent reported value of an item (NaN if never reported)."""
+        row = self.get(item)
+        reported = np.flatnonzero(~np.isnan(row))
+        return float(row[reported[-1]]) if len(reported) else np.nan
+
+    def found_items(self) -> list[str]:
+        return [item for item, row in zip(self.items, self.values) if not np.isnan(row).all()]
+
+    def to_dict(self) -> dict:
+        return {
+            "unit": "USD millions (per-share items in USD)",
+            "periods": self.periods,
+            "facts": {
+                item: [None if np.isnan(v) else round(float(v), 4) for v in self.get(item)]
+                for item in self.found_items()
+            },
+            "sources": {item: self.sources[item] for item in self.found_items() if item in self.sources},
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> "FactTable":
+        table = cls(periods=payload["periods"])
+        for item, row in payload["facts"].items():
+            table.values[table.items.index(item)] = [np.nan if v is None else v for v in row]
+        table.sources = dict(payload.get("sources", {}))
+        return table
+
+
+def parse_period(token: str) -> str | None:
+    """Canonical period label ("Q2-2024" or "FY2024") for a header token, else None."""
+    m = _PERIOD_TOKEN.match(token.strip())
+    if not m:
+        return None
+
+    def full_year(y: str) -> int:
+        return int(y) if len(y) == 4 else 2000 + int(y)
+
+    if m.group("q1"):
+        return f"Q{m.group('q1')}-{full_year(m.group('y1'))}"
+    if m.group("q2"):
+        return f"Q{m.group('q2')}-{full_year(m.group('y2'))}"
+    if m.group("mon"):
+        quarter = _MONTH_QUARTER.get(m.group("mon").lower())
+        return f"Q{quarter}-{full_year(m.group('y3'))}" if quarter else None
+    return f"FY{m.group('y4')}"
+
+
+def period_sort_key(period: str) -> tuple[int, int]:
+    if period.startswith("FY"):
+        return int(period[2:]), 5
+    return int(period[3:]), int(period[1])
+
+
+def parse_number(token: str) -> float | None:
+    """Parse "1,234", "(2,272)", "$0.40", "-" (nil = 0.0). None if not a number."""
+    token = token.strip()
+    if token in ("-", "--"):
+        return 0.0
+    if not _NUMBER.match(token):
+        return None
+    negative = token.startswith("(") and token.endswith(")")
+    value = float(token.strip("()").replace("$", "").replace(",", ""))
+    return -value if negative else value
+
+
+def _split_row(line: str, n_periods: int) -> tuple[str, list[float]] | None:
+    """Split a table row into (label, values) using the last n_periods numeric tokens."""
+    tokens = [t for t in line.split() if t != "$"]
+    # Drop a trailing year-over-year column ("-12%", "17%", "-71 bp")
+    if len(tokens) >= 2 and tokens[-1].lower() == "bp":
+        tokens = tokens[:-2]
+    elif tokens and tokens[-1].endswith("%"):
+        tokens = tokens[:-1]
+    if len(tokens) <= n_periods:
+        return None
+    values = [parse_number(t) for t in tokens[-n_periods:]]
+    if any(v is None for v in values):
+        return None
+    label = _FOOTNOTE.sub("", " ".join(tokens[:-n_periods]).lower()).strip()
+    return label, values
+
+
+def _match_item(label: str) -> str | None:
+    for key, pattern in _ITEM_PATTERNS:
+        if pattern.match(label):
+            return key
+    return None
+
+
+def extract_facts(pages: list[str]) -> FactTable:
+    """Extract known line items from every table in the document."""
+    found: list[tuple[str, str, float, int]] = []  # (item, period, value, page_number)
+    for page_number, page in enumerate(pages, start=1):
+        periods: list[str] = []
+        scale = 1.0
+        for line in page.split("\n"):
+            unit = _UNIT.search(line)
+            if unit:
+                scale = _UNIT_SCALE[unit.group(1).lower()]
+
+            header = [parse_period(t) for t in line.split()]
+            header = [p for p in header if p]
+            if len(header) >= 2:
+                periods = header
+                continue
+            if not periods:
+                continue
+
+            row = _split_row(line, len(periods))
+            if row is None:
+                continue
+            item = _match_item(row[0])
+            if item is None:
+                continue
+            factor = 1.0 if item in PER_SHARE_ITEMS else scale
+            for period, value in zip(periods, row[1]):
+                value *= factor
+                found.append((item, period, abs(value) if item in MAGNITUDE_ITEMS else value, page_number))
+
+    all_periods = sorted({period for _, period, _, _ in found}, key=period_sort_key)
+    table = FactTable(periods=all_periods)
+    column = {period: i for i, period in enumerate(all_periods)}
+    row_of = {item: i for i, item in enumerate(table.items)}
+    for item, period, value, page_number in found:
+        r, c = row_of[item], column[period]
+        if np.isnan(table.values[r, c]):
+            table.values[r, c] = value
+            table.sources.setdefault(item, page_number)
+    return table
+
+
+def get_facts(doc: ParsedDocument, cache: DocumentCache = document_cache) -> FactTable:
+    """Load the document's fact table from the cache, extracting and storing it on a miss."""
+    payload = cache.get_artifact(doc.doc_hash, "facts")
+    if payload is not None:
+        return FactTable.from_dict(payload)
+    table = extract_facts(doc.pages)
+    cache.put_artifact(doc.doc_hash, "facts", table.to_dict())
+    return table
@@ -0,0 +1,361 @@
+"""
+Exact-match cache of LLM responses.
+
+CachedLLM wraps crewai.LLM: before a completion request it looks up the
+SHA-256 of (model, canonical messages, sampling parameters) and returns the
+stored response on a hit. On a miss it calls the model and stores the
+response. Canonical messages keep only role/content (plus name/tool ids),
+normalize line endings and trailing whitespace, and are serialized as sorted
+compact JSON. Calls that pass tools or available_functions are not cached,
+because their result depends on executing functions.
+
+Run-specific strings can be aliased for the duration of a run:
+
+    with cache_aliases({file_path: f"<document {doc_hash}>"}):
+        crew.kickoff(...)
+
+Prompts mention the upload path, which is new for every upload. Inside the
+block it is replaced by the alias when building the key and when storing a
+response, and the alias is turned back into the current path when a cached
+response is returned. Re-running the same document with the same query and
+tasks therefore hits the cache.
+
+Backends (LLM_CACHE_BACKEND):
+
+    sqlite  a local SQLite file at LLM_CACHE_PATH (default)
+    redis   LLM_CACHE_REDIS_URL (defaults to REDIS_URL), shared by every worker
+    off     no caching
+
+Entries expire after LLM_CACHE_TTL_HOURS. Once more than LLM_CACHE_MAX_ENTRIES
+are stored, the least recently used entries are evicted. Hits, misses, errors
+and lookup latency are counted per process in llm_cache.stats. A failing
+backend is logged and counted, and never fails the LLM call.
+
+Every call is also recorded as an "llm" span of the current run (see
+profiling.py) with its prompt/completion tokens, as reported by litellm, and
+whether it was a cache hit.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from crewai import LLM
+from litellm.integrations.custom_logger import CustomLogger
+
+from profiling import span
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "sqlite")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3")
+LLM_CACHE_REDIS_URL = os.getenv("LLM_CACHE_REDIS_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "168"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+
+# LLM attributes that change the completion and therefore belong in the key
+SAMPLING_PARAMS = (
+    "temperature",
+    "top_p",
+    "n",
+    "stop",
+    "max_tokens",
+    "max_completion_tokens",
+    "presence_penalty",
+    "frequency_penalty",
+    "logit_bias",
+    "seed",
+    "response_format",
+    "reasoning_effort",
+)
+# Minimum age before a hit refreshes an entry's last-use time (SQLite backend)
+LRU_RESOLUTION_SECONDS = 60
+_MESSAGE_FIELDS = ("role", "content", "name", "tool_call_id")
+
+
+# ── Keys ──────────────────────────────────────────────────────────────────────
+
+_aliases: ContextVar[tuple[tuple[str, str], ...]] = ContextVar("llm_cache_aliases", default=())
+
+
+@contextmanager
+def cache_aliases(aliases: dict[str, str]):
+    """Replace run-specific strings (literal -> stable alias) in keys and stored responses within this context."""
+    token = _aliases.set(tuple((literal, alias) for literal, alias in aliases.items() if literal))
+    try:
+        yield
+    finally:
+        _aliases.reset(token)
+
+
+def _alias(text: str) -> str:
+    for literal, alias in _aliases.get():
+        text = text.replace(literal, alias)
+    return text
+
+
+def _unalias(text: str) -> str:
+    for literal, alias in _aliases.get():
+        text = text.replace(alias, literal)
+    return text
+
+
+def canonical_messages(messages) -> list[dict]:
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    canonical = []
+    for message in messages:
+        entry = {k: message[k] for k in _MESSAGE_FIELDS if message.get(k) is not None}
+        if isinstance(entry.get("content"), str):
+            lines = entry["content"].replace("\r\n", "\n").split("\n")
+            entry["content"] = _alias("\n".join(line.rstrip() for line in lines).strip())
+        canonical.append(entry)
+    return canonical
+
+
+def cache_key(model: str, messages, params: dict) -> str:
+    payload = {"model": model, "messages": canonical_messages(messages), "params": params}
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+
+class CacheBackend(ABC):
+    @abstractmethod
+    def get(self, key: str) -> str | None: ...
+
+    @abstractmethod
+    def set(self, key: str, model: str, response: str, ttl_seconds: float) -> None: ...
+
+    @abstractmethod
+    def count(self) -> int: ...
+
+
+class SQLiteBackend(CacheBackend):
+    """Entries in a local SQLite file; one connection per thread."""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key         TEXT PRIMARY KEY,
+                    model       TEXT NOT NULL,
+                    response    TEXT NOT NULL,
+                    created_at  REAL NOT NULL,
+                    expires_at  REAL NOT NULL,
+                    last_hit    REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_llm_cache_last_hit ON llm_cache(last_hit);
+                CREATE INDEX IF NOT EXISTS idx_llm_cache_expires_at ON llm_cache(expires_at);
+            """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> str | None:
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute("SELECT response, expires_at, last_hit FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            return None
+        # A write per hit would dominate hit latency; LRU order only needs minute resolution
+        if now - row[2] > LRU_RESOLUTION_SECONDS:
+            conn.execute("UPDATE llm_cache SET last_hit = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key: str, model: str, response: str, ttl_seconds: float) -> None:
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, expires_at, last_hit) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, model, response, now, now + ttl_seconds, now),
+        )
+        conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        excess = self.count() - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_hit LIMIT ?)", (excess,)
+            )
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class RedisBackend(CacheBackend):
+    """Entries as Redis strings with a TTL; a sorted set of last-use times drives LRU eviction."""
+
+    def __init__(self, url: str = LLM_CACHE_REDIS_URL, max_entries: int = LLM_CACHE_MAX_ENTRIES, prefix: str = "llmcache"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self.lru_key = f"{prefix}:lru"
+
+    def get(self, key: str) -> str | None:
+        value = self.client.get(f"{self.prefix}:{key}")
+        if value is None:
+            self.client.zrem(self.lru_key, key)
+            return None
+        self.client.zadd(self.lru_key, {key: time.time()})
+        return value.decode()
+
+    def set(self, key: str, model: str, response: str, ttl_seconds: float) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(f"{self.prefix}:{key}", response.encode(), ex=max(int(ttl_seconds), 1))
+        pipe.zadd(self.lru_key, {key: time.time()})
+        pipe.zcard(self.lru_key)
+        size = pipe.execute()[-1]
+        if size > self.max_entries:
+            evicted = [k.decode() for k, _ in self.client.zpopmin(self.lru_key, size - self.max_entries)]
+            if evicted:
+                self.client.delete(*(f"{self.prefix}:{k}" for k in evicted))
+
+    def count(self) -> int:
+        return int(self.client.zcard(self.lru_key))
+
+
+def make_backend(name: str = LLM_CACHE_BACKEND) -> CacheBackend | None:
+    if name == "off":
+        return None
+    if name == "redis":
+        return RedisBackend()
+    if name == "sqlite":
+        return SQLiteBackend()
+    raise ValueError(f"Unknown LLM_CACHE_BACKEND: {name} (expected sqlite, redis or off)")
+
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    uncacheable: int = 0
+    errors: int = 0
+    hit_ms: float = 0.0  # total lookup time of hits
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "uncacheable": self.uncacheable,
+            "errors": self.errors,
+            "hit_rate": round(self.hit_rate, 4),
+            "avg_hit_ms": round(self.hit_ms / self.hits, 3) if self.hits else None,
+        }
+
+
+stats = CacheStats()
+_stats_lock = threading.Lock()
+
+
+def _count(**deltas) -> None:
+    with _stats_lock:
+        for name, delta in deltas.items():
+            setattr(stats, name, getattr(stats, name) + delta)
+
+
+# ── LLM wrapper ───────────────────────────────────────────────────────────────
+
+class UsageCapture(CustomLogger):
+    """Callback that keeps the token usage of one completion.
+
+    crewai hands each completion's usage to the call's callbacks as {"usage": ...}.
+    It also registers them in litellm's process-wide callback lists, where they can
+    see other threads' completions (ModelResponse objects); those are ignored."""
+
+    def __init__(self):
+        super().__init__()
+        self.usage = None
+
+    def log_success_event(self, kwargs, response_obj, start_time, end_time):
+        if isinstance(response_obj, dict) and self.usage is None:
+            self.usage = response_obj.get("usage")
+
+
+def _tokens(usage, name: str) -> int | None:
+    value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+    return int(value) if value is not None else None
+
+
+class CachedLLM(LLM):
+    """crewai.LLM whose plain completions are served from an exact-match response cache."""
+
+    def __init__(self, *args, cache: CacheBackend | None = None, ttl_hours: float = LLM_CACHE_TTL_HOURS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache = cache
+        self.ttl_seconds = ttl_hours * 3600
+
+    def _sampling_params(self) -> dict:
+        return {name: getattr(self, name, None) for name in SAMPLING_PARAMS if getattr(self, name, None) is not None}
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        with span("llm", self.model) as fields:
+            usage = UsageCapture()
+            callbacks = [*(callbacks or []), usage]
+            try:
+                response = self._call(messages, tools, callbacks, available_functions, fields, **kwargs)
+            finally:
+                if usage.usage is not None:
+                    fields["prompt_tokens"] = _tokens(usage.usage, "prompt_tokens")
+                    fields["completion_tokens"] = _tokens(usage.usage, "completion_tokens")
+            return response
+
+    def _call(self, messages, tools, callbacks, available_functions, fields: dict, **kwargs):
+        if self.cache is None or tools or available_functions:
+            if self.cache is not None:
+                _count(uncacheable=1)
+            return super().call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions, **kwargs)
+
+        start = time.perf_counter()
+        key = cache_key(self.model, messages, self._sampling_params())
+        try:
+            cached = self.cache.get(key)
+        except Exception as exc:
+            logger.warning("LLM cache lookup failed: %s", exc)
+            _count(errors=1)
+            cached = None
+        fields["cached"] = cached is not None
+        if cached is not None:
+            _count(hits=1, hit_ms=(time.perf_counter() - start) * 1000)
+            return _unalias(cached)
+
+        _count(misses=1)
+        response = super().call(messages, callbacks=callbacks, **kwargs)
+        if isinstance(response, str) and response.strip():
+            try:
+                self.cache.set(key, self.model, _alias(response), self.ttl_seconds)
+            except Exception as exc:
+                logger.warning("LLM cache store failed: %s", exc)
+                _count(errors=1)
+        return response
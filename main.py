@@ -1,11 +1,15 @@
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from contextlib import asynccontextmanager
 from typing import Optional
+import hashlib
 import os
 import uuid
 
+from analysis_events import stream_events
+from celery import chain
 from celery.result import AsyncResult
-from tasks_worker import analyze_document_task
+from tasks_worker import analyze_document_task, parse_document_task
 from celery_app import celery
 from db import (
     init_db,
@@ -16,11 +20,20 @@ from db import (
     create_analysis,
     get_analysis,
     get_analysis_by_task_id,
+    get_analysis_spans,
+    find_cached_analysis,
     update_analysis_status,
     list_analyses,
     get_analysis_stats,
     delete_analysis,
+    get_document,
+    search_document_pages,
 )
+from portfolio import PortfolioError, portfolio_risk
+from profiling import summarize_spans
+
+# Reuse a successful analysis of the same document and query completed within this window (0 disables)
+ANALYSIS_CACHE_TTL_HOURS = float(os.getenv("ANALYSIS_CACHE_TTL_HOURS", "24"))
 
 
 @asynccontextmanager
@@ -48,8 +61,10 @@ async def analyze_document_endpoint(
     file: UploadFile = File(...),
     query: str = Form(default="Analyze this financial document for investment insights"),
     user_id: Optional[int] = Form(default=None),
+    force: bool = Form(default=False, description="Run a new analysis even if an identical one is cached"),
 ):
-    """Submit a financial document for analysis. Returns a task_id to poll for results."""
+    """Submit a financial document for analysis. Returns a task_id to poll for results,
+    or a completed analysis when the same document and query were analyzed recently."""
 
     # Validate user_id if provided
     if user_id is not None:
@@ -61,19 +76,48 @@ async def analyze_document_endpoint(
     file_path = f"data/financial_document_{file_id}.pdf"
 
     try:
-        os.makedirs("data", exist_ok=True)
-
         content = await file.read()
         file_size = len(content)
-
-        with open(file_path, "wb") as f:
-            f.write(content)
+        doc_hash = hashlib.sha256(content).hexdigest()
 
         if not query or query.strip() == "":
             query = "Analyze this financial document for investment insights"
 
-        # Dispatch to Celery worker instead of blocking
-        task = analyze_document_task.delay(query=query.strip(), file_path=file_path)
+        # Same document and query analyzed recently: record a completed analysis without running the crew
+        cached = None
+        if not force and ANALYSIS_CACHE_TTL_HOURS > 0:
+            cached = find_cached_analysis(doc_hash, query, ANALYSIS_CACHE_TTL_HOURS)
+        if cached is not None:
+            db_record = create_analysis(
+                task_id=file_id,
+                filename=file.filename or "unknown.pdf",
+                file_size=file_size,
+                query=query.strip(),
+                user_id=user_id,
+                doc_hash=doc_hash,
+                cached_from=cached,
+            )
+            return {
+                "status": "success",
+                "task_id": file_id,
+                "analysis_id": db_record["id"],
+                "doc_hash": doc_hash,
+                "cached": True,
+                "cached_from": cached["task_id"],
+                "analysis": cached["analysis"],
+                "message": "Identical document and query were analyzed recently; returning that result (force=true to re-run).",
+            }
+
+        os.makedirs("data", exist_ok=True)
+        with open(file_path, "wb") as f:
+            f.write(content)
+
+        # Parse on the "parsing" queue first, then run the crew on the text it stored.
+        # The chain's result is the analysis task, so its id is the one clients poll.
+        task = chain(
+            parse_document_task.si(file_path=file_path),
+            analyze_document_task.si(query=query.strip(), file_path=file_path),
+        ).apply_async()
 
         # Record in database
         db_record = create_analysis(
@@ -82,12 +126,15 @@ async def analyze_document_endpoint(
             file_size=file_size,
             query=query.strip(),
             user_id=user_id,
+            doc_hash=doc_hash,
         )
 
         return {
             "status": "queued",
             "task_id": task.id,
             "analysis_id": db_record["id"],
+            "doc_hash": doc_hash,
+            "cached": False,
             "message": "Document submitted for analysis. Poll /status/{task_id} for results.",
         }
 
@@ -109,6 +156,18 @@ async def get_task_status(task_id: str):
     result = AsyncResult(task_id, app=celery)
 
     if result.state == "PENDING":
+        # Celery reports unknown ids as PENDING: cached analyses never ran, and results expire from Redis
+        record = get_analysis_by_task_id(task_id)
+        if record and record["status"] == "success":
+            return {
+                "task_id": task_id,
+                "status": "success",
+                "query": record["query"],
+                "analysis": record["analysis"],
+                "cached_from": record["cached_from"],
+            }
+        if record and record["status"] == "failed":
+            return {"task_id": task_id, "status": "failed", "error": record["error"]}
         return {"task_id": task_id, "status": "pending", "message": "Task is waiting in queue."}
 
     elif result.state == "PROCESSING":
@@ -173,6 +232,34 @@ async def get_analysis_endpoint(task_id: str):
     return record
 
 
+@app.get("/analyses/{task_id}/events")
+async def analysis_events_endpoint(task_id: str):
+    """Server-Sent Events stream of an analysis: each completed step's output as it finishes, then the result."""
+    if not get_analysis_by_task_id(task_id):
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    return StreamingResponse(
+        stream_events(task_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/analyses/{task_id}/profile")
+async def analysis_profile_endpoint(task_id: str):
+    """Latency and token spans recorded while an analysis ran (every attempt), with per-step/kind/tool totals."""
+    record = get_analysis_by_task_id(task_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    spans = get_analysis_spans(task_id)
+    return {
+        "task_id": task_id,
+        "status": record["status"],
+        "attempts": len({s["attempt"] for s in spans}),
+        "summary": summarize_spans(spans),
+        "spans": spans,
+    }
+
+
 @app.delete("/analyses/{task_id}")
 async def delete_analysis_endpoint(task_id: str):
     """Delete a specific analysis record."""
@@ -181,6 +268,62 @@ async def delete_analysis_endpoint(task_id: str):
     return {"message": "Analysis deleted", "task_id": task_id}
 
 
+# ── Documents ─────────────────────────────────────────────────────────────────
+
+@app.get("/documents/{doc_hash}")
+async def get_document_endpoint(doc_hash: str):
+    """Get a stored document's page count and PDF metadata."""
+    record = get_document(doc_hash)
+    if not record:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return record
+
+
+@app.get("/documents/{doc_hash}/search")
+async def search_document_endpoint(
+    doc_hash: str,
+    q: str = Query(..., min_length=1, description="Full-text search query"),
+    limit: int = Query(default=10, ge=1, le=100),
+):
+    """Full-text search over the extracted pages of a stored document."""
+    if not get_document(doc_hash):
+        raise HTTPException(status_code=404, detail="Document not found")
+    results = search_document_pages(q, doc_hash=doc_hash, limit=limit)
+    return {"doc_hash": doc_hash, "query": q, "count": len(results), "results": results}
+
+
+# ── Portfolio Risk ────────────────────────────────────────────────────────────
+
+def _split_csv(value: Optional[str], keep_empty: bool = False) -> list[str]:
+    """Comma-separated entries with surrounding whitespace removed; empty ones are dropped unless keep_empty."""
+    parts = [part.strip() for part in value.split(",")] if value else []
+    return parts if keep_empty else [part for part in parts if part]
+
+
+@app.post("/portfolio/risk")
+async def portfolio_risk_endpoint(
+    task_ids: str = Form(..., description="Comma-separated analysis task_ids"),
+    weights: str = Form(..., description="Comma-separated weights, one per task_id (normalized to sum to 1)"),
+    tickers: Optional[str] = Form(default=None, description="Comma-separated ticker overrides, one per task_id"),
+    horizon_days: int = Form(default=10, ge=1, le=252),
+    confidence: float = Form(default=0.99, gt=0.5, lt=1.0),
+):
+    """Portfolio VaR, covariance matrix and per-holding risk contributions for a set of analyzed documents."""
+    ids = _split_csv(task_ids)
+    if not ids:
+        raise HTTPException(status_code=400, detail="task_ids is required")
+    try:
+        parsed_weights = [float(w) for w in _split_csv(weights)]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="weights must be numbers")
+    # Positional: an empty entry keeps its place and falls back to the ticker in that analysis's filename
+    ticker_list = [t.upper() for t in _split_csv(tickers, keep_empty=True)] or None
+    try:
+        return portfolio_risk(ids, parsed_weights, ticker_list, horizon_days=horizon_days, confidence=confidence)
+    except PortfolioError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # ── User Management ───────────────────────────────────────────────────────────
 
 @app.post("/users")
@@ -0,0 +1,323 @@
+"""
+PDF text extraction: pluggable backends, lazy page-at-a-time streaming and a
+parallel bulk path.
+
+Two backends implement PdfExtractor: "pdfium" (pypdfium2, the fast default)
+and "pypdf". The backend is chosen per call or by the PDF_BACKEND env var; if
+the chosen backend fails on a page (or cannot open the file), the other
+backends are tried for that page before giving up.
+
+Both backends load page content only when a page is accessed, so iterating
+with iter_pages keeps at most one page of text alive at a time regardless of
+how large the document is.
+
+extract_pages is the bulk path used when a whole document is parsed. Large
+documents (PDF_PARALLEL_MIN_PAGES pages or more) are split into contiguous
+page ranges and parsed on a process pool that lives for the lifetime of the
+worker process, so only the first large document pays for starting it. Every
+prefork process of a Celery worker has its own pool, so the default pool size
+is the CPU count divided by PARSE_CONCURRENCY (capped at 4).
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterator
+
+from pypdf import PdfReader
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # pragma: no cover - optional fast path
+    pdfium = None
+
+logger = logging.getLogger(__name__)
+
+PDF_BACKEND = os.getenv("PDF_BACKEND", "pdfium" if pdfium is not None else "pypdf")
+# Prefork processes of the Celery worker that runs this code (start.sh sets it for the parse
+# worker); each has its own pool, so together they get about one parser process per CPU
+PARSE_CONCURRENCY = max(int(os.getenv("PARSE_CONCURRENCY", "1")), 1)
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(max(1, min(4, (os.cpu_count() or 1) // PARSE_CONCURRENCY)))))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "64"))
+# "spawn" avoids forking a process that already runs LLM client threads
+PDF_PARSE_START_METHOD = os.getenv("PDF_PARSE_START_METHOD", "spawn")
+
+# Ranges per worker: a few per worker keeps the pool busy when pages vary in density
+_CHUNKS_PER_WORKER = 2
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+_pool_unavailable = False
+
+
+# ── Backends ───────────────────────────────────────────────────────────────────
+
+class PdfExtractor(ABC):
+    """A PDF text backend. open() returns a handle passed to the other methods."""
+
+    name: str
+
+    @abstractmethod
+    def open(self, path: str):
+        """Open the document at path and return a backend-specific handle."""
+
+    @abstractmethod
+    def page_count(self, handle) -> int:
+        """Number of pages in an opened document."""
+
+    @abstractmethod
+    def page_text(self, handle, index: int) -> str:
+        """Raw text of the page at 0-based index."""
+
+    def close(self, handle):
+        """Release an opened document."""
+
+
+class PypdfExtractor(PdfExtractor):
+    name = "pypdf"
+
+    def open(self, path: str):
+        return PdfReader(path)
+
+    def page_count(self, handle) -> int:
+        return len(handle.pages)
+
+    def page_text(self, handle, index: int) -> str:
+        return handle.pages[index].extract_text() or ""
+
+
+class PdfiumExtractor(PdfExtractor):
+    """pypdfium2 backend. PDFium is not thread-safe, so calls are serialized per process."""
+
+    name = "pdfium"
+    _lock = threading.Lock()
+
+    def open(self, path: str):
+        if pdfium is None:
+            raise RuntimeError("pypdfium2 is not installed")
+        with self._lock:
+            return pdfium.PdfDocument(path)
+
+    def page_count(self, handle) -> int:
+        return len(handle)
+
+    def page_text(self, handle, index: int) -> str:
+        with self._lock:
+            page = handle[index]
+            textpage = page.get_textpage()
+            try:
+                return textpage.get_text_range()
+            finally:
+                textpage.close()
+                page.close()
+
+    def close(self, handle):
+        with self._lock:
+            handle.close()
+
+
+EXTRACTORS: dict[str, PdfExtractor] = {
+    extractor.name: extractor for extractor in (PdfiumExtractor(), PypdfExtractor())
+}
+
+
+def get_extractor(backend: str | None = None) -> PdfExtractor:
+    """Look up a backend by name (default: PDF_BACKEND)."""
+    name = backend or PDF_BACKEND
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown PDF backend '{name}'. Available: {', '.join(EXTRACTORS)}")
+    return EXTRACTORS[name]
+
+
+class _FallbackDocument:
+    """An open document that retries failed pages on the other backends."""
+
+    def __init__(self, path: str, backend: str | None = None):
+        primary = get_extractor(backend)
+        self.path = path
+        self._order = [primary] + [e for e in EXTRACTORS.values() if e is not primary]
+        self._handles: dict[str, object] = {}
+        self.primary = None
+        errors = []
+        for extractor in self._order:
+            try:
+                self._handles[extractor.name] = extractor.open(path)
+                self.primary = extractor
+                break
+            except Exception as exc:
+                errors.append(f"{extractor.name}: {exc}")
+        if self.primary is None:
+            raise ValueError(f"Could not open PDF '{path}' ({'; '.join(errors)})")
+        self.page_count = self.primary.page_count(self._handles[self.primary.name])
+
+    def _handle(self, extractor: PdfExtractor):
+        if extractor.name not in self._handles:
+            self._handles[extractor.name] = extractor.open(self.path)
+        return self._handles[extractor.name]
+
+    def page_text(self, index: int) -> str:
+        error = None
+        for extractor in self._order[self._order.index(self.primary):]:
+            try:
+                return extractor.page_text(self._handle(extractor), index)
+            except Exception as exc:
+                if error is None:
+                    error = exc
+                logger.warning("%s failed on page %d of %s: %s", extractor.name, index + 1, self.path, exc)
+        raise ValueError(f"No PDF backend could extract page {index + 1} of '{self.path}'") from error
+
+    def close(self):
+        for name, handle in self._handles.items():
+            try:
+                EXTRACTORS[name].close(handle)
+            except Exception:
+                pass
+        self._handles.clear()
+
+
+_METADATA_KEYS = {
+    "/Title": "title",
+    "/Author": "author",
+    "/Subject": "subject",
+    "/Creator": "creator",
+    "/Producer": "producer",
+    "/CreationDate": "creation_date",
+    "/ModDate": "modification_date",
+}
+
+
+def read_metadata(path: str) -> dict:
+    """Standard document-info fields (title, author, dates, ...) present in the PDF."""
+    info = PdfReader(path).metadata or {}
+    return {name: str(info[key]) for key, name in _METADATA_KEYS.items() if info.get(key)}
+
+
+def page_count(path: str, backend: str | None = None) -> int:
+    """Number of pages in the PDF at path."""
+    doc = _FallbackDocument(path, backend)
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+def iter_pages(
+    path: str,
+    start_page: int = 1,
+    end_page: int | None = None,
+    backend: str | None = None,
+) -> Iterator[tuple[int, str]]:
+    """Yield (page_number, raw_text) for pages start_page..end_page (1-based, inclusive).
+
+    end_page=None reads to the last page. Out-of-range bounds are clamped.
+    """
+    doc = _FallbackDocument(path, backend)
+    try:
+        first = max(start_page, 1)
+        last = doc.page_count if end_page is None else min(end_page, doc.page_count)
+        for page_number in range(first, last + 1):
+            yield page_number, doc.page_text(page_number - 1)
+    finally:
+        doc.close()
+
+
+# ── Parallel extraction ────────────────────────────────────────────────────────
+
+def _extract_range(
+    path: str,
+    first: int,
+    last: int,
+    transform: Callable[[str], str] | None,
+    backend: str | None,
+) -> list[str]:
+    """Pool worker: extract pages first..last (inclusive) of one document."""
+    texts = [text for _, text in iter_pages(path, first, last, backend)]
+    return [transform(t) for t in texts] if transform else texts
+
+
+def _split_range(first: int, last: int, chunks: int) -> list[tuple[int, int]]:
+    """Split first..last into at most `chunks` contiguous, near-equal ranges."""
+    total = last - first + 1
+    chunks = max(1, min(chunks, total))
+    size, extra = divmod(total, chunks)
+    ranges = []
+    start = first
+    for i in range(chunks):
+        end = start + size + (1 if i < extra else 0) - 1
+        ranges.append((start, end))
+        start = end + 1
+    return ranges
+
+
+def get_pool(workers: int = PDF_PARSE_WORKERS) -> ProcessPoolExecutor:
+    """Return the process-wide extraction pool, creating or resizing it if needed."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            context = multiprocessing.get_context(PDF_PARSE_START_METHOD)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the extraction pool (called when the worker process exits)."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+        _pool_workers = 0
+
+
+def extract_pages(
+    path: str,
+    start_page: int = 1,
+    end_page: int | None = None,
+    transform: Callable[[str], str] | None = None,
+    workers: int | None = None,
+    min_pages: int | None = None,
+    backend: str | None = None,
+) -> list[str]:
+    """Extract pages start_page..end_page in page order, in parallel for large ranges.
+
+    transform (a picklable module-level function, e.g. normalize_text) is applied
+    to each page inside the workers. Falls back to serial extraction when the
+    range is below min_pages, only one worker is configured, or the pool cannot
+    be used in this process.
+    """
+    workers = PDF_PARSE_WORKERS if workers is None else workers
+    min_pages = PDF_PARALLEL_MIN_PAGES if min_pages is None else min_pages
+
+    # Resolve the backend here so pool workers use it regardless of their environment
+    backend = get_extractor(backend).name
+    total = page_count(path, backend)
+    first = max(start_page, 1)
+    last = total if end_page is None else min(end_page, total)
+    if last < first:
+        return []
+
+    global _pool_unavailable
+    if workers > 1 and last - first + 1 >= min_pages and not _pool_unavailable:
+        ranges = _split_range(first, last, workers * _CHUNKS_PER_WORKER)
+        try:
+            pool = get_pool(workers)
+            futures = [pool.submit(_extract_range, path, a, b, transform, backend) for a, b in ranges]
+            return [text for future in futures for text in future.result()]
+        except AssertionError as exc:
+            # Daemonic processes (some Celery pool configurations) may not have children
+            logger.warning("Parallel PDF extraction disabled in this process (%s)", exc)
+            _pool_unavailable = True
+            shutdown_pool()
+        except (BrokenProcessPool, OSError) as exc:
+            logger.warning("Parallel PDF extraction failed (%s); parsing serially", exc)
+            shutdown_pool()
+
+    return _extract_range(path, first, last, transform, backend)
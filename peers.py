@@ -0,0 +1,188 @@
+"""
+Local peer-comparables store with indexed lookup.
+
+Peer fundamentals live in PEER_DATA_DIR as two files:
+
+    values.npy   float64, shape (ratios, rows): one contiguous column per ratio
+    index.json   {"ratios": [name, ...], "rows": [[ticker, sector, period], ...]}
+
+values.npy is opened with np.load(mmap_mode="r"), so only the columns and
+rows a lookup touches are paged in. On load the index is turned into
+ticker/sector/period -> row-id arrays plus the latest row of each ticker.
+A peer group's rows are read out of the map once and kept (with column
+medians) in a small per-process LRU, so a repeated lookup is a dict hit plus
+one broadcast comparison of the document's ratios against the group block.
+
+Build the store from a CSV with ticker,sector,period,<ratio columns...>:
+
+    python peers.py build peers.csv
+"""
+
+import csv
+import json
+import os
+import sys
+import threading
+import warnings
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from financial_facts import period_sort_key
+
+PEER_DATA_DIR = os.getenv("PEER_DATA_DIR", "data/peers")
+
+# Peer groups (sector/period/excluded ticker) kept in memory per process
+PEER_GROUP_CACHE_SIZE = 16
+
+_VALUES_FILE = "values.npy"
+_INDEX_FILE = "index.json"
+
+
+@dataclass
+class PeerGroup:
+    rows: np.ndarray  # row ids in the store
+    block: np.ndarray  # (ratios, peers), in-memory copy
+    counts: np.ndarray  # non-missing values per ratio
+    medians: np.ndarray
+
+
+class PeerStore:
+    """Memory-mapped peer ratio columns plus in-memory lookup indexes."""
+
+    def __init__(self, data_dir: str = PEER_DATA_DIR):
+        self.data_dir = data_dir
+        with open(os.path.join(data_dir, _INDEX_FILE)) as f:
+            index = json.load(f)
+        self.ratios: list[str] = index["ratios"]
+        self.rows: list[list[str]] = index["rows"]
+        self.values = np.load(os.path.join(data_dir, _VALUES_FILE), mmap_mode="r")
+        if self.values.shape != (len(self.ratios), len(self.rows)):
+            raise ValueError(f"{_VALUES_FILE} shape {self.values.shape} does not match {_INDEX_FILE}")
+        self.ratio_column = {name: i for i, name in enumerate(self.ratios)}
+
+        by_ticker: dict[str, list[int]] = {}
+        by_sector: dict[str, list[int]] = {}
+        by_period: dict[str, list[int]] = {}
+        for row_id, (ticker, sector, period) in enumerate(self.rows):
+            by_ticker.setdefault(ticker.upper(), []).append(row_id)
+            by_sector.setdefault(sector.lower(), []).append(row_id)
+            by_period.setdefault(period, []).append(row_id)
+        self.by_ticker = {k: np.array(v) for k, v in by_ticker.items()}
+        self.by_sector = {k: np.array(v) for k, v in by_sector.items()}
+        self.by_period = {k: np.array(v) for k, v in by_period.items()}
+        # Latest reported row of each ticker, used as its representative in peer groups
+        self.latest_row = {
+            ticker: max(ids, key=lambda i: period_sort_key(self.rows[i][2])) for ticker, ids in by_ticker.items()
+        }
+        self._latest_ids = np.array(sorted(self.latest_row.values()), dtype=int)
+        self._groups: OrderedDict[tuple, PeerGroup] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sector_of(self, ticker: str) -> str | None:
+        row_id = self.latest_row.get(ticker.upper())
+        return self.rows[row_id][1] if row_id is not None else None
+
+    def peer_rows(self, sector: str | None = None, period: str | None = None, exclude: str | None = None) -> np.ndarray:
+        """Row ids of the peer group: one row per ticker (the given period, else its latest)."""
+        ids = self.by_period.get(period, np.array([], dtype=int)) if period else self._latest_ids
+        if sector:
+            ids = np.intersect1d(ids, self.by_sector.get(sector.lower(), np.array([], dtype=int)))
+        if exclude:
+            ids = np.setdiff1d(ids, self.by_ticker.get(exclude.upper(), np.array([], dtype=int)))
+        return ids
+
+    def peer_group(self, sector: str | None = None, period: str | None = None, exclude: str | None = None) -> PeerGroup:
+        """The peer group's rows read out of the memory map once, with column medians; kept in a small LRU."""
+        key = (sector.lower() if sector else None, period, exclude.upper() if exclude else None)
+        with self._lock:
+            group = self._groups.get(key)
+            if group is not None:
+                self._groups.move_to_end(key)
+                return group
+        rows = self.peer_rows(sector, period, exclude)
+        block = np.array(self.values[:, rows])
+        counts = (~np.isnan(block)).sum(axis=1)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # columns with no values have no median
+            medians = np.nanmedian(block, axis=1) if len(rows) else np.full(len(self.ratios), np.nan)
+        group = PeerGroup(rows=rows, block=block, counts=counts, medians=medians)
+        with self._lock:
+            self._groups[key] = group
+            while len(self._groups) > PEER_GROUP_CACHE_SIZE:
+                self._groups.popitem(last=False)
+        return group
+
+    def percentile_ranks(self, ratios: dict[str, float], group: PeerGroup) -> dict[str, dict]:
+        """Percentile rank (0-100, ties counted half) of each ratio within the peer group."""
+        names = [n for n, v in ratios.items() if n in self.ratio_column and np.isfinite(v)]
+        if not names or not len(group.rows):
+            return {}
+        columns = [self.ratio_column[n] for n in names]
+        block = group.block[columns]  # (ratios, peers); NaN compares False on both sides
+        target = np.array([ratios[n] for n in names])[:, None]
+        below = (block < target).sum(axis=1)
+        equal = (block == target).sum(axis=1)
+        counts = group.counts[columns]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            percentile = (below + 0.5 * equal) / counts * 100
+        return {
+            name: {
+                "value": round(float(target[i, 0]), 4),
+                "percentile": round(float(percentile[i]), 1),
+                "peer_median": round(float(group.medians[columns[i]]), 4),
+                "peers": int(counts[i]),
+            }
+            for i, name in enumerate(names)
+            if counts[i]
+        }
+
+
+_store: PeerStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_peer_store(data_dir: str = PEER_DATA_DIR) -> PeerStore | None:
+    """Process-wide peer store, loaded on first use; None if no store has been built."""
+    global _store
+    if _store is not None and _store.data_dir == data_dir:
+        return _store
+    if not os.path.exists(os.path.join(data_dir, _INDEX_FILE)):
+        return None
+    with _store_lock:
+        if _store is None or _store.data_dir != data_dir:
+            _store = PeerStore(data_dir)
+    return _store
+
+
+def build_peer_store(records: list[tuple[str, str, str, dict[str, float]]], data_dir: str = PEER_DATA_DIR):
+    """Write (ticker, sector, period, {ratio: value}) records as a columnar store."""
+    ratios = sorted({name for *_, values in records for name in values})
+    column = {name: i for i, name in enumerate(ratios)}
+    matrix = np.full((len(ratios), len(records)), np.nan)
+    for row_id, (*_, values) in enumerate(records):
+        for name, value in values.items():
+            matrix[column[name], row_id] = value
+    os.makedirs(data_dir, exist_ok=True)
+    np.save(os.path.join(data_dir, _VALUES_FILE), matrix)
+    with open(os.path.join(data_dir, _INDEX_FILE), "w") as f:
+        json.dump({"ratios": ratios, "rows": [[t.upper(), s, p] for t, s, p, _ in records]}, f)
+
+
+def build_from_csv(csv_path: str, data_dir: str = PEER_DATA_DIR) -> int:
+    """Build the store from a CSV with ticker,sector,period columns followed by ratio columns."""
+    records = []
+    with open(csv_path, newline="") as f:
+        for row in csv.DictReader(f):
+            ticker, sector, period = row.pop("ticker"), row.pop("sector"), row.pop("period")
+            values = {name: float(v) for name, v in row.items() if v not in ("", None)}
+            records.append((ticker, sector, period, values))
+    build_peer_store(records, data_dir)
+    return len(records)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "build":
+        sys.exit("usage: python peers.py build <peers.csv>")
+    print(f"Wrote {build_from_csv(sys.argv[2])} rows to {PEER_DATA_DIR}")
@@ -0,0 +1,225 @@
+"""
+Portfolio-level risk aggregation across analyzed documents.
+
+A portfolio is a set of analyses (by task_id) with weights. Each holding's
+ticker comes from an explicit override or from the uploaded file name
+("TSLA-Q2-2025-Update.pdf"); its fundamentals come from the facts extracted
+from the analyzed document, and its returns from the price store.
+
+Daily log returns of all holdings are aligned on their common dates into one
+(days x holdings) matrix, and everything is computed from it in one pass:
+the annualized covariance matrix, portfolio volatility, parametric and
+historical VaR over the horizon, and each holding's marginal and component
+contribution to risk. Results are cached in the portfolio_results table by a
+hash of the holdings, weights, parameters and the last stored price date of
+each ticker, so a new day of prices invalidates them.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from statistics import NormalDist
+
+import numpy as np
+
+from db import get_document_pages, get_portfolio_result, list_analyses, store_portfolio_result
+from doc_cache import CACHE_FORMAT_VERSION, ParsedDocument, document_cache
+from financial_facts import get_facts
+from price_store import TRADING_DAYS, PriceStore, log_returns, normalize_ticker, price_store
+from ratios import compute_ratios
+from risk_engine import RISK_HISTORY_DAYS, ticker_from_path
+
+# Latest ratios reported per holding and weighted into portfolio-level figures
+FUNDAMENTAL_RATIOS = ("gross_margin", "operating_margin", "net_margin", "debt_to_equity", "current_ratio", "return_on_equity")
+# Holdings need at least this many common trading days of history
+MIN_COMMON_DAYS = 20
+
+
+class PortfolioError(ValueError):
+    """Raised when a portfolio request cannot be evaluated (unknown analyses, missing prices, ...)."""
+
+
+@dataclass
+class Holding:
+    task_id: str
+    ticker: str
+    weight: float
+    doc_hash: str | None
+
+
+def _load_document(doc_hash: str) -> ParsedDocument | None:
+    """Parsed pages of an analyzed document from the cache or the database (the upload itself is deleted)."""
+    doc = document_cache.get(doc_hash)
+    if doc is None:
+        pages = get_document_pages(doc_hash, CACHE_FORMAT_VERSION)
+        if pages is None:
+            return None
+        doc = ParsedDocument(doc_hash=doc_hash, pages=pages)
+        document_cache.put(doc)
+    return doc
+
+
+def resolve_holdings(task_ids: list[str], weights: list[float], tickers: list[str] | None = None) -> list[Holding]:
+    """Look up the analyses and normalize weights to sum to 1."""
+    if len(task_ids) != len(weights):
+        raise PortfolioError("task_ids and weights must have the same length")
+    if tickers and len(tickers) != len(task_ids):
+        raise PortfolioError("tickers must be empty or have one entry per task_id")
+    if len(set(task_ids)) != len(task_ids):
+        raise PortfolioError("task_ids must be unique")
+    w = np.asarray(weights, dtype=float)
+    if (w <= 0).any() or not np.isfinite(w).all():
+        raise PortfolioError("weights must be positive numbers")
+
+    records = {r["task_id"]: r for r in list_analyses(task_ids=task_ids, limit=len(task_ids))}
+    missing = [t for t in task_ids if t not in records]
+    if missing:
+        raise PortfolioError(f"Analyses not found: {', '.join(missing)}")
+
+    holdings = []
+    for i, task_id in enumerate(task_ids):
+        record = records[task_id]
+        ticker = (tickers[i].strip().upper() if tickers else "") or ticker_from_path(record["filename"])
+        if not ticker:
+            raise PortfolioError(f"No ticker for analysis {task_id} ({record['filename']}); pass one in tickers")
+        try:
+            ticker = normalize_ticker(ticker)
+        except ValueError as exc:
+            raise PortfolioError(str(exc)) from exc
+        holdings.append(Holding(task_id, ticker, float(w[i] / w.sum()), record.get("doc_hash")))
+    return holdings
+
+
+def _aligned_return_matrix(tickers: list[str], store: PriceStore) -> tuple[np.ndarray, np.ndarray]:
+    """(common days, days x tickers matrix of daily log returns) over the last RISK_HISTORY_DAYS."""
+    series = [store.load(t, last=RISK_HISTORY_DAYS + 1) for t in tickers]
+    missing = [t for t, (days, _) in zip(tickers, series) if len(days) < 2]
+    if missing:
+        raise PortfolioError(f"No price history stored for: {', '.join(missing)}")
+    common = series[0][0]
+    for days, _ in series[1:]:
+        common = np.intersect1d(common, days, assume_unique=True)
+    if len(common) < MIN_COMMON_DAYS + 1:
+        raise PortfolioError(f"Only {len(common)} common trading days across holdings")
+    closes = np.column_stack([c[np.searchsorted(d, common)] for d, c in series])
+    return common[1:], log_returns(closes)
+
+
+def _fundamentals(holding: Holding) -> dict[str, float]:
+    doc = _load_document(holding.doc_hash) if holding.doc_hash else None
+    if doc is None:
+        return {}
+    latest = compute_ratios(get_facts(doc)).latest()
+    return {name: latest[name] for name in FUNDAMENTAL_RATIOS if name in latest}
+
+
+def input_hash(holdings: list[Holding], horizon_days: int, confidence: float, store: PriceStore = price_store) -> str:
+    last_dates = {}
+    for h in holdings:
+        records = store.records(h.ticker)
+        last_dates[h.ticker] = [len(records), int(records["date"][-1]) if len(records) else None]
+    payload = {
+        "holdings": sorted([h.task_id, h.ticker, round(h.weight, 10)] for h in holdings),
+        "horizon_days": horizon_days,
+        "confidence": confidence,
+        "prices": last_dates,
+        "history_days": RISK_HISTORY_DAYS,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def compute_portfolio_risk(
+    holdings: list[Holding], horizon_days: int = 10, confidence: float = 0.99, store: PriceStore = price_store
+) -> dict:
+    """Covariance, VaR and risk contributions for the holdings, from aligned daily returns."""
+    tickers = [h.ticker for h in holdings]
+    days, returns = _aligned_return_matrix(tickers, store)
+    w = np.array([h.weight for h in holdings])
+
+    cov_daily = np.cov(returns, rowvar=False, ddof=1).reshape(len(w), len(w))
+    vols = np.sqrt(np.diag(cov_daily))
+    # Marginal contributions and correlations divide by these volatilities
+    flat = [t for t, vol in zip(tickers, vols) if not (np.isfinite(vol) and vol > 0)]
+    if flat:
+        raise PortfolioError(f"No price variation over the history window for: {', '.join(flat)}")
+    sigma_w = cov_daily @ w
+    variance = float(w @ sigma_w)
+    if not variance > 0:
+        raise PortfolioError("Portfolio returns have zero variance (holdings fully offset each other)")
+    vol_daily = np.sqrt(variance)
+    scale = np.sqrt(horizon_days)
+    z = NormalDist().inv_cdf(confidence)
+
+    portfolio_returns = returns @ w
+    mean_daily = float(portfolio_returns.mean())
+    parametric_var = z * vol_daily * scale - mean_daily * horizon_days
+    # Overlapping horizon sums of the historical portfolio returns
+    cumulative = np.concatenate(([0.0], np.cumsum(portfolio_returns)))
+    horizon_returns = cumulative[horizon_days:] - cumulative[:-horizon_days]
+    historical_losses = -np.expm1(horizon_returns)
+    historical_var = float(np.quantile(historical_losses, confidence)) if len(historical_losses) else None
+
+    marginal = sigma_w / vol_daily  # d(vol)/d(w_i), daily
+    component = w * marginal  # sums to vol_daily
+    correlation = cov_daily / np.outer(vols, vols)
+
+    fundamentals = [_fundamentals(h) for h in holdings]
+    weighted = {}
+    for name in FUNDAMENTAL_RATIOS:
+        values = np.array([f.get(name, np.nan) for f in fundamentals])
+        known = ~np.isnan(values)
+        if known.any():
+            weighted[name] = round(float((values[known] * w[known]).sum() / w[known].sum()), 4)
+
+    def r(x: float, digits: int = 6) -> float | None:
+        # JSON has no NaN/inf; anything non-finite is reported as null
+        x = float(x)
+        return round(x, digits) if np.isfinite(x) else None
+
+    return {
+        "as_of": str(days[-1].astype("datetime64[D]")),
+        "observations": int(len(days)),
+        "horizon_days": horizon_days,
+        "confidence": confidence,
+        "tickers": tickers,
+        "weights": [r(x) for x in w],
+        "volatility_annualized": r(vol_daily * np.sqrt(TRADING_DAYS)),
+        "var": {
+            "parametric": r(1 - np.exp(-parametric_var)),
+            "historical": r(historical_var) if historical_var is not None else None,
+        },
+        "covariance_annualized": [[r(x, 8) for x in row] for row in cov_daily * TRADING_DAYS],
+        "correlation": [[r(x, 4) for x in row] for row in correlation],
+        "holdings": [
+            {
+                "task_id": h.task_id,
+                "ticker": h.ticker,
+                "weight": r(h.weight),
+                "volatility_annualized": r(vols[i] * np.sqrt(TRADING_DAYS)),
+                "marginal_volatility": r(marginal[i] * np.sqrt(TRADING_DAYS)),
+                "risk_contribution": r(component[i] / vol_daily),
+                "component_var": r(z * scale * component[i]),
+                "fundamentals": {k: r(v, 4) for k, v in fundamentals[i].items()},
+            }
+            for i, h in enumerate(holdings)
+        ],
+        "weighted_fundamentals": weighted,
+    }
+
+
+def portfolio_risk(
+    task_ids: list[str],
+    weights: list[float],
+    tickers: list[str] | None = None,
+    horizon_days: int = 10,
+    confidence: float = 0.99,
+) -> dict:
+    """Portfolio risk for a set of analyses, served from the results cache when the inputs are unchanged."""
+    holdings = resolve_holdings(task_ids, weights, tickers)
+    key = input_hash(holdings, horizon_days, confidence)
+    cached = get_portfolio_result(key)
+    if cached is not None:
+        return {**cached, "input_hash": key, "cached": True}
+    result = compute_portfolio_risk(holdings, horizon_days, confidence)
+    store_portfolio_result(key, task_ids, result)
+    return {**result, "input_hash": key, "cached": False}
@@ -0,0 +1,266 @@
+"""
+Memory-mapped daily price history store and rolling risk metrics.
+
+Each ticker is one flat binary file, PRICE_STORE_DIR/<TICKER>.bin, of
+(date, close) records: date as int32 days since 1970-01-01, close as float64,
+sorted by date. Reads map the file with np.memmap and slice the requested
+date range with a binary search on the date column, so only the pages that
+range covers are touched. Appends write whole records to the end of the file
+for dates after the last stored one, holding an exclusive flock on the file so
+concurrent appends from several worker processes cannot interleave or break
+the date order; a reader that races an append sees the records fully written
+so far.
+
+Rolling metrics are computed from cumulative sums over the whole series at
+once (no Python loop over windows):
+
+    rolling_volatility   annualized standard deviation of log returns
+    drawdown             close relative to its running maximum
+    rolling_beta         cov(asset, benchmark) / var(benchmark)
+    rolling_correlation  Pearson correlation
+
+Tickers are validated against TICKER_PATTERN before they become file names,
+so a ticker from a request or an agent cannot point outside the store.
+
+Import a CSV of date,close rows with:
+
+    python price_store.py import TSLA data/market/TSLA.csv
+"""
+
+import fcntl
+import os
+import re
+import sys
+
+import numpy as np
+
+MARKET_DATA_DIR = os.getenv("MARKET_DATA_DIR", "data/market")
+PRICE_STORE_DIR = os.getenv("PRICE_STORE_DIR", os.path.join(MARKET_DATA_DIR, "prices"))
+
+TRADING_DAYS = 252
+RECORD = np.dtype([("date", "<i4"), ("close", "<f8")], align=False)
+TICKER_PATTERN = re.compile(r"^[A-Z0-9.\-]{1,12}$")
+
+
+def normalize_ticker(ticker: str) -> str:
+    """Upper-cased ticker; raises ValueError unless it matches TICKER_PATTERN."""
+    normalized = ticker.strip().upper()
+    if not TICKER_PATTERN.match(normalized):
+        raise ValueError(f"Invalid ticker {ticker!r}: expected 1-12 letters, digits, '.' or '-'")
+    return normalized
+
+
+def to_days(dates) -> np.ndarray:
+    """ISO date strings / datetime64 values -> int32 days since the epoch."""
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int64).astype(np.int32)
+
+
+def to_dates(days: np.ndarray) -> np.ndarray:
+    return days.astype("datetime64[D]")
+
+
+class PriceStore:
+    """Per-ticker (date, close) files, read through memory maps."""
+
+    def __init__(self, data_dir: str = PRICE_STORE_DIR):
+        self.data_dir = data_dir
+
+    def path(self, ticker: str) -> str:
+        return os.path.join(self.data_dir, f"{normalize_ticker(ticker)}.bin")
+
+    def tickers(self) -> list[str]:
+        if not os.path.isdir(self.data_dir):
+            return []
+        return sorted(name[:-4] for name in os.listdir(self.data_dir) if name.endswith(".bin"))
+
+    def has(self, ticker: str) -> bool:
+        """Whether at least one record is stored (a file just created by an append does not count)."""
+        path = self.path(ticker)
+        return os.path.exists(path) and os.path.getsize(path) >= RECORD.itemsize
+
+    def records(self, ticker: str) -> np.ndarray:
+        """Memory-mapped record array for a ticker (empty if not stored)."""
+        path = self.path(ticker)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        count = size // RECORD.itemsize
+        if count == 0:
+            return np.empty(0, dtype=RECORD)
+        return np.memmap(path, dtype=RECORD, mode="r", shape=(count,))
+
+    def load(self, ticker: str, start=None, end=None, last: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """(days, closes) for start <= date <= end (ISO strings or datetime64), or the last `last` rows."""
+        records = self.records(ticker)
+        days = records["date"]
+        lo = int(np.searchsorted(days, to_days(start), side="left")) if start is not None else 0
+        hi = int(np.searchsorted(days, to_days(end), side="right")) if end is not None else len(records)
+        if last is not None:
+            lo = max(lo, hi - last)
+        window = records[lo:hi]
+        return np.array(window["date"]), np.array(window["close"])
+
+    def append(self, ticker: str, days: np.ndarray, closes: np.ndarray) -> int:
+        """Append rows dated after the last stored date; returns the number of rows written."""
+        days = np.asarray(days, dtype=np.int32)
+        closes = np.asarray(closes, dtype=np.float64)
+        order = np.argsort(days, kind="stable")
+        days, closes = days[order], closes[order]
+        keep = np.isfinite(closes) & (closes > 0)
+        keep[1:] &= days[1:] != days[:-1]  # first close wins for duplicate dates
+        days, closes = days[keep], closes[keep]
+
+        if not len(days):
+            return 0
+        os.makedirs(self.data_dir, exist_ok=True)
+        path = self.path(ticker)
+        with open(path, "ab") as f:
+            # The last stored date is only read under the lock, so another process's append is never duplicated
+            fcntl.flock(f, fcntl.LOCK_EX)
+            size = os.fstat(f.fileno()).st_size
+            if size % RECORD.itemsize:
+                f.truncate(size - size % RECORD.itemsize)  # drop a partial record left by an interrupted write
+            existing = self.records(ticker)
+            if len(existing):
+                newer = days > existing["date"][-1]
+                days, closes = days[newer], closes[newer]
+            if not len(days):
+                return 0
+            rows = np.empty(len(days), dtype=RECORD)
+            rows["date"], rows["close"] = days, closes
+            f.write(rows.tobytes())
+        return len(rows)
+
+    def import_csv(self, ticker: str, csv_path: str) -> int:
+        """Append a date,close CSV (header row, ISO dates) to a ticker's history."""
+        raw = np.loadtxt(csv_path, delimiter=",", skiprows=1, dtype=str, ndmin=2)
+        if not len(raw):
+            return 0
+        return self.append(ticker, to_days(raw[:, 0]), raw[:, 1].astype(float))
+
+
+price_store = PriceStore()
+
+
+# ── Rolling metrics ───────────────────────────────────────────────────────────
+
+def log_returns(closes: np.ndarray) -> np.ndarray:
+    """Daily log returns along the first axis (a series, or days x tickers)."""
+    return np.diff(np.log(closes), axis=0)
+
+
+def _window_sums(x: np.ndarray, window: int) -> np.ndarray:
+    """Sum of each trailing window of length `window` (len(x) - window + 1 values)."""
+    c = np.concatenate(([0.0], np.cumsum(x)))
+    return c[window:] - c[:-window]
+
+
+def check_window(window: int, length: int) -> None:
+    """Raise ValueError unless 2 <= window <= length (a window of 1 has no sample variance)."""
+    if not 2 <= window <= length:
+        raise ValueError(f"window must be between 2 and the {length} available returns (got {window})")
+
+
+def rolling_volatility(returns: np.ndarray, window: int = 63) -> np.ndarray:
+    """Annualized rolling standard deviation; entry i covers returns[i : i + window]."""
+    check_window(window, len(returns))
+    mean = _window_sums(returns, window) / window
+    mean_sq = _window_sums(returns * returns, window) / window
+    variance = np.maximum(mean_sq - mean * mean, 0.0) * window / (window - 1)
+    return np.sqrt(variance * TRADING_DAYS)
+
+
+def drawdown(closes: np.ndarray) -> np.ndarray:
+    """Fractional distance below the running maximum (0 at new highs, negative otherwise)."""
+    return closes / np.maximum.accumulate(closes) - 1.0
+
+
+def _rolling_moments(x: np.ndarray, y: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Rolling covariance of x and y and variances of x and y."""
+    mx = _window_sums(x, window) / window
+    my = _window_sums(y, window) / window
+    cov = _window_sums(x * y, window) / window - mx * my
+    var_x = _window_sums(x * x, window) / window - mx * mx
+    var_y = _window_sums(y * y, window) / window - my * my
+    return cov, var_x, var_y
+
+
+def rolling_beta(asset: np.ndarray, benchmark: np.ndarray, window: int = 252) -> np.ndarray:
+    check_window(window, len(asset))
+    cov, _, var_b = _rolling_moments(asset, benchmark, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(var_b > 0, cov / var_b, np.nan)
+
+
+def rolling_correlation(asset: np.ndarray, benchmark: np.ndarray, window: int = 252) -> np.ndarray:
+    check_window(window, len(asset))
+    cov, var_a, var_b = _rolling_moments(asset, benchmark, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where((var_a > 0) & (var_b > 0), cov / np.sqrt(var_a * var_b), np.nan)
+
+
+def aligned_returns(
+    days_a: np.ndarray, closes_a: np.ndarray, days_b: np.ndarray, closes_b: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Log returns of two series over their common dates: (days, returns_a, returns_b)."""
+    common, ia, ib = np.intersect1d(days_a, days_b, assume_unique=True, return_indices=True)
+    return common[1:], log_returns(closes_a[ia]), log_returns(closes_b[ib])
+
+
+def risk_metrics(ticker: str, benchmark: str | None = "SPY", window: int = 63, store: PriceStore = price_store) -> dict:
+    """Volatility, drawdown, and beta/correlation against a benchmark for one ticker."""
+    try:
+        ticker = normalize_ticker(ticker)
+        benchmark = normalize_ticker(benchmark) if benchmark else None
+    except ValueError as exc:
+        return {"error": str(exc)}
+    days, closes = store.load(ticker)
+    if len(closes) < 2:
+        return {"error": f"No price history stored for {ticker}."}
+    returns = log_returns(closes)
+    try:
+        check_window(window, len(returns))
+    except ValueError as exc:
+        return {"error": f"window_days: {exc}."}
+    dd = drawdown(closes)
+    one_year = returns[-TRADING_DAYS:]
+    vol = rolling_volatility(returns, window)
+    result = {
+        "ticker": ticker,
+        "first_date": str(to_dates(days[0])),
+        "last_date": str(to_dates(days[-1])),
+        "last_close": round(float(closes[-1]), 4),
+        "observations": int(len(closes)),
+        "window_days": window,
+        "volatility_annualized": {
+            "rolling_latest": round(float(vol[-1]), 4),
+            "rolling_max": round(float(vol.max()), 4),
+            "trailing_1y": round(float(one_year.std(ddof=1) * np.sqrt(TRADING_DAYS)), 4) if len(one_year) > 1 else None,
+            "full_history": round(float(returns.std(ddof=1) * np.sqrt(TRADING_DAYS)), 4) if len(returns) > 1 else None,
+        },
+        "drawdown": {
+            "current": round(float(dd[-1]), 4),
+            "max": round(float(dd.min()), 4),
+            "max_date": str(to_dates(days[int(dd.argmin())])),
+        },
+    }
+    if benchmark and benchmark != ticker and store.has(benchmark):
+        bench_days, bench_closes = store.load(benchmark)
+        _, asset_r, bench_r = aligned_returns(days, closes, bench_days, bench_closes)
+        beta_window = min(TRADING_DAYS, len(asset_r))
+        if beta_window >= 2:
+            beta = rolling_beta(asset_r, bench_r, beta_window)
+            corr = rolling_correlation(asset_r, bench_r, beta_window)
+            result["benchmark"] = {
+                "ticker": benchmark,
+                "common_days": int(len(asset_r)),
+                "beta_trailing_1y": round(float(beta[-1]), 4),
+                "correlation_trailing_1y": round(float(corr[-1]), 4),
+                "beta_range": [round(float(np.nanmin(beta)), 4), round(float(np.nanmax(beta)), 4)],
+            }
+    return result
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "import":
+        sys.exit("usage: python price_store.py import <TICKER> <prices.csv>")
+    written = price_store.import_csv(sys.argv[2], sys.argv[3])
+    print(f"Appended {written} rows to {price_store.path(sys.argv[2])}")
@@ -0,0 +1,178 @@
+"""
+Latency and token spans of an analysis run.
+
+A run records spans into the recorder installed by record_spans() (the worker
+does this around the crew). The recorder lives in a context variable, so branch
+threads that copy the run's context record into the same run. Span kinds:
+
+    run       the whole crew execution of one attempt
+    task      one crew task, from when its crew stage started it to its completion callback
+    llm       one LLM call: wall time, prompt/completion tokens, whether it was a cache hit
+    tool      one tool call: wall time, whether the run's tool memo answered it
+    rpm_wait  time an agent's max_rpm limiter blocked before an LLM call (waits >= RPM_WAIT_MIN_MS)
+
+Every span carries the Celery attempt (0 for the first run, n after n retries)
+and the crew task (step) it ran under. Within a sequential crew stage the
+current step is the first of the stage's tasks that has not completed yet.
+Spans are written to the analysis_spans table when the run ends, including
+when it fails, and summarized per step, kind and tool by summarize_spans.
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from db import save_analysis_spans
+
+# rpm_wait spans shorter than this are not recorded (the limiter is checked before every LLM call)
+RPM_WAIT_MIN_MS = 1.0
+
+
+@dataclass
+class SpanRecorder:
+    task_id: str
+    attempt: int = 0
+    spans: list[dict] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, span: dict) -> None:
+        with self.lock:
+            self.spans.append({"attempt": self.attempt, **span})
+
+
+_recorder: ContextVar[SpanRecorder | None] = ContextVar("span_recorder", default=None)
+# Crew stage running in this thread: {"pending": [task names], "started": perf_counter, "started_at": epoch}
+_stage: ContextVar[dict | None] = ContextVar("crew_stage", default=None)
+
+
+@contextmanager
+def record_spans(task_id: str, attempt: int = 0):
+    """Collect spans of one run and store them when the run ends; yields the recorder."""
+    recorder = SpanRecorder(task_id, attempt)
+    token = _recorder.set(recorder)
+    start, started_at = time.perf_counter(), time.time()
+    status, error = "ok", None
+    try:
+        yield recorder
+    except Exception as exc:
+        status, error = "error", str(exc)[:500]
+        raise
+    finally:
+        _recorder.reset(token)
+        recorder.add(_span("run", "crew", None, started_at, start, status=status, error=error))
+        save_analysis_spans(task_id, recorder.spans)
+
+
+def current_step() -> str | None:
+    stage = _stage.get()
+    return stage["pending"][0] if stage and stage["pending"] else None
+
+
+def _span(
+    kind: str, name: str, step: str | None, started_at: float, start: float,
+    status: str = "ok", error: str | None = None, **fields,
+) -> dict:
+    return {
+        "kind": kind,
+        "name": name,
+        "step": step,
+        "started_at": started_at,
+        "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+        "status": status,
+        "error": error,
+        **fields,
+    }
+
+
+@contextmanager
+def crew_stage(task_names: tuple[str, ...]):
+    """Mark a sequential crew of these tasks as running in this thread (attributes spans to its current task)."""
+    token = _stage.set({"pending": list(task_names), "started": time.perf_counter(), "started_at": time.time()})
+    try:
+        yield
+    finally:
+        _stage.reset(token)
+
+
+def task_completed(task_name: str) -> None:
+    """Record the span of a task of the current stage and move the stage on to its next task."""
+    stage = _stage.get()
+    recorder = _recorder.get()
+    if stage is None or task_name not in stage["pending"]:
+        return
+    if recorder is not None:
+        recorder.add(_span("task", task_name, task_name, stage["started_at"], stage["started"]))
+    stage["pending"].remove(task_name)
+    stage["started"], stage["started_at"] = time.perf_counter(), time.time()
+
+
+@contextmanager
+def span(kind: str, name: str):
+    """Time a call within the current run; yields a dict for extra fields (tokens, cached, ...)."""
+    recorder = _recorder.get()
+    if recorder is None:
+        yield {}
+        return
+    fields = {}
+    step = current_step()
+    start, started_at = time.perf_counter(), time.time()
+    status, error = "ok", None
+    try:
+        yield fields
+    except Exception as exc:
+        status, error = "error", str(exc)[:500]
+        raise
+    finally:
+        recorder.add(_span(kind, name, step, started_at, start, status=status, error=error, **fields))
+
+
+def timed_rpm_wait(check_or_wait, agent_name: str):
+    """Wrap an agent's rate-limiter check so blocking waits are recorded as rpm_wait spans."""
+
+    @functools.wraps(check_or_wait)
+    def wrapper(*args, **kwargs):
+        start, started_at = time.perf_counter(), time.time()
+        try:
+            return check_or_wait(*args, **kwargs)
+        finally:
+            recorder = _recorder.get()
+            waited = (time.perf_counter() - start) * 1000
+            if recorder is not None and waited >= RPM_WAIT_MIN_MS:
+                recorder.add(_span("rpm_wait", agent_name, current_step(), started_at, start, wait_ms=round(waited, 3)))
+
+    return wrapper
+
+
+def summarize_spans(spans: list[dict]) -> dict:
+    """Totals per step (crew task), per span kind and per tool."""
+
+    def bucket() -> dict:
+        return {
+            "calls": 0, "duration_ms": 0.0, "prompt_tokens": 0, "completion_tokens": 0, "cached": 0, "errors": 0,
+        }
+
+    def add(b: dict, s: dict) -> None:
+        b["calls"] += 1
+        b["duration_ms"] = round(b["duration_ms"] + (s["duration_ms"] or 0.0), 3)
+        b["prompt_tokens"] += s.get("prompt_tokens") or 0
+        b["completion_tokens"] += s.get("completion_tokens") or 0
+        b["cached"] += 1 if s.get("cached") else 0
+        b["errors"] += 1 if s.get("status") == "error" else 0
+
+    by_kind, by_tool, by_step = {}, {}, {}
+    for s in spans:
+        add(by_kind.setdefault(s["kind"], bucket()), s)
+        if s["kind"] == "tool":
+            add(by_tool.setdefault(s["name"], bucket()), s)
+        if s["kind"] in ("task", "run"):
+            continue
+        step = by_step.setdefault(s["step"] or "(none)", {})
+        add(step.setdefault(s["kind"], bucket()), s)
+    for s in spans:
+        if s["kind"] == "task":
+            step = by_step.setdefault(s["step"], {})
+            step["wall_ms"] = round(step.get("wall_ms", 0.0) + s["duration_ms"], 3)
+    return {"by_step": by_step, "by_kind": by_kind, "by_tool": by_tool}
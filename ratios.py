@@ -0,0 +1,205 @@
+"""
+Vectorized financial ratio engine.
+
+Works on a FactTable (line items x periods) from financial_facts. A few derived
+rows (total debt, net debt, quick assets, invested capital, annualized flows)
+are stacked under the extracted items, then every quotient ratio is computed
+in one fancy-indexed division and every growth rate in one shifted
+subtraction, for all periods at once. Missing inputs and zero denominators
+give NaN rather than raising.
+
+Flow items of a quarterly period are annualized (x4) where they are compared
+with balance-sheet items (ROE, ROA, turnover, days ratios).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from financial_facts import ITEMS, FactTable
+
+# Flow items that get an annualized "<item>_annual" row
+ANNUALIZED_ITEMS = ("revenue", "cost_of_revenue", "operating_income", "net_income", "ebitda")
+
+# Quotient ratios: name -> (numerator, denominator, multiplier)
+QUOTIENT_RATIOS: dict[str, tuple[str, str, float]] = {
+    # Margins
+    "gross_margin": ("gross_profit", "revenue", 1.0),
+    "operating_margin": ("operating_income", "revenue", 1.0),
+    "pretax_margin": ("pretax_income", "revenue", 1.0),
+    "net_margin": ("net_income", "revenue", 1.0),
+    "ebitda_margin": ("ebitda", "revenue", 1.0),
+    "operating_cash_flow_margin": ("operating_cash_flow", "revenue", 1.0),
+    "fcf_margin": ("free_cash_flow", "revenue", 1.0),
+    # Cost structure
+    "cost_of_revenue_ratio": ("cost_of_revenue", "revenue", 1.0),
+    "opex_ratio": ("operating_expenses", "revenue", 1.0),
+    "rd_intensity": ("research_and_development", "revenue", 1.0),
+    "sga_ratio": ("sga", "revenue", 1.0),
+    "sbc_ratio": ("stock_compensation", "revenue", 1.0),
+    "depreciation_ratio": ("depreciation", "revenue", 1.0),
+    "capex_intensity": ("capex", "revenue", 1.0),
+    "effective_tax_rate": ("income_tax", "pretax_income", 1.0),
+    # Cash flow quality
+    "cash_conversion": ("operating_cash_flow", "net_income", 1.0),
+    "fcf_conversion": ("free_cash_flow", "net_income", 1.0),
+    "capex_to_operating_cash_flow": ("capex", "operating_cash_flow", 1.0),
+    "capex_to_depreciation": ("capex", "depreciation", 1.0),
+    # Liquidity
+    "current_ratio": ("current_assets", "current_liabilities", 1.0),
+    "quick_ratio": ("quick_assets", "current_liabilities", 1.0),
+    "cash_ratio": ("cash", "current_liabilities", 1.0),
+    "working_capital_to_revenue": ("working_capital", "revenue_annual", 1.0),
+    # Leverage and solvency
+    "debt_to_equity": ("total_debt", "equity", 1.0),
+    "debt_to_assets": ("total_debt", "total_assets", 1.0),
+    "debt_to_capital": ("total_debt", "invested_capital", 1.0),
+    "liabilities_to_assets": ("total_liabilities", "total_assets", 1.0),
+    "liabilities_to_equity": ("total_liabilities", "equity", 1.0),
+    "equity_multiplier": ("total_assets", "equity", 1.0),
+    "net_debt_to_ebitda": ("net_debt", "ebitda_annual", 1.0),
+    "cash_to_debt": ("cash", "total_debt", 1.0),
+    "interest_coverage": ("operating_income", "interest_expense", 1.0),
+    # Returns (annualized)
+    "return_on_equity": ("net_income_annual", "equity", 1.0),
+    "return_on_assets": ("net_income_annual", "total_assets", 1.0),
+    "return_on_invested_capital": ("operating_income_annual", "invested_capital", 1.0),
+    # Efficiency (annualized)
+    "asset_turnover": ("revenue_annual", "total_assets", 1.0),
+    "inventory_turnover": ("cost_of_revenue_annual", "inventory", 1.0),
+    "receivable_days": ("accounts_receivable", "revenue_annual", 365.0),
+    "inventory_days": ("inventory", "cost_of_revenue_annual", 365.0),
+    "payable_days": ("accounts_payable", "cost_of_revenue_annual", 365.0),
+}
+
+# Items with quarter-over-quarter and year-over-year growth rates
+GROWTH_ITEMS = (
+    "revenue", "gross_profit", "operating_income", "net_income", "eps_diluted",
+    "ebitda", "operating_cash_flow", "free_cash_flow", "total_assets", "equity",
+)
+
+# Rows computed from the extracted items, stacked under them
+DERIVED_ITEMS = ("total_debt", "net_debt", "quick_assets", "working_capital", "invested_capital") + tuple(
+    f"{item}_annual" for item in ANNUALIZED_ITEMS
+)
+
+RATIO_NAMES = (
+    list(QUOTIENT_RATIOS)
+    + [f"{item}_growth_qoq" for item in GROWTH_ITEMS]
+    + [f"{item}_growth_yoy" for item in GROWTH_ITEMS]
+)
+
+# Row layout and gather indexes, fixed at import so a computation is a handful of array ops
+_ROWS = ITEMS + list(DERIVED_ITEMS)
+_ROW = {name: i for i, name in enumerate(_ROWS)}
+_ANNUAL_SOURCES = [_ROW[item] for item in ANNUALIZED_ITEMS]
+_ANNUAL_ROWS = [_ROW[f"{item}_annual"] for item in ANNUALIZED_ITEMS]
+_NUMERATORS = [_ROW[num] for num, _, _ in QUOTIENT_RATIOS.values()]
+_DENOMINATORS = [_ROW[den] for _, den, _ in QUOTIENT_RATIOS.values()]
+_MULTIPLIERS = np.array([mult for _, _, mult in QUOTIENT_RATIOS.values()])[:, None]
+_GROWTH_ROWS = [_ROW[item] for item in GROWTH_ITEMS]
+
+
+@dataclass
+class RatioTable:
+    """Ratios x periods, as fractions (days ratios in days). NaN where not computable."""
+
+    periods: list[str]
+    names: list[str]
+    values: np.ndarray
+
+    def get(self, name: str) -> np.ndarray:
+        return self.values[self.names.index(name)]
+
+    def latest(self) -> dict[str, float]:
+        """Most recent computable value of each ratio."""
+        latest = {}
+        for name, row in zip(self.names, self.values):
+            computed = np.flatnonzero(~np.isnan(row))
+            if len(computed):
+                latest[name] = float(row[computed[-1]])
+        return latest
+
+    def to_dict(self) -> dict:
+        return {
+            "periods": self.periods,
+            "ratios": {
+                name: [None if np.isnan(v) else round(float(v), 4) for v in row]
+                for name, row in zip(self.names, self.values)
+                if not np.isnan(row).all()
+            },
+        }
+
+
+def _nansum_rows(*rows: np.ndarray) -> np.ndarray:
+    """Row-wise sum treating NaN as 0, but NaN where every input is NaN."""
+    stacked = np.vstack(rows)
+    total = np.nansum(stacked, axis=0)
+    total[np.isnan(stacked).all(axis=0)] = np.nan
+    return total
+
+
+def _annualization(periods: list[str]) -> np.ndarray:
+    return np.array([1.0 if p.startswith("FY") else 4.0 for p in periods])
+
+
+def _prior_period_indexes(periods: list[str], quarters_back: int) -> np.ndarray:
+    """Index of the period `quarters_back` quarters earlier for each period (-1 if absent).
+
+    Fiscal-year periods only have a prior period for a full year back.
+    """
+    position = {p: i for i, p in enumerate(periods)}
+    prior = np.full(len(periods), -1)
+    for i, period in enumerate(periods):
+        if period.startswith("FY"):
+            if quarters_back % 4 == 0:
+                prior[i] = position.get(f"FY{int(period[2:]) - quarters_back // 4}", -1)
+            continue
+        quarter, year = int(period[1]), int(period[3:])
+        ordinal = year * 4 + quarter - 1 - quarters_back
+        prior[i] = position.get(f"Q{ordinal % 4 + 1}-{ordinal // 4}", -1)
+    return prior
+
+
+def _growth(rows: np.ndarray, prior: np.ndarray) -> np.ndarray:
+    """(current - prior) / |prior| for every row, NaN where there is no prior period."""
+    previous = rows[:, prior]
+    previous[:, prior < 0] = np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = (rows - previous) / np.abs(previous)
+    growth[~np.isfinite(growth)] = np.nan
+    return growth
+
+
+def compute_ratios(facts: FactTable) -> RatioTable:
+    """Compute every ratio in RATIO_NAMES for every period of the fact table."""
+    matrix = np.empty((len(_ROWS), len(facts.periods)))
+    if facts.items == ITEMS:
+        matrix[: len(ITEMS)] = facts.values
+    else:
+        matrix[: len(ITEMS)] = np.nan
+        for i, item in enumerate(facts.items):
+            matrix[_ROW[item]] = facts.values[i]
+
+    def row(name: str) -> np.ndarray:
+        return matrix[_ROW[name]]
+
+    gross_profit = row("gross_profit")
+    missing = np.isnan(gross_profit)
+    gross_profit[missing] = (row("revenue") - row("cost_of_revenue"))[missing]
+    row("total_debt")[:] = _nansum_rows(row("current_debt"), row("long_term_debt"))
+    row("quick_assets")[:] = row("current_assets") - np.nan_to_num(row("inventory"))
+    row("working_capital")[:] = row("current_assets") - row("current_liabilities")
+    row("net_debt")[:] = row("total_debt") - row("cash")
+    row("invested_capital")[:] = row("total_debt") + row("equity")
+    matrix[_ANNUAL_ROWS] = matrix[_ANNUAL_SOURCES] * _annualization(facts.periods)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        quotients = matrix[_NUMERATORS] / matrix[_DENOMINATORS] * _MULTIPLIERS
+    quotients[~np.isfinite(quotients)] = np.nan
+
+    growth_rows = matrix[_GROWTH_ROWS]
+    qoq = _growth(growth_rows, _prior_period_indexes(facts.periods, 1))
+    yoy = _growth(growth_rows, _prior_period_indexes(facts.periods, 4))
+
+    return RatioTable(periods=list(facts.periods), names=list(RATIO_NAMES), values=np.concatenate([quotients, qoq, yoy]))
@@ -0,0 +1,191 @@
+"""
+Monte Carlo value-at-risk and fundamental stress testing.
+
+Market risk: horizon returns are simulated by bootstrapping the last
+RISK_HISTORY_DAYS daily log returns of the ticker in the price store (a
+MARKET_DATA_DIR/<TICKER>.csv of date,close rows is imported into the store on
+first use). All RISK_MC_PATHS paths are drawn in one (paths x horizon) index
+array from a generator seeded with RISK_MC_SEED, so the same inputs always
+give the same numbers. Volatility stress scenarios rescale the demeaned draws
+of those same paths instead of drawing again. Without a usable history, a
+Student-t model at RISK_DEFAULT_ANNUAL_VOL is used and the result says so.
+
+Fundamental stress: a grid of revenue shocks x gross-margin compression is
+applied to the latest reported quarter of the fact table, holding operating
+expenses fixed, and reports the stressed operating margin, interest coverage,
+free cash flow and cash runway for every cell in one broadcast.
+"""
+
+import os
+import re
+
+import numpy as np
+
+from financial_facts import FactTable
+from price_store import MARKET_DATA_DIR, TRADING_DAYS, PriceStore, log_returns, price_store
+
+RISK_MC_PATHS = int(os.getenv("RISK_MC_PATHS", "100000"))
+RISK_MC_SEED = int(os.getenv("RISK_MC_SEED", "42"))
+RISK_DEFAULT_ANNUAL_VOL = float(os.getenv("RISK_DEFAULT_ANNUAL_VOL", "0.40"))
+RISK_HISTORY_DAYS = int(os.getenv("RISK_HISTORY_DAYS", str(5 * TRADING_DAYS)))
+# Fewer daily returns than this and the history is not used for bootstrapping
+MIN_HISTORY_DAYS = 60
+# Longest VaR horizon: the simulation holds a (paths x horizon) array, ~100 MB per 10 days at 100k paths
+MAX_HORIZON_DAYS = 60
+STUDENT_T_DF = 4
+
+CONFIDENCE_LEVELS = (0.95, 0.99)
+VOL_MULTIPLIERS = (1.0, 1.5, 2.0, 3.0)
+REVENUE_SHOCKS = (0.0, -0.10, -0.20, -0.30, -0.40)
+MARGIN_COMPRESSION = (0.0, -0.02, -0.05, -0.10)  # gross margin, in fraction points
+# Used when the latest quarter has no usable pretax income / tax provision
+DEFAULT_TAX_RATE = 0.21
+
+_TICKER_PREFIX = re.compile(r"^([A-Z][A-Z.]{0,5})[-_]")
+
+
+def ticker_from_path(path: str) -> str | None:
+    """Ticker from a filename like "TSLA-Q2-2025-Update.pdf", else None."""
+    match = _TICKER_PREFIX.match(os.path.basename(path))
+    return match.group(1) if match else None
+
+
+def load_returns(ticker: str, data_dir: str = MARKET_DATA_DIR, store: PriceStore = price_store) -> np.ndarray | None:
+    """Most recent RISK_HISTORY_DAYS daily log returns, oldest first (None without a history)."""
+    if not store.has(ticker):
+        csv_path = os.path.join(data_dir, f"{ticker.upper()}.csv")
+        if not os.path.exists(csv_path):
+            return None
+        store.import_csv(ticker, csv_path)
+    _, closes = store.load(ticker, last=RISK_HISTORY_DAYS + 1)
+    if len(closes) < 2:
+        return None
+    return log_returns(closes)
+
+
+def simulate_horizon_returns(
+    daily_returns: np.ndarray | None,
+    horizon_days: int,
+    paths: int = RISK_MC_PATHS,
+    seed: int = RISK_MC_SEED,
+) -> tuple[float, np.ndarray, str]:
+    """Simulate horizon log returns as (drift, demeaned path sums, method).
+
+    The horizon return of a path under a volatility multiplier k is drift + k * sums[path].
+    Raises ValueError unless 1 <= horizon_days <= MAX_HORIZON_DAYS.
+    """
+    if not 1 <= horizon_days <= MAX_HORIZON_DAYS:
+        raise ValueError(f"horizon_days must be between 1 and {MAX_HORIZON_DAYS} trading days (got {horizon_days})")
+    rng = np.random.default_rng(seed)
+    if daily_returns is not None and len(daily_returns) >= MIN_HISTORY_DAYS:
+        mu = float(daily_returns.mean())
+        draws = rng.integers(0, len(daily_returns), size=(paths, horizon_days))
+        sums = (daily_returns - mu)[draws].sum(axis=1)
+        return mu * horizon_days, sums, f"bootstrap of {len(daily_returns)} daily returns"
+
+    daily_vol = RISK_DEFAULT_ANNUAL_VOL / np.sqrt(TRADING_DAYS)
+    # Student-t scaled to unit variance, then to the assumed daily volatility
+    t = rng.standard_t(STUDENT_T_DF, size=(paths, horizon_days)) * np.sqrt((STUDENT_T_DF - 2) / STUDENT_T_DF)
+    sums = (t * daily_vol).sum(axis=1)
+    return 0.0, sums, f"Student-t (df={STUDENT_T_DF}) at assumed {RISK_DEFAULT_ANNUAL_VOL:.0%} annual volatility"
+
+
+def value_at_risk(
+    drift: float,
+    sums: np.ndarray,
+    confidence_levels: tuple[float, ...] = CONFIDENCE_LEVELS,
+    vol_multipliers: tuple[float, ...] = VOL_MULTIPLIERS,
+) -> dict[str, np.ndarray]:
+    """VaR and CVaR (as loss fractions of position value) for every vol multiplier x confidence level."""
+    log_returns = drift + np.asarray(vol_multipliers)[:, None] * sums[None, :]
+    losses = -np.expm1(log_returns)  # (multipliers, paths)
+    var = np.quantile(losses, confidence_levels, axis=1).T  # (multipliers, levels)
+    tail = losses[:, :, None] >= var[:, None, :]
+    cvar = (losses[:, :, None] * tail).sum(axis=1) / tail.sum(axis=1)
+    return {"var": var, "cvar": cvar, "expected_return": np.expm1(log_returns).mean(axis=1)}
+
+
+def fundamental_stress(
+    facts: FactTable,
+    revenue_shocks: tuple[float, ...] = REVENUE_SHOCKS,
+    margin_compression: tuple[float, ...] = MARGIN_COMPRESSION,
+) -> dict | None:
+    """Stressed metrics for every revenue shock x gross-margin compression, or None without revenue."""
+    revenue = facts.latest("revenue")
+    if np.isnan(revenue) or revenue <= 0:
+        return None
+    gross_profit = facts.latest("gross_profit")
+    if np.isnan(gross_profit):
+        gross_profit = revenue - facts.latest("cost_of_revenue")
+    operating_income = facts.latest("operating_income")
+    opex = facts.latest("operating_expenses")
+    if np.isnan(opex):
+        opex = gross_profit - operating_income
+    interest = facts.latest("interest_expense")
+    free_cash_flow = facts.latest("free_cash_flow")
+    cash = facts.latest("cash")
+    pretax, tax = facts.latest("pretax_income"), facts.latest("income_tax")
+    tax_rate = tax / pretax if pretax > 0 and not np.isnan(tax) else DEFAULT_TAX_RATE
+
+    shocks = np.asarray(revenue_shocks)[:, None]
+    compression = np.asarray(margin_compression)[None, :]
+    stressed_revenue = revenue * (1 + shocks)
+    stressed_gross = stressed_revenue * (gross_profit / revenue + compression)
+    stressed_operating = stressed_gross - opex
+    with np.errstate(divide="ignore", invalid="ignore"):
+        operating_margin = stressed_operating / stressed_revenue
+    coverage = stressed_operating / interest if interest > 0 else np.full_like(stressed_operating, np.nan)
+    # Lost operating income flows through to free cash flow after tax
+    stressed_fcf = free_cash_flow + (stressed_operating - operating_income) * (1 - tax_rate)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        runway = np.where(stressed_fcf < 0, cash / -stressed_fcf, np.inf)
+
+    def value(v: float, digits: int = 4) -> float | None:
+        return round(float(v), digits) if np.isfinite(v) else None
+
+    def grid(values: np.ndarray, digits: int = 4) -> list[list[float | None]]:
+        return [[value(v, digits) for v in row] for row in values]
+
+    return {
+        "base_quarter": {
+            "revenue": value(revenue, 1),
+            "gross_margin": value(gross_profit / revenue),
+            "operating_income": value(operating_income, 1),
+            "free_cash_flow": value(free_cash_flow, 1),
+            "cash": value(cash, 1),
+        },
+        "revenue_shocks": list(revenue_shocks),
+        "gross_margin_compression": list(margin_compression),
+        "operating_margin": grid(operating_margin),
+        "interest_coverage": grid(coverage, 2),
+        "free_cash_flow": grid(stressed_fcf, 1),
+        "cash_runway_quarters": grid(runway, 1),  # null = free cash flow stays positive
+    }
+
+
+def assess_risk(facts: FactTable, ticker: str | None, horizon_days: int = 10) -> dict:
+    """Monte Carlo VaR/CVaR with volatility stress, plus the fundamental stress grid."""
+    returns = load_returns(ticker) if ticker else None
+    drift, sums, method = simulate_horizon_returns(returns, horizon_days)
+    risk = value_at_risk(drift, sums)
+    market = {
+        "ticker": ticker,
+        "method": method,
+        "paths": len(sums),
+        "seed": RISK_MC_SEED,
+        "horizon_days": horizon_days,
+        "confidence_levels": list(CONFIDENCE_LEVELS),
+        "vol_multipliers": list(VOL_MULTIPLIERS),
+        "var": np.round(risk["var"], 4).tolist(),
+        "cvar": np.round(risk["cvar"], 4).tolist(),
+        "expected_return": np.round(risk["expected_return"], 4).tolist(),
+    }
+    if returns is not None and len(returns):
+        market["annualized_volatility"] = round(float(returns.std() * np.sqrt(TRADING_DAYS)), 4)
+    return {
+        "market_risk": market,
+        "fundamental_stress": fundamental_stress(facts),
+        "notes": "VaR/CVaR are loss fractions of position value over the horizon; rows are vol multipliers, "
+        "columns are confidence levels. Stress grids: rows are revenue shocks, columns are gross margin compression; "
+        "currency values in USD millions per quarter.",
+    }
@@ -24,11 +24,19 @@ fi
 # 2. Activate venv
 source venv/bin/activate
 
-# 3. Start Celery worker in background
-echo "[*] Starting Celery worker..."
-celery -A tasks_worker worker --loglevel=info --concurrency=2 &>/tmp/celery_worker.log &
+# 3. Start Celery workers in background
+#    - "celery" queue: LLM crew runs (I/O-bound)
+#    - "parsing" queue: PDF pre-extraction (CPU-bound, scaled to the CPU count)
+echo "[*] Starting Celery workers..."
+celery -A tasks_worker worker -Q celery -n analyzer@%h --loglevel=info --concurrency=2 &>/tmp/celery_worker.log &
 CELERY_PID=$!
 echo "$CELERY_PID" > /tmp/celery_worker.pid
+# Exported so each parse process sizes its PDF pool to CPUs / PARSE_CONCURRENCY (no more parsers than CPUs)
+export PARSE_CONCURRENCY="${PARSE_CONCURRENCY:-$(nproc 2>/dev/null || echo 2)}"
+# The parse worker never runs the crew, so its processes skip building the LLM client, agents and tasks
+PRELOAD_CREW=0 celery -A tasks_worker worker -Q parsing -n parser@%h --loglevel=info --concurrency="$PARSE_CONCURRENCY" &>/tmp/celery_parser.log &
+PARSER_PID=$!
+echo "$PARSER_PID" > /tmp/celery_parser.pid
 sleep 3
 
 if kill -0 "$CELERY_PID" 2>/dev/null; then
@@ -38,6 +46,13 @@ else
     exit 1
 fi
 
+if kill -0 "$PARSER_PID" 2>/dev/null; then
+    echo "[✓] Celery parse worker started (PID: $PARSER_PID)"
+else
+    echo "[✗] Celery parse worker failed to start. Check /tmp/celery_parser.log"
+    exit 1
+fi
+
 # 4. Start FastAPI
 echo "[*] Starting FastAPI server on http://127.0.0.1:8000 ..."
 echo ""
@@ -49,6 +64,6 @@ echo "Press Ctrl+C to stop all services."
 echo "==================================="
 
 # Trap Ctrl+C to clean up
-trap 'echo ""; echo "[*] Shutting down..."; kill $CELERY_PID 2>/dev/null; echo "[✓] Done."; exit 0' INT TERM
+trap 'echo ""; echo "[*] Shutting down..."; kill $CELERY_PID $PARSER_PID 2>/dev/null; echo "[✓] Done."; exit 0' INT TERM
 
 fastapi dev main.py
@@ -11,17 +11,20 @@ else
     echo "[-] FastAPI not running"
 fi
 
-# Stop Celery worker
-if [ -f /tmp/celery_worker.pid ]; then
-    CELERY_PID=$(cat /tmp/celery_worker.pid)
-    if kill -0 "$CELERY_PID" 2>/dev/null; then
-        kill "$CELERY_PID" 2>/dev/null
-        echo "[✓] Celery worker stopped (PID: $CELERY_PID)"
-    else
-        echo "[-] Celery worker not running"
+# Stop Celery workers (crew worker and parse worker)
+STOPPED=0
+for PID_FILE in /tmp/celery_worker.pid /tmp/celery_parser.pid; do
+    if [ -f "$PID_FILE" ]; then
+        CELERY_PID=$(cat "$PID_FILE")
+        if kill -0 "$CELERY_PID" 2>/dev/null; then
+            kill "$CELERY_PID" 2>/dev/null
+            echo "[✓] Celery worker stopped (PID: $CELERY_PID)"
+            STOPPED=1
+        fi
+        rm -f "$PID_FILE"
     fi
-    rm -f /tmp/celery_worker.pid
-else
+done
+if [ "$STOPPED" = "0" ]; then
     # Try pkill as fallback
     pkill -f "celery.*tasks_worker" 2>/dev/null && echo "[✓] Celery worker stopped" || echo "[-] Celery worker not running"
 fi
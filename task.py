@@ -1,18 +1,44 @@
 ## Importing libraries and files
-from crewai import Task
+from crewai import Agent, Task
 
-from agents import financial_analyst, verifier
-from tools import search_tool, read_data_tool
+from tools import search_tool, read_data_tool, search_document_tool, extract_facts_tool, InvestmentTool, RiskTool
 
-## Creating a task to help solve user's query
-analyze_financial_document = Task(
-    description="Analyze the financial document located at '{file_path}' to answer the user's query: {query}.\n\
+
+def build_tasks(agents: dict[str, Agent]) -> dict[str, Task]:
+    """The four tasks, keyed by name, assigned to agents built by agents.build_agents."""
+    financial_analyst = agents["financial_analyst"]
+    investment_advisor = agents["investment_advisor"]
+    risk_assessor = agents["risk_assessor"]
+
+    ## Creating a document verification task
+    verification = Task(
+        description="Verify whether the uploaded document at '{file_path}' is a valid financial document.\n\
+Use the Read Financial Document tool with the path '{file_path}' to read the document.\n\
+Validate that the extracted data is consistent and complete.",
+
+        expected_output="""A verification report including:
+- Document type classification (10-K, 10-Q, earnings report, annual report, etc.)
+- Confidence level in the classification
+- Key financial sections identified in the document
+- Any data quality issues or missing information flagged
+- Confirmation of whether the document is suitable for financial analysis""",
+
+        agent=financial_analyst,
+        tools=[read_data_tool, search_document_tool, extract_facts_tool, InvestmentTool.analyze_investment_tool],
+        async_execution=False
+    )
+
+    ## Creating a task to help solve user's query
+    analyze_financial_document = Task(
+        description="Analyze the financial document located at '{file_path}' to answer the user's query: {query}.\n\
 Read the uploaded financial document carefully using the Read Financial Document tool with the path '{file_path}'.\n\
+If the tool output is truncated, continue reading with the start_page it suggests (use start_page/end_page to read specific sections).\n\
+Use the Extract Financial Facts tool with the same path for exact statement figures, and the Analyze Investment Ratios tool for margins, growth, leverage, liquidity and return ratios.\n\
 Provide a detailed analysis covering revenue, expenses, profit margins, cash flow, and key ratios.\n\
 Identify notable trends, year-over-year changes, and significant financial events.\n\
 Search the internet for relevant market context and recent news about the company.",
 
-    expected_output="""A comprehensive financial analysis report including:
+        expected_output="""A comprehensive financial analysis report including:
 - Executive summary of key findings
 - Revenue and profitability analysis with specific numbers from the document
 - Key financial ratios (P/E, debt-to-equity, current ratio, ROE, etc.)
@@ -20,20 +46,24 @@ Search the internet for relevant market context and recent news about the compan
 - Market context from recent news and industry analysis
 - Clear, data-driven conclusions that directly address the user's query""",
 
-    agent=financial_analyst,
-    tools=[read_data_tool],
-    async_execution=False,
-)
+        agent=financial_analyst,
+        # Explicit, so a resumed run still gets a checkpointed verification (empty when verification is skipped)
+        context=[verification],
+        tools=[read_data_tool, search_document_tool, extract_facts_tool, InvestmentTool.analyze_investment_tool],
+        async_execution=False,
+    )
 
-## Creating an investment analysis task
-investment_analysis = Task(
-    description="Based on the financial document analysis, provide investment recommendations for the query: {query}.\n\
-The financial document is located at '{file_path}'. Use the Read Financial Document tool with this path if needed.\n\
-Assess valuation metrics and compare with industry peers.\n\
+    ## Creating an investment analysis task
+    investment_analysis = Task(
+        description="Based on the financial document analysis, provide investment recommendations for the query: {query}.\n\
+The financial document is located at '{file_path}'. Use the Search Financial Document tool with this path to look up specific figures, or the Read Financial Document tool if needed.\n\
+Use the Analyze Investment Ratios tool with this path for precomputed margins, growth rates, leverage, liquidity and returns instead of calculating them by hand.\n\
+Use the DCF Valuation tool with this path for intrinsic value and its sensitivity to WACC, terminal growth and FCF margin.\n\
+Assess valuation metrics and compare with industry peers using the Compare With Peers tool (pass the company's ticker).\n\
 Provide balanced buy/hold/sell recommendations supported by data from the document.\n\
 Consider both short-term catalysts and long-term fundamentals.",
 
-    expected_output="""A structured investment analysis including:
+        expected_output="""A structured investment analysis including:
 - Investment thesis with bull and bear cases
 - Valuation analysis with relevant metrics
 - Comparison with industry peers and benchmarks
@@ -41,20 +71,30 @@ Consider both short-term catalysts and long-term fundamentals.",
 - Key catalysts and risks to watch
 - Appropriate disclaimers that this is not personalized financial advice""",
 
-    agent=financial_analyst,
-    tools=[read_data_tool],
-    async_execution=False,
-)
+        agent=investment_advisor,
+        context=[analyze_financial_document],  # independent of risk_assessment, so the two can run in parallel
+        tools=[
+            read_data_tool,
+            search_document_tool,
+            extract_facts_tool,
+            InvestmentTool.analyze_investment_tool,
+            InvestmentTool.dcf_valuation_tool,
+            InvestmentTool.peer_comparison_tool,
+        ],
+        async_execution=False,
+    )
 
-## Creating a risk assessment task
-risk_assessment = Task(
-    description="Perform a comprehensive risk assessment based on the financial document at '{file_path}' for the query: {query}.\n\
+    ## Creating a risk assessment task
+    risk_assessment = Task(
+        description="Perform a comprehensive risk assessment based on the financial document at '{file_path}' for the query: {query}.\n\
+Use the Search Financial Document tool with the path '{file_path}' to look up debt, liquidity, cash flow and risk disclosures.\n\
+Use the Assess Financial Risk tool with this path (and the company's ticker) for value-at-risk, CVaR and stress scenarios; cite its numbers instead of estimating them.\n\
 Evaluate market risk, credit risk, liquidity risk, and operational risk.\n\
-Analyze debt levels, cash flow stability, and exposure to market volatility.\n\
+Analyze debt levels, cash flow stability, and exposure to market volatility (use the Market Risk Metrics tool for historical volatility, drawdown and beta).\n\
 Assess regulatory and compliance risks relevant to the company.\n\
 Provide actionable risk mitigation recommendations.",
 
-    expected_output="""A detailed risk assessment report including:
+        expected_output="""A detailed risk assessment report including:
 - Risk summary with severity ratings (low/medium/high)
 - Market risk analysis (interest rate, currency, equity exposure)
 - Credit and liquidity risk evaluation
@@ -62,25 +102,22 @@ Provide actionable risk mitigation recommendations.",
 - Stress test scenarios and their potential impact
 - Recommended risk mitigation strategies (diversification, hedging, etc.)""",
 
-    agent=financial_analyst,
-    tools=[read_data_tool],
-    async_execution=False,
-)
-
-    
-verification = Task(
-    description="Verify whether the uploaded document at '{file_path}' is a valid financial document.\n\
-Use the Read Financial Document tool with the path '{file_path}' to read the document.\n\
-Validate that the extracted data is consistent and complete.",
-
-    expected_output="""A verification report including:
-- Document type classification (10-K, 10-Q, earnings report, annual report, etc.)
-- Confidence level in the classification
-- Key financial sections identified in the document
-- Any data quality issues or missing information flagged
-- Confirmation of whether the document is suitable for financial analysis""",
+        agent=risk_assessor,
+        context=[analyze_financial_document],
+        tools=[
+            read_data_tool,
+            search_document_tool,
+            extract_facts_tool,
+            InvestmentTool.analyze_investment_tool,
+            RiskTool.create_risk_assessment_tool,
+            RiskTool.market_risk_metrics_tool,
+        ],
+        async_execution=False,
+    )
 
-    agent=financial_analyst,
-    tools=[read_data_tool],
-    async_execution=False
-)
\ No newline at end of file
+    return {
+        "verification": verification,
+        "analyze_financial_document": analyze_financial_document,
+        "investment_analysis": investment_analysis,
+        "risk_assessment": risk_assessment,
+    }
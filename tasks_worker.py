@@ -1,30 +1,180 @@
+import contextvars
+import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from celery.signals import worker_process_init, worker_process_shutdown
+from analysis_events import publish_event
 from celery_app import celery
-from crewai import Crew, Process
-from agents import financial_analyst, verifier, investment_advisor, risk_assessor
-from task import analyze_financial_document, investment_analysis, risk_assessment, verification
-from db import update_analysis_status
+from crew_factory import CrewKit, get_crew_kit, init_crew_kit, on_task_complete
+from db import (
+    delete_analysis_checkpoints,
+    get_analysis_checkpoints,
+    init_db,
+    save_analysis_checkpoint,
+    update_analysis_classification,
+    update_analysis_status,
+    update_document_metadata,
+)
+from doc_classifier import classify_document
+from llm_cache import cache_aliases, stats as llm_cache_stats
+from pdf_extract import read_metadata, shutdown_pool
+from profiling import crew_stage, record_spans, task_completed
+from tool_memo import tool_call_memo
+from tools import load_document
+
+logger = logging.getLogger(__name__)
+
+# "parallel": independent tasks run concurrently after the analysis; "sequential": one crew, one task at a time
+CREW_EXECUTION = os.getenv("CREW_EXECUTION", "parallel")
+# "0" in workers that never run the crew (start.sh sets it for the parse worker): nothing is prebuilt there
+PRELOAD_CREW = os.getenv("PRELOAD_CREW", "1") != "0"
+
+# Tasks that only depend on analyze_financial_document (their context) and not on each other
+PARALLEL_TASKS = ("investment_analysis", "risk_assessment")
+
+
+class DocumentRejected(Exception):
+    """The local classifier judged the upload not to be a financial document."""
+
+
+@worker_process_init.connect
+def init_worker_db(**kwargs):
+    """Make sure the tables the tool layer reads and writes exist in this worker."""
+    init_db()
+
+
+@worker_process_init.connect
+def init_worker_crew(**kwargs):
+    """Build the LLM client, agents and tasks once for every analysis this worker process runs."""
+    if PRELOAD_CREW:
+        init_crew_kit()
+
+
+@worker_process_shutdown.connect
+def shutdown_pdf_pool(**kwargs):
+    """Stop this worker process's PDF extraction pool when the process exits."""
+    shutdown_pool()
+
+
+def run_crew(kit: CrewKit, task_names: tuple[str, ...], inputs: dict, agent_names: tuple[str, ...] | None = None):
+    if task_names:
+        with crew_stage(task_names):
+            kit.crew(task_names, agent_names).kickoff(inputs)
+
+
+def run_crew_dag(kit: CrewKit, head: tuple[str, ...], branches: tuple[str, ...], inputs: dict):
+    """Run the head tasks as one sequential crew, then each branch task in its own crew on its own thread.
+
+    CrewAI's async_execution cannot express this: a sync task waits for every pending
+    async task before it starts, and a crew may end with at most one async task.
+    Branches read the head's output through their task context, use their own agent
+    (agents are not safe to share between threads) and see this run's context
+    variables (tool memo, task listener).
+    """
+    run_crew(kit, head, inputs)
+    with ThreadPoolExecutor(max_workers=max(len(branches), 1), thread_name_prefix="crew-branch") as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, run_crew, kit, (name,), inputs, (kit.agent_of(name),))
+            for name in branches
+        ]
+        for future in futures:
+            future.result()
+
+
+@celery.task(name="parse_document")
+def parse_document_task(file_path: str) -> dict:
+    """Celery task that extracts a PDF's pages, page count and metadata ahead of the crew.
+
+    Results are stored under the document hash (document cache + documents table),
+    so the crew's tools find the text ready. Failures are logged, not raised: the
+    chained analysis task still runs and parses the document itself.
+    """
+    try:
+        doc = load_document(file_path)
+        metadata = read_metadata(file_path)
+        update_document_metadata(doc.doc_hash, os.path.getsize(file_path), metadata)
+        return {"doc_hash": doc.doc_hash, "page_count": doc.page_count, "metadata": metadata}
+    except Exception as exc:
+        logger.warning("Pre-extraction failed for %s: %s", file_path, exc)
+        return {"error": str(exc)}
 
 
 @celery.task(bind=True, name="analyze_document", max_retries=3)
 def analyze_document_task(self, query: str, file_path: str):
-    """Celery task that runs the CrewAI crew for financial document analysis."""
+    """Celery task that runs the CrewAI crew for financial document analysis.
+
+    Each completed crew task is checkpointed under the Celery task id, so a retry
+    (which keeps that id) runs only the steps that had not finished."""
+    terminal = True
     try:
-        self.update_state(state="PROCESSING", meta={"status": "Running AI agents..."})
+        self.update_state(state="PROCESSING", meta={"status": "Checking document..."})
         update_analysis_status(self.request.id, "processing")
 
-        financial_crew = Crew(
-            agents=[financial_analyst, verifier, investment_advisor, risk_assessor],
-            tasks=[verification, analyze_financial_document, investment_analysis, risk_assessment],
-            process=Process.sequential,
+        # Decide locally whether the LLM verification step is needed at all
+        doc = load_document(file_path)
+        classification = classify_document(doc)
+        update_analysis_classification(
+            self.request.id, classification.label, classification.confidence, classification.latency_ms
+        )
+        logger.info(
+            "Classified %s as %s (confidence %.2f, signals %s) in %.1f ms",
+            file_path, classification.label, classification.confidence, classification.signals, classification.latency_ms,
         )
+        if classification.is_rejected:
+            raise DocumentRejected(
+                f"Document rejected: not recognized as a financial document (confidence {classification.confidence:.2f})"
+            )
+
+        head = ("analyze_financial_document",) if classification.is_financial else ("verification", "analyze_financial_document")
 
-        result = financial_crew.kickoff({"query": query, "file_path": file_path})
+        # Steps completed by an earlier attempt (rate-limited retry) are not run again
+        checkpoints = get_analysis_checkpoints(self.request.id)
+        pending_head = tuple(name for name in head if name not in checkpoints)
+        pending_branches = tuple(name for name in PARALLEL_TASKS if name not in checkpoints)
+        status = "Running AI agents..."
+        if checkpoints:
+            status = f"Resuming AI agents after {len(checkpoints)} completed step(s)..."
+            logger.info("Resuming %s after %s", self.request.id, ", ".join(checkpoints))
+        self.update_state(state="PROCESSING", meta={"status": status})
+        publish_event(self.request.id, "status", {"status": status})
+        inputs = {"query": query, "file_path": file_path}
 
-        analysis_text = str(result)
+        def save_checkpoint(step: str, output: str):
+            task_completed(step)
+            save_analysis_checkpoint(self.request.id, step, output)
+            publish_event(self.request.id, "step", {"step": step, "output": output})
+
+        # Agents, tasks and crews are built once per worker process; only per-run state is reset
+        setup_start = time.perf_counter()
+        kit = get_crew_kit()
+        with kit.run_lock:
+            kit.reset_run_state()
+            for step, output in checkpoints.items():
+                kit.restore_output(step, output)
+            logger.info("Crew setup for %s took %.2f ms", self.request.id, (time.perf_counter() - setup_start) * 1000)
+
+            # Repeated identical tool calls within this run are served from the run's memo; LLM
+            # responses are cached with the upload path aliased to the document hash, so a
+            # re-upload of the same report with the same query reuses them. Timings and tokens of
+            # this attempt are stored as spans (GET /analyses/{task_id}/profile)
+            with (
+                record_spans(self.request.id, self.request.retries),
+                tool_call_memo(self.request.id),
+                cache_aliases({file_path: f"<document {doc.doc_hash}>"}),
+                on_task_complete(save_checkpoint),
+            ):
+                if CREW_EXECUTION == "sequential":
+                    run_crew(kit, pending_head + pending_branches, inputs)
+                else:
+                    run_crew_dag(kit, pending_head, pending_branches, inputs)
+            # The same result in either mode, so /status and the analysis cache do not depend on CREW_EXECUTION
+            analysis_text = "\n\n---\n\n".join(kit.output_of(name) for name in PARALLEL_TASKS)
+            logger.info("LLM cache (this worker process): %s", llm_cache_stats.to_dict())
 
         # Persist to database
         update_analysis_status(self.request.id, "success", analysis=analysis_text)
+        publish_event(self.request.id, "done", {"analysis": analysis_text, "cached_from": None})
 
         return {
             "status": "success",
@@ -36,23 +186,34 @@ def analyze_document_task(self, query: str, file_path: str):
     except Exception as exc:
         error_msg = str(exc)
 
-        # Retry on rate limit errors with exponential backoff
-        if "RateLimitError" in error_msg or "429" in error_msg:
+        # Retry on rate limit errors with exponential backoff (never for rejected uploads).
+        # The retry resumes from the checkpoints of the steps that completed.
+        is_rate_limit = "RateLimitError" in error_msg or "429" in error_msg
+        if is_rate_limit and not isinstance(exc, DocumentRejected) and self.request.retries < self.max_retries:
+            terminal = False
             countdown = 60 * (2 ** self.request.retries)  # 60s, 120s, 240s
             self.update_state(
                 state="RETRYING",
                 meta={"status": f"Rate limited. Retrying in {countdown}s..."},
             )
             update_analysis_status(self.request.id, "retrying")
+            publish_event(self.request.id, "status", {"status": f"Rate limited. Retrying in {countdown}s..."})
             raise self.retry(exc=exc, countdown=countdown)
 
         # Persist failure to database
         update_analysis_status(self.request.id, "failed", error=error_msg)
+        publish_event(self.request.id, "failed", {"error": error_msg})
         raise
 
     finally:
-        # Clean up uploaded file after processing
-        if os.path.exists(file_path):
+        # Clean up the checkpoints and the uploaded file once the analysis succeeded or failed for
+        # good (a retry still needs them)
+        if terminal:
+            try:
+                delete_analysis_checkpoints(self.request.id)
+            except Exception as exc:
+                logger.warning("Could not delete checkpoints of %s: %s", self.request.id, exc)
+        if terminal and os.path.exists(file_path):
             try:
                 os.remove(file_path)
             except OSError:
@@ -46,9 +46,15 @@ test_submit() {
     TASK_ID=$(echo "$RESP" | python3 -c "import json,sys; print(json.load(sys.stdin).get('task_id',''))" 2>/dev/null)
     STATUS=$(echo "$RESP" | python3 -c "import json,sys; print(json.load(sys.stdin).get('status',''))" 2>/dev/null)
 
+    CACHED=$(echo "$RESP" | python3 -c "import json,sys; print(json.load(sys.stdin).get('cached', False))" 2>/dev/null)
+
     if [ "$STATUS" = "queued" ] && [ -n "$TASK_ID" ]; then
         pass "Document submitted — task_id: $TASK_ID"
         echo "$TASK_ID"
+    elif [ "$STATUS" = "success" ] && [ "$CACHED" = "True" ] && [ -n "$TASK_ID" ]; then
+        # Same PDF and query analyzed within ANALYSIS_CACHE_TTL_HOURS: the stored result is reused
+        pass "Document submitted — reused a recent analysis, task_id: $TASK_ID"
+        echo "$TASK_ID"
     else
         fail "Submit failed: $RESP"
         return 1
@@ -0,0 +1,21 @@
+import os
+import sys
+
+# Modules live at the repository root (see benchmarks/ for the same setup)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+
+@pytest.fixture
+def make_facts():
+    """Build a FactTable from item=values keyword rows (one value per period)."""
+    from financial_facts import FactTable
+
+    def make(periods: list[str], **rows) -> FactTable:
+        facts = FactTable(periods=periods)
+        for item, values in rows.items():
+            facts.values[facts.items.index(item)] = values
+        return facts
+
+    return make
@@ -0,0 +1,51 @@
+from boilerplate import BoilerplateStats, find_boilerplate, strip_boilerplate
+
+
+WORDS = ["", "deliveries", "margins", "liquidity", "outlook"]
+
+
+def _page(number: int) -> str:
+    # 11 lines: the edge lines are the first and last 4, "Total revenues" sits in the middle
+    words = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel"]
+    body = [f"{word} {WORDS[number]}" for word in words[:4]]
+    tail = [f"{word} {WORDS[number]}" for word in words[4:]]
+    return "\n".join(["ACME Corp Quarterly Update", *body, "Total revenues 1,000", *tail, f"Page {number} of 4"])
+
+
+PAGES = [_page(number) for number in range(1, 5)]
+
+
+def test_repeated_header_and_footer_are_found():
+    boilerplate = find_boilerplate(iter(PAGES))
+    assert boilerplate == {"acme corp quarterly update": 0, "page # of #": 0}
+
+
+def test_lines_must_repeat_on_min_pages():
+    assert find_boilerplate(PAGES[:2]) == {}
+    assert find_boilerplate(PAGES[:3]) == {"acme corp quarterly update": 0, "page # of #": 0}
+    assert "total revenues #,#" in find_boilerplate(PAGES, edge_lines=6)
+
+
+def test_first_page_keeps_its_boilerplate_and_body_lines_are_kept():
+    boilerplate = find_boilerplate(PAGES)
+    assert strip_boilerplate(PAGES[0], 0, boilerplate) == PAGES[0]
+    stripped = strip_boilerplate(PAGES[2], 2, boilerplate)
+    # "Total revenues 1,000" repeats but sits in the middle of the page, so it is not an edge line
+    assert stripped.split("\n") == PAGES[2].split("\n")[1:-1]
+
+
+def test_stats_count_removed_lines_and_characters():
+    boilerplate = find_boilerplate(PAGES)
+    stats = BoilerplateStats()
+    for index, page in enumerate(PAGES):
+        strip_boilerplate(page, index, boilerplate, stats)
+    header, footer = len("ACME Corp Quarterly Update") + 1, len("Page 2 of 4") + 1
+    assert stats.lines_removed == 6
+    assert stats.chars_removed == 3 * (header + footer)
+    assert stats.tokens_saved == stats.chars_removed // 4
+
+
+def test_no_boilerplate_leaves_pages_untouched():
+    stats = BoilerplateStats()
+    assert strip_boilerplate(PAGES[1], 1, {}, stats) == PAGES[1]
+    assert stats.lines_removed == 0
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import db
+
+
+@pytest.fixture(autouse=True)
+def database(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "test.db"))
+    db.init_db()
+
+
+def _complete(task_id: str, hours_ago: float):
+    completed_at = (datetime.now(timezone.utc) - timedelta(hours=hours_ago)).isoformat()
+    with db.get_db() as conn:
+        conn.execute("UPDATE analyses SET completed_at = ? WHERE task_id = ?", (completed_at, task_id))
+
+
+def test_reuse_of_a_reuse_does_not_extend_the_window():
+    db.create_analysis("orig", "a.pdf", 1, "Analyze  this", doc_hash="h")
+    db.update_analysis_status("orig", "success", analysis="report")
+    source = db.find_cached_analysis("h", "analyze this", max_age_hours=24)
+    assert source["task_id"] == "orig"
+
+    copy = db.create_analysis("copy", "a.pdf", 1, "analyze this", doc_hash="h", cached_from=source)
+    assert copy["cached_from"] == "orig"
+
+    _complete("orig", hours_ago=30)
+    assert db.find_cached_analysis("h", "analyze this", max_age_hours=24) is None
+
+
+def test_failed_and_other_queries_are_not_reused():
+    db.create_analysis("failed", "a.pdf", 1, "q", doc_hash="h")
+    db.update_analysis_status("failed", "failed", error="boom")
+    db.create_analysis("other", "a.pdf", 1, "another question", doc_hash="h")
+    db.update_analysis_status("other", "success", analysis="report")
+    assert db.find_cached_analysis("h", "q", max_age_hours=24) is None
+
+
+def test_checkpoints_are_deleted_per_analysis():
+    db.save_analysis_checkpoint("done", "verification", "ok")
+    db.save_analysis_checkpoint("running", "verification", "ok")
+    db.delete_analysis_checkpoints("done")
+    assert db.get_analysis_checkpoints("done") == {}
+    assert db.get_analysis_checkpoints("running") == {"verification": "ok"}
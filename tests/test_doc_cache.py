@@ -0,0 +1,26 @@
+from doc_cache import DocumentCache, ParsedDocument
+
+DOC_HASH = "ab" * 32
+
+
+def test_disk_artifact_round_trips_without_extra_keys(tmp_path):
+    cache = DocumentCache(cache_dir=str(tmp_path))
+    cache.put_artifact(DOC_HASH, "bm25", {"postings": {"revenue": [[0, 2]]}})
+    cache.clear_memory()
+    assert cache.get_artifact(DOC_HASH, "bm25") == {"postings": {"revenue": [[0, 2]]}}
+
+
+def test_disk_document_round_trips(tmp_path):
+    cache = DocumentCache(cache_dir=str(tmp_path))
+    cache.put(ParsedDocument(DOC_HASH, ["page one", "page two"]))
+    cache.clear_memory()
+    assert cache.get(DOC_HASH).pages == ["page one", "page two"]
+    assert cache.stats["disk_hits"] == 1
+
+
+def test_memory_budget_evicts_least_recently_used(tmp_path):
+    cache = DocumentCache(cache_dir=str(tmp_path), max_chars=10)
+    cache.put(ParsedDocument("aa" * 32, ["123456"]))
+    cache.put(ParsedDocument("bb" * 32, ["123456"]))
+    assert cache._recall("aa" * 32) is None
+    assert cache._recall("bb" * 32) is not None
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+import doc_classifier
+from doc_cache import ParsedDocument
+from doc_classifier import CLASSIFIER_ACCEPT, CLASSIFIER_REJECT, Classification, classify_document, label_for
+from financial_facts import extract_facts
+from pdf_extract import extract_pages
+from text_normalize import normalize_text
+
+TSLA_PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "TSLA-Q2-2025-Update.pdf")
+
+NOVEL = ParsedDocument(
+    "01" * 32,
+    [
+        "The river wound past the old mill, and the children ran along its banks until the light faded.\n"
+        "Their grandmother called them in for supper: bread, soup and the last of the summer berries.",
+    ]
+    * 3,
+)
+# Financial vocabulary but no statement tables to extract or reconcile
+COMMENTARY = ParsedDocument(
+    "02" * 32,
+    [
+        "Management discussed revenue growth, operating margin and free cash flow for the quarter.\n"
+        "Net income improved while capital expenditures and debt were lower; liquidity remains strong.\n"
+        "Guidance for the fiscal year assumes stable gross margin and diluted earnings per share growth.",
+    ],
+)
+
+
+@pytest.fixture(autouse=True)
+def uncached_facts(monkeypatch):
+    # Keep test documents out of the shared document cache
+    monkeypatch.setattr(doc_classifier, "get_facts", lambda doc: extract_facts(doc.pages))
+
+
+@pytest.fixture(scope="module")
+def tsla():
+    return ParsedDocument("03" * 32, extract_pages(TSLA_PDF, transform=normalize_text, workers=1))
+
+
+def test_earnings_report_is_financial(tsla):
+    result = classify_document(tsla)
+    assert result.label == "financial"
+    assert result.is_financial and not result.is_rejected
+    assert result.signals["tables"] == 1.0
+    assert result.totals_checked > 0 and result.totals_passed == result.totals_checked
+
+
+def test_prose_is_rejected():
+    result = classify_document(NOVEL)
+    assert result.label == "non_financial"
+    assert result.is_rejected and not result.is_financial
+    assert result.confidence <= CLASSIFIER_REJECT
+
+
+def test_financial_commentary_without_tables_is_uncertain():
+    result = classify_document(COMMENTARY)
+    assert result.label == "uncertain"
+    assert not result.is_financial and not result.is_rejected
+    assert result.signals["keywords"] > 0.5
+    assert result.signals["tables"] == 0.0
+
+
+@pytest.mark.parametrize(
+    "confidence, label",
+    [
+        (CLASSIFIER_ACCEPT, "financial"),
+        (CLASSIFIER_ACCEPT - 1e-9, "uncertain"),
+        (CLASSIFIER_REJECT + 1e-9, "uncertain"),
+        (CLASSIFIER_REJECT, "non_financial"),
+        (0.0, "non_financial"),
+        (1.0, "financial"),
+    ],
+)
+def test_thresholds_are_inclusive(confidence, label):
+    result = Classification(label=label_for(confidence), confidence=confidence, latency_ms=0.0)
+    assert result.label == label
+    assert result.is_financial == (label == "financial")
+    assert result.is_rejected == (label == "non_financial")
+
+
+def test_classify_document_uses_the_configured_thresholds(monkeypatch):
+    confidence = classify_document(COMMENTARY).confidence
+    monkeypatch.setattr(doc_classifier, "CLASSIFIER_ACCEPT", confidence)
+    assert classify_document(COMMENTARY).is_financial
+    monkeypatch.setattr(doc_classifier, "CLASSIFIER_ACCEPT", 1.0)
+    monkeypatch.setattr(doc_classifier, "CLASSIFIER_REJECT", confidence)
+    assert classify_document(COMMENTARY).is_rejected
@@ -0,0 +1,42 @@
+from doc_cache import DocumentCache, ParsedDocument
+from doc_search import BM25Index, get_index, split_passages, tokenize
+
+DOC = ParsedDocument(
+    "ef" * 32,
+    [
+        "Vehicle deliveries grew in every region.\nEnergy storage deployments reached a record.",
+        "Free cash flow was $146 million.\nCapital expenditures were $2.4 billion.",
+        "Outlook\nWe remain focused on autonomy and the energy business. Energy margins improved.",
+    ],
+)
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("The Free-Cash-Flow of Q2, in $ millions") == ["free", "cash", "flow", "q2", "millions"]
+
+
+def test_split_passages_keeps_whole_lines():
+    page = "aaaa\nbbbb\ncccc"
+    assert split_passages(page, max_chars=9) == [(0, 9), (10, 14)]
+    assert [page[a:b] for a, b in split_passages(page, max_chars=9)] == ["aaaa\nbbbb", "cccc"]
+    assert split_passages("x" * 20, max_chars=5) == [(0, 20)]
+    assert split_passages("") == []
+
+
+def test_search_ranks_the_matching_page_first():
+    index = BM25Index.build(DOC)
+    best, _ = index.search("free cash flow", top_k=1)[0]
+    assert index.spans[best][0] == 2
+    results = index.search("energy")
+    assert [index.spans[pid][0] for pid, _ in results] == [3, 1]
+    assert results[0][1] > results[1][1]
+    assert index.search("semiconductors") == []
+
+
+def test_index_round_trips_through_the_cache(tmp_path):
+    cache = DocumentCache(cache_dir=str(tmp_path))
+    built = get_index(DOC, cache)
+    cache.clear_memory()
+    loaded = get_index(DOC, cache)
+    assert loaded.to_dict() == built.to_dict()
+    assert loaded.search("capital expenditures") == built.search("capital expenditures")
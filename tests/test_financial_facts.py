@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+import pytest
+
+from doc_cache import DocumentCache, ParsedDocument
+from financial_facts import extract_facts, get_facts, parse_number, parse_period
+from pdf_extract import extract_pages
+from text_normalize import normalize_text
+
+TSLA_PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "TSLA-Q2-2025-Update.pdf")
+
+
+@pytest.fixture(scope="module")
+def tsla():
+    return extract_facts(extract_pages(TSLA_PDF, transform=normalize_text, workers=1))
+
+
+@pytest.mark.parametrize(
+    "item, expected",
+    [
+        ("revenue", 22496.0),
+        ("gross_profit", 3878.0),
+        ("operating_income", 923.0),
+        ("net_income", 1190.0),
+        ("eps_diluted", 0.33),
+        ("operating_cash_flow", 2540.0),
+        ("capex", 2394.0),
+        ("free_cash_flow", 146.0),
+        ("cash", 36782.0),
+        ("total_assets", 128567.0),
+        ("equity", 77314.0),
+        ("shares_diluted", 3519.0),
+    ],
+)
+def test_tsla_q2_2025_values(tsla, item, expected):
+    assert tsla.get(item)[tsla.periods.index("Q2-2025")] == pytest.approx(expected)
+
+
+def test_tsla_periods_and_prior_year(tsla):
+    assert tsla.periods[-5:] == ["Q2-2024", "Q3-2024", "Q4-2024", "Q1-2025", "Q2-2025"]
+    assert tsla.get("revenue")[tsla.periods.index("Q2-2024")] == pytest.approx(25500.0)
+    assert np.isnan(tsla.get("revenue")[tsla.periods.index("Q1-2024")])
+    assert tsla.sources["revenue"] == 4
+
+
+@pytest.mark.parametrize(
+    "token, expected",
+    [("Q2-2024", "Q2-2024"), ("Q2'25", "Q2-2025"), ("2Q24", "Q2-2024"), ("30-Jun-24", "Q2-2024"), ("FY2024", "FY2024"), ("Total", None)],
+)
+def test_parse_period(token, expected):
+    assert parse_period(token) == expected
+
+
+@pytest.mark.parametrize(
+    "token, expected", [("1,234", 1234.0), ("(2,272)", -2272.0), ("$0.40", 0.40), ("-", 0.0), ("n/a", None)]
+)
+def test_parse_number(token, expected):
+    assert parse_number(token) == expected
+
+
+def test_units_are_scaled_to_millions_and_outflows_kept_positive():
+    page = "\n".join(
+        [
+            "(in thousands) Q1-2025 Q2-2025",
+            "Total revenues 1,500 2,500",
+            "Capital expenditures (300) (400)",
+            "Diluted EPS $0.10 $0.20",
+        ]
+    )
+    facts = extract_facts([page])
+    assert facts.periods == ["Q1-2025", "Q2-2025"]
+    assert facts.get("revenue").tolist() == pytest.approx([1.5, 2.5])
+    assert facts.get("capex").tolist() == pytest.approx([0.3, 0.4])
+    assert facts.get("eps_diluted").tolist() == pytest.approx([0.10, 0.20])
+
+
+def test_get_facts_round_trips_through_the_cache(tmp_path):
+    cache = DocumentCache(cache_dir=str(tmp_path))
+    doc = ParsedDocument("cd" * 32, ["$ in millions Q1-2025 Q2-2025\nNet income (12) 40"])
+    first = get_facts(doc, cache)
+    cache.clear_memory()
+    second = get_facts(doc, cache)
+    assert second.periods == first.periods
+    np.testing.assert_array_equal(second.values, first.values)
+    assert second.get("net_income").tolist() == [-12.0, 40.0]
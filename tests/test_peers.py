@@ -0,0 +1,73 @@
+import pytest
+
+from peers import PeerStore, build_from_csv, get_peer_store
+
+CSV = """ticker,sector,period,gross_margin,net_margin,return_on_equity
+TSLA,Auto,Q1-2025,0.18,0.02,
+TSLA,Auto,Q2-2025,0.17,0.05,
+GM,Auto,Q2-2025,0.10,0.03,
+F,Auto,Q2-2025,0.08,,
+TM,Auto,Q1-2025,0.20,0.08,
+NVDA,Tech,Q2-2025,0.75,0.50,0.9
+"""
+
+
+@pytest.fixture
+def store(tmp_path):
+    csv_path = tmp_path / "peers.csv"
+    csv_path.write_text(CSV)
+    assert build_from_csv(str(csv_path), str(tmp_path / "store")) == 6
+    return PeerStore(str(tmp_path / "store"))
+
+
+def _tickers(store: PeerStore, rows) -> list[str]:
+    return sorted(store.rows[i][0] for i in rows)
+
+
+def test_peer_group_uses_latest_rows_and_excludes_the_company(store):
+    assert store.sector_of("tsla") == "Auto"
+    assert _tickers(store, store.peer_rows(sector="auto")) == ["F", "GM", "TM", "TSLA"]
+    group = store.peer_group(sector="Auto", exclude="tsla")
+    assert _tickers(store, group.rows) == ["F", "GM", "TM"]
+    assert store.rows[store.latest_row["TSLA"]][2] == "Q2-2025"
+
+
+def test_period_groups_only_hold_that_period(store):
+    group = store.peer_group(sector="Auto", period="Q2-2025", exclude="TSLA")
+    assert _tickers(store, group.rows) == ["F", "GM"]
+    assert len(store.peer_group(sector="Auto", period="Q3-2025").rows) == 0
+
+
+def test_percentile_ranks(store):
+    group = store.peer_group(sector="Auto", exclude="TSLA")
+    ranks = store.percentile_ranks(
+        {"gross_margin": 0.17, "net_margin": 0.05, "return_on_equity": 0.2, "unknown": 1.0}, group
+    )
+    # gross margin peers 0.08, 0.10, 0.20: two below
+    assert ranks["gross_margin"] == {"value": 0.17, "percentile": 66.7, "peer_median": 0.1, "peers": 3}
+    # F reports no net margin, so there are two peers: 0.03 below, 0.08 above
+    assert ranks["net_margin"] == {"value": 0.05, "percentile": 50.0, "peer_median": 0.055, "peers": 2}
+    # No Auto peer reports ROE, and unknown ratios are ignored
+    assert set(ranks) == {"gross_margin", "net_margin"}
+
+
+def test_ties_count_half(store):
+    group = store.peer_group(sector="Auto", exclude="TSLA")
+    assert store.percentile_ranks({"gross_margin": 0.10}, group)["gross_margin"]["percentile"] == 50.0
+    assert store.percentile_ranks({"gross_margin": 0.01}, group)["gross_margin"]["percentile"] == 0.0
+    assert store.percentile_ranks({"gross_margin": 0.99}, group)["gross_margin"]["percentile"] == 100.0
+
+
+def test_empty_group_and_non_finite_values_give_no_ranks(store):
+    empty = store.peer_group(sector="Retail")
+    assert store.percentile_ranks({"gross_margin": 0.2}, empty) == {}
+    group = store.peer_group(sector="Auto")
+    assert store.percentile_ranks({"gross_margin": float("nan")}, group) == {}
+
+
+def test_peer_groups_are_cached(store):
+    assert store.peer_group(sector="Auto", exclude="TSLA") is store.peer_group(sector="auto", exclude="tsla")
+
+
+def test_no_store_built(tmp_path):
+    assert get_peer_store(str(tmp_path)) is None
@@ -0,0 +1,62 @@
+import json
+
+import numpy as np
+import pytest
+
+from portfolio import Holding, PortfolioError, compute_portfolio_risk
+from price_store import PriceStore
+
+DAYS = np.arange(20000, 20120, dtype=np.int32)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(str(tmp_path / "prices"))
+
+
+def _random_walk(seed: int, vol: float) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, vol, len(DAYS))))
+
+
+def _holdings(*tickers_and_weights) -> list[Holding]:
+    return [Holding(f"task-{t}", t, w, None) for t, w in tickers_and_weights]
+
+
+def test_flat_prices_are_rejected(store):
+    store.append("AAA", DAYS, np.full(len(DAYS), 10.0))
+    store.append("BBB", DAYS, np.full(len(DAYS), 20.0))
+    with pytest.raises(PortfolioError, match="No price variation"):
+        compute_portfolio_risk(_holdings(("AAA", 0.5), ("BBB", 0.5)), store=store)
+
+
+def test_one_flat_holding_is_rejected(store):
+    store.append("AAA", DAYS, _random_walk(1, 0.02))
+    store.append("BBB", DAYS, np.full(len(DAYS), 20.0))
+    with pytest.raises(PortfolioError, match="BBB"):
+        compute_portfolio_risk(_holdings(("AAA", 0.5), ("BBB", 0.5)), store=store)
+
+
+def test_risk_contributions_add_up_and_result_is_json_safe(store):
+    store.append("AAA", DAYS, _random_walk(1, 0.02))
+    store.append("BBB", DAYS, _random_walk(2, 0.01))
+    result = compute_portfolio_risk(_holdings(("AAA", 0.6), ("BBB", 0.4)), horizon_days=5, confidence=0.95, store=store)
+    json.dumps(result, allow_nan=False)
+
+    contributions = [h["risk_contribution"] for h in result["holdings"]]
+    assert sum(contributions) == pytest.approx(1.0, abs=1e-5)
+    assert result["correlation"][0][0] == pytest.approx(1.0)
+    assert result["correlation"][0][1] == result["correlation"][1][0]
+    assert result["observations"] == len(DAYS) - 1
+
+    returns = np.diff(np.log(np.column_stack([_random_walk(1, 0.02), _random_walk(2, 0.01)])), axis=0)
+    w = np.array([0.6, 0.4])
+    expected_vol = np.sqrt(w @ np.cov(returns, rowvar=False) @ w * 252)
+    assert result["volatility_annualized"] == pytest.approx(expected_vol, rel=1e-5)
+
+
+def test_too_little_common_history_is_rejected(store):
+    store.append("AAA", DAYS[:10], _random_walk(1, 0.02)[:10])
+    store.append("BBB", DAYS[:10], _random_walk(2, 0.01)[:10])
+    with pytest.raises(PortfolioError, match="common trading days"):
+        compute_portfolio_risk(_holdings(("AAA", 0.5), ("BBB", 0.5)), store=store)
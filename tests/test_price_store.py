@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from price_store import PriceStore, normalize_ticker, risk_metrics, to_days
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(str(tmp_path / "prices"))
+
+
+def test_ticker_is_normalized():
+    assert normalize_ticker(" brk.b ") == "BRK.B"
+
+
+@pytest.mark.parametrize("ticker", ["../../../tmp/evil", "a/b", "", "TOOLONGTICKER1", "x y"])
+def test_invalid_ticker_is_rejected(store, ticker):
+    with pytest.raises(ValueError):
+        store.path(ticker)
+    with pytest.raises(ValueError):
+        store.append(ticker, to_days(["2025-01-02"]), np.array([1.0]))
+
+
+def test_risk_metrics_reports_invalid_ticker(store):
+    assert "Invalid ticker" in risk_metrics("../etc", store=store)["error"]
+
+
+def _append_range(data_dir: str, first: int, last: int):
+    days = np.arange(first, last, dtype=np.int32)
+    PriceStore(data_dir).append("TSLA", days, days.astype(float))
+
+
+def test_concurrent_appends_keep_dates_sorted_and_unique(store):
+    import multiprocessing
+
+    context = multiprocessing.get_context("fork")
+    ranges = [(20000 + 10 * i, 20000 + 10 * i + 200) for i in range(8)]
+    workers = [context.Process(target=_append_range, args=(store.data_dir, a, b)) for a, b in ranges]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    days, closes = store.load("TSLA")
+    assert (np.diff(days) > 0).all()
+    assert days[-1] == max(b for _, b in ranges) - 1
+    np.testing.assert_array_equal(closes, days.astype(float))
+
+
+def test_append_skips_days_not_newer_than_the_last_stored_one(store):
+    assert store.append("TSLA", to_days(["2025-01-02", "2025-01-03"]), np.array([10.0, 11.0])) == 2
+    assert store.append("TSLA", to_days(["2025-01-03", "2025-01-01", "2025-01-06"]), np.array([99.0, 9.0, 12.0])) == 1
+    _, closes = store.load("TSLA")
+    np.testing.assert_array_equal(closes, [10.0, 11.0, 12.0])
+
+
+def test_partial_trailing_record_is_dropped_before_appending(store):
+    store.append("TSLA", to_days(["2025-01-02"]), np.array([10.0]))
+    with open(store.path("TSLA"), "ab") as f:
+        f.write(b"\x01\x02\x03")
+    store.append("TSLA", to_days(["2025-01-03"]), np.array([11.0]))
+    _, closes = store.load("TSLA")
+    np.testing.assert_array_equal(closes, [10.0, 11.0])
+
+
+@pytest.mark.parametrize("window", [-5, 0, 1, 11])
+def test_rolling_metrics_reject_bad_windows(window):
+    from price_store import rolling_beta, rolling_correlation, rolling_volatility
+
+    returns = np.linspace(-0.01, 0.01, 10)
+    with pytest.raises(ValueError):
+        rolling_volatility(returns, window)
+    with pytest.raises(ValueError):
+        rolling_beta(returns, returns, window)
+    with pytest.raises(ValueError):
+        rolling_correlation(returns, returns, window)
+
+
+def test_risk_metrics_reports_bad_window(store):
+    days = np.arange(20000, 20010, dtype=np.int32)
+    store.append("TSLA", days, np.linspace(100, 110, 10))
+    assert "window_days" in risk_metrics("TSLA", None, window=1, store=store)["error"]
+    assert "window_days" in risk_metrics("TSLA", None, window=50, store=store)["error"]
+    assert risk_metrics("TSLA", None, window=9, store=store)["volatility_annualized"]["rolling_latest"] >= 0
+
+
+def test_rolling_volatility_matches_numpy():
+    from price_store import TRADING_DAYS, rolling_volatility
+
+    returns = np.random.default_rng(1).normal(0, 0.02, 30)
+    vol = rolling_volatility(returns, 5)
+    expected = [returns[i : i + 5].std(ddof=1) * np.sqrt(TRADING_DAYS) for i in range(26)]
+    np.testing.assert_allclose(vol, expected)
+    assert rolling_volatility(returns, len(returns)) == pytest.approx([returns.std(ddof=1) * np.sqrt(TRADING_DAYS)])
+
+
+def test_rolling_volatility_of_constant_returns_is_zero():
+    from price_store import rolling_volatility
+
+    # Cumulative-sum round-off must not turn into a negative variance (NaN volatility)
+    vol = rolling_volatility(np.full(50, 0.013), 10)
+    assert np.isfinite(vol).all()
+    np.testing.assert_allclose(vol, 0.0, atol=1e-6)
+
+
+def test_rolling_beta_and_correlation():
+    from price_store import rolling_beta, rolling_correlation
+
+    benchmark = np.random.default_rng(2).normal(0, 0.01, 40)
+    np.testing.assert_allclose(rolling_beta(2 * benchmark, benchmark, 10), 2.0)
+    np.testing.assert_allclose(rolling_correlation(-benchmark, benchmark, 10), -1.0)
+    flat = np.zeros(40)
+    assert np.isnan(rolling_beta(benchmark, flat, 10)).all()
+    assert np.isnan(rolling_correlation(flat, benchmark, 10)).all()
+
+
+def test_drawdown():
+    from price_store import drawdown
+
+    np.testing.assert_allclose(drawdown(np.array([100.0, 120.0, 90.0, 130.0, 65.0])), [0, 0, -0.25, 0, -0.5])
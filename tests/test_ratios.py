@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from ratios import compute_ratios
+
+PERIODS = ["Q1-2024", "Q2-2024", "Q3-2024", "Q4-2024", "Q1-2025"]
+
+
+@pytest.fixture
+def ratios(make_facts):
+    return compute_ratios(
+        make_facts(
+            PERIODS,
+            revenue=[100, 110, 120, 130, 150],
+            cost_of_revenue=[60, 66, 72, 78, 90],
+            net_income=[10, 11, 12, 13, 15],
+            equity=[200, 200, 200, 200, 300],
+            current_debt=[np.nan] * 4 + [5],
+            long_term_debt=[np.nan] * 4 + [15],
+            cash=[np.nan] * 4 + [30],
+            current_assets=[np.nan] * 4 + [80],
+            inventory=[np.nan] * 4 + [20],
+            current_liabilities=[np.nan] * 4 + [40],
+            accounts_receivable=[np.nan] * 4 + [50],
+            operating_income=[np.nan] * 4 + [30],
+            interest_expense=[np.nan] * 4 + [0],
+        )
+    )
+
+
+def test_margins_use_derived_gross_profit(ratios):
+    assert ratios.get("gross_margin") == pytest.approx([0.4] * 5)
+    assert ratios.get("net_margin") == pytest.approx([0.1] * 5)
+
+
+def test_balance_sheet_ratios(ratios):
+    latest = ratios.latest()
+    assert latest["current_ratio"] == pytest.approx(2.0)
+    assert latest["quick_ratio"] == pytest.approx(1.5)
+    assert latest["debt_to_equity"] == pytest.approx(20 / 300)
+    assert latest["cash_to_debt"] == pytest.approx(1.5)
+
+
+def test_quarterly_flows_are_annualized_against_balances(ratios):
+    assert ratios.get("return_on_equity")[-1] == pytest.approx(15 * 4 / 300)
+    assert ratios.get("receivable_days")[-1] == pytest.approx(50 / (150 * 4) * 365)
+
+
+def test_growth_rates(ratios):
+    qoq = ratios.get("revenue_growth_qoq")
+    yoy = ratios.get("revenue_growth_yoy")
+    assert np.isnan(qoq[0])
+    assert qoq[-1] == pytest.approx(150 / 130 - 1)
+    assert np.isnan(yoy[:4]).all()
+    assert yoy[-1] == pytest.approx(0.5)
+
+
+def test_zero_and_missing_denominators_give_nan(ratios):
+    assert np.isnan(ratios.get("interest_coverage")[-1])
+    assert np.isnan(ratios.get("current_ratio")[:4]).all()
+    assert "interest_coverage" not in ratios.to_dict()["ratios"]
+
+
+def test_fiscal_years_are_not_annualized(make_facts):
+    ratios = compute_ratios(make_facts(["FY2023", "FY2024"], revenue=[400, 500], net_income=[40, 60], equity=[300, 300]))
+    assert ratios.get("return_on_equity") == pytest.approx([40 / 300, 0.2])
+    assert ratios.get("revenue_growth_yoy")[-1] == pytest.approx(0.25)
+    assert np.isnan(ratios.get("revenue_growth_qoq")).all()
@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("crewai")
+pytest.importorskip("crewai_tools")
+
+from crewai import Agent
+from crewai.utilities.formatter import aggregate_raw_outputs_from_tasks
+
+from crew_factory import CrewKit
+from task import build_tasks
+
+AGENTS = ("financial_analyst", "verifier", "investment_advisor", "risk_assessor")
+
+
+@pytest.fixture
+def kit(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")  # agents are built but never called
+    agents = {name: Agent(role=name, goal=name, backstory=name, llm="gpt-4o-mini") for name in AGENTS}
+    kit = CrewKit(llm=None, agents=agents, tasks=build_tasks(agents))
+    kit.reset_run_state()
+    return kit
+
+
+def _context(kit: CrewKit, task_name: str) -> str:
+    """The context CrewAI hands a task with an explicit context list."""
+    return aggregate_raw_outputs_from_tasks(kit.tasks[task_name].context)
+
+
+def test_resumed_analysis_gets_the_checkpointed_verification(kit):
+    # Retry after verification completed: the head crew only runs analyze_financial_document
+    kit.restore_output("verification", "Verified: Q2 2025 earnings update")
+    assert kit.crew(("analyze_financial_document",)).tasks == [kit.tasks["analyze_financial_document"]]
+    assert "Verified: Q2 2025 earnings update" in _context(kit, "analyze_financial_document")
+
+
+def test_branches_get_the_checkpointed_analysis(kit):
+    kit.restore_output("verification", "Verified")
+    kit.restore_output("analyze_financial_document", "Revenue fell 12%")
+    for branch in ("investment_analysis", "risk_assessment"):
+        context = _context(kit, branch)
+        assert "Revenue fell 12%" in context
+        assert "Verified" not in context
+
+
+def test_skipped_verification_gives_an_empty_context(kit):
+    assert _context(kit, "analyze_financial_document") == ""
+    kit.restore_output("verification", "stale")
+    kit.reset_run_state()
+    assert _context(kit, "analyze_financial_document") == ""
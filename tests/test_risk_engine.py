@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+import risk_engine
+from financial_facts import FactTable
+from price_store import PriceStore
+from risk_engine import (
+    MAX_HORIZON_DAYS,
+    MIN_HISTORY_DAYS,
+    fundamental_stress,
+    load_returns,
+    simulate_horizon_returns,
+    ticker_from_path,
+    value_at_risk,
+)
+
+PATHS = 20_000
+
+
+def _history(n: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(0.0005, 0.02, n)
+
+
+def test_simulation_is_deterministic_per_seed():
+    returns = _history(500)
+    first = simulate_horizon_returns(returns, 10, paths=PATHS, seed=7)
+    second = simulate_horizon_returns(returns, 10, paths=PATHS, seed=7)
+    other = simulate_horizon_returns(returns, 10, paths=PATHS, seed=8)
+    np.testing.assert_array_equal(first[1], second[1])
+    assert not np.array_equal(first[1], other[1])
+    assert first[0] == pytest.approx(returns.mean() * 10)
+    assert first[2] == "bootstrap of 500 daily returns"
+
+
+@pytest.mark.parametrize("horizon", [0, -1, MAX_HORIZON_DAYS + 1])
+def test_horizon_out_of_range_is_rejected(horizon):
+    with pytest.raises(ValueError, match="horizon_days"):
+        simulate_horizon_returns(None, horizon, paths=10)
+
+
+def test_short_history_falls_back_to_student_t():
+    drift, sums, method = simulate_horizon_returns(_history(MIN_HISTORY_DAYS - 1), 10, paths=PATHS)
+    assert method.startswith("Student-t")
+    assert drift == 0.0
+    expected_std = risk_engine.RISK_DEFAULT_ANNUAL_VOL / np.sqrt(252) * np.sqrt(10)
+    assert sums.std() == pytest.approx(expected_std, rel=0.05)
+
+
+def test_value_at_risk_of_constant_returns_is_the_drift_loss():
+    drift, sums, _ = simulate_horizon_returns(np.full(100, -0.01), 5, paths=1000)
+    assert np.allclose(sums, 0.0)
+    risk = value_at_risk(drift, sums)
+    assert np.allclose(risk["var"], -np.expm1(-0.05))
+    assert np.allclose(risk["cvar"], -np.expm1(-0.05))
+
+
+def test_value_at_risk_grows_with_volatility_and_confidence():
+    drift, sums, _ = simulate_horizon_returns(_history(500), 10, paths=PATHS)
+    risk = value_at_risk(drift, sums)
+    var, cvar = risk["var"], risk["cvar"]
+    assert var.shape == (4, 2)
+    assert (np.diff(var, axis=0) > 0).all()
+    assert (var[:, 1] > var[:, 0]).all()
+    assert (cvar >= var).all()
+
+
+def test_fundamental_stress_grid():
+    facts = FactTable(periods=["Q2-2025"])
+    for item, value in {
+        "revenue": 100, "gross_profit": 40, "operating_income": 10, "interest_expense": 5,
+        "free_cash_flow": 8, "cash": 50, "pretax_income": 10, "income_tax": 2,
+    }.items():
+        facts.values[facts.items.index(item), 0] = value
+    stress = fundamental_stress(facts)
+    assert stress["operating_margin"][0][0] == pytest.approx(0.1)
+    assert stress["operating_margin"][2][0] == pytest.approx(0.025)
+    assert stress["interest_coverage"][2][0] == pytest.approx(0.4)
+    assert stress["free_cash_flow"][2][0] == pytest.approx(1.6)
+    assert stress["cash_runway_quarters"][2][0] is None
+    assert stress["operating_margin"][4][3] == pytest.approx(-0.2)
+    assert stress["free_cash_flow"][4][3] == pytest.approx(-9.6)
+    assert stress["cash_runway_quarters"][4][3] == pytest.approx(5.2)
+
+
+def test_fundamental_stress_needs_revenue():
+    assert fundamental_stress(FactTable(periods=["Q2-2025"])) is None
+
+
+def test_load_returns_imports_the_csv_once(tmp_path):
+    (tmp_path / "ACME.csv").write_text("date,close\n2025-01-02,100\n2025-01-03,110\n2025-01-06,99\n")
+    store = PriceStore(str(tmp_path / "prices"))
+    returns = load_returns("ACME", data_dir=str(tmp_path), store=store)
+    assert returns == pytest.approx([np.log(1.1), np.log(0.9)])
+    (tmp_path / "ACME.csv").unlink()
+    assert load_returns("ACME", data_dir=str(tmp_path), store=store) == pytest.approx(returns)
+    assert load_returns("NONE", data_dir=str(tmp_path), store=store) is None
+
+
+def test_ticker_from_path():
+    assert ticker_from_path("data/TSLA-Q2-2025-Update.pdf") == "TSLA"
+    assert ticker_from_path("uploads/report.pdf") is None
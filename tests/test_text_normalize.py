@@ -0,0 +1,28 @@
+from text_normalize import normalize_text
+
+
+def test_line_wrapped_word_is_joined():
+    assert normalize_text("total opera-\ntions") == "total operations"
+
+
+def test_wrapped_compound_keeps_its_hyphen():
+    assert normalize_text("non-\nrecurring items") == "non-recurring items"
+    assert normalize_text("Non-\nrecurring") == "Non-recurring"
+    assert normalize_text("revenue grew year-\nover-year") == "revenue grew year-over-year"
+    assert normalize_text("forward-\nlooking statements") == "forward-looking statements"
+    assert normalize_text("long-\nterm debt") == "long-term debt"
+
+
+def test_prefix_inside_a_word_is_not_a_compound():
+    assert normalize_text("anon-\nymous") == "anonymous"
+    assert normalize_text("ex-\nchange rate") == "exchange rate"
+    assert normalize_text("term-\ninal value") == "terminal value"
+
+
+def test_numbers_and_capitals_are_not_dehyphenated():
+    assert normalize_text("2024-\nand") == "2024-\nand"
+    assert normalize_text("Non-\nGAAP") == "Non-\nGAAP"
+
+
+def test_symbols_and_whitespace():
+    assert normalize_text("ﬁnancial  − 5\n\n  “net” ") == 'financial - 5\n"net"'
@@ -0,0 +1,105 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tool_memo import current_memo, memoized, tool_call_memo
+
+calls = []
+
+
+@memoized
+def read_pages(path: str, start_page: int = 1, end_page: int = 0) -> str:
+    calls.append((path, start_page, end_page))
+    return f"{path}:{start_page}-{end_page}:{len(calls)}"
+
+
+@memoized
+def failing_tool(path: str) -> str:
+    calls.append(path)
+    raise ValueError(path)
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+def test_outside_a_run_every_call_runs():
+    assert current_memo() is None
+    read_pages("a.pdf")
+    read_pages("a.pdf")
+    assert len(calls) == 2
+
+
+def test_repeats_are_hits_keyed_on_bound_arguments():
+    with tool_call_memo("run") as memo:
+        first = read_pages("a.pdf")
+        assert read_pages(path="a.pdf", start_page=1) == first
+        assert read_pages("a.pdf", 1, 0) == first
+        other = read_pages("a.pdf", start_page=2)
+        assert other != first
+        assert read_pages("b.pdf") != first
+    assert calls == [("a.pdf", 1, 0), ("a.pdf", 2, 0), ("b.pdf", 1, 0)]
+    assert (memo.hits, memo.misses) == (2, 3)
+    assert memo.stats["read_pages"].hits == 2
+    assert "2 hits / 3 misses" in memo.summary()
+
+
+def test_exceptions_are_not_cached():
+    with tool_call_memo("run") as memo:
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                failing_tool("bad.pdf")
+    assert calls == ["bad.pdf", "bad.pdf"]
+    assert memo.hits == 0
+
+
+def test_runs_do_not_share_results():
+    with tool_call_memo("first"):
+        first = read_pages("a.pdf")
+    with tool_call_memo("second") as memo:
+        second = read_pages("a.pdf")
+    assert first != second
+    assert memo.misses == 1 and memo.hits == 0
+    assert current_memo() is None
+
+
+def test_branch_threads_share_their_run_memo_through_copied_contexts():
+    with tool_call_memo("run") as memo:
+        read_pages("a.pdf")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, read_pages, "a.pdf") for _ in range(2)]
+            results = {future.result() for future in futures}
+    assert len(calls) == 1
+    assert results == {"a.pdf:1-0:1"}
+    assert memo.hits == 2
+
+
+def test_concurrent_runs_in_threads_keep_separate_memos():
+    barrier = threading.Barrier(2)
+    memos = {}
+
+    def run(run_id: str):
+        with tool_call_memo(run_id) as memo:
+            read_pages("a.pdf")
+            barrier.wait()  # both runs are active at the same time
+            read_pages("a.pdf")
+            memos[run_id] = memo
+
+    threads = [threading.Thread(target=run, args=(run_id,)) for run_id in ("one", "two")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 2
+    assert memos["one"] is not memos["two"]
+    assert [(m.hits, m.misses) for m in memos.values()] == [(1, 1), (1, 1)]
+    assert current_memo() is None
+
+
+def test_a_plain_thread_outside_the_context_does_not_see_the_memo():
+    with tool_call_memo("run"):
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            assert pool.submit(current_memo).result() is None
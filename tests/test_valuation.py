@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from valuation import DCFParams, _starting_growth, _ttm, dcf_grid, value_document
+
+
+def _two_year_ev(base: float, start_growth: float, wacc: float, g: float, margin: float) -> float:
+    """The same DCF written out by hand for years=2."""
+    growth_1 = start_growth + (g - start_growth) / 2
+    fcf_1 = base * (1 + growth_1) * margin
+    fcf_2 = base * (1 + growth_1) * (1 + g) * margin
+    terminal = fcf_2 * (1 + g) / (wacc - g)
+    return fcf_1 / (1 + wacc) + (fcf_2 + terminal) / (1 + wacc) ** 2
+
+
+def test_dcf_grid_matches_hand_computed_cells():
+    wacc, growth, margins = np.array([0.08, 0.10]), np.array([0.01, 0.02]), np.array([0.1, 0.2])
+    grid = dcf_grid(100.0, 0.05, wacc, growth, margins, years=2)
+    assert grid.shape == (2, 2, 2)
+    assert grid[1, 1, 0] == pytest.approx(_two_year_ev(100.0, 0.05, 0.10, 0.02, 0.1))
+    assert grid[1, 1, 0] == pytest.approx(129.3750, abs=1e-3)
+    for i, w in enumerate(wacc):
+        for j, g in enumerate(growth):
+            for k, m in enumerate(margins):
+                assert grid[i, j, k] == pytest.approx(_two_year_ev(100.0, 0.05, w, g, m))
+
+
+def test_dcf_grid_is_nan_where_wacc_does_not_exceed_growth():
+    grid = dcf_grid(100.0, 0.05, np.array([0.02, 0.03, 0.05]), np.array([0.03]), np.array([0.1]), years=5)
+    assert np.isnan(grid[:2, 0, 0]).all()
+    assert np.isfinite(grid[2, 0, 0])
+
+
+def test_ttm_bases(make_facts):
+    quarters = ["Q1-2024", "Q2-2024", "Q3-2024", "Q4-2024"]
+    assert _ttm(make_facts(quarters, revenue=[10, 20, 30, 40]), "revenue") == (100.0, "TTM Q4-2024")
+    gap = ["Q1-2024", "Q2-2024", "Q3-2024", "Q1-2025"]
+    assert _ttm(make_facts(gap, revenue=[10, 20, 30, 40]), "revenue") == (160.0, "Q1-2025 x4")
+    assert _ttm(make_facts(["FY2024", "Q1-2025"], revenue=[300, 90]), "revenue") == (300.0, "FY2024")
+
+
+def test_starting_growth_is_year_over_year_and_clipped(make_facts):
+    assert _starting_growth(make_facts(["Q2-2024", "Q2-2025"], revenue=[100, 110])) == pytest.approx(0.10)
+    assert _starting_growth(make_facts(["FY2023", "FY2024"], revenue=[100, 200])) == pytest.approx(0.30)
+    assert _starting_growth(make_facts(["Q1-2025"], revenue=[100])) == pytest.approx(0.05)
+
+
+def test_value_document_per_share(make_facts):
+    facts = make_facts(
+        ["Q1-2024", "Q2-2024", "Q3-2024", "Q4-2024"],
+        revenue=[25, 25, 25, 25],
+        free_cash_flow=[2.5, 2.5, 2.5, 2.5],
+        cash=[np.nan, np.nan, np.nan, 20],
+        shares_diluted=[np.nan, np.nan, np.nan, 10],
+    )
+    params = DCFParams(
+        wacc_low=0.10, wacc_high=0.10, wacc_steps=1, growth_low=0.02, growth_high=0.02, growth_steps=1,
+        margin_steps=1, margin_low=0.1, margin_high=0.1, years=2, revenue_growth=0.05,
+    )
+    result = value_document(facts, params)
+    expected = round((_two_year_ev(100.0, 0.05, 0.10, 0.02, 0.1) + 20) / 10, 2)
+    assert result["unit"] == "USD per share"
+    assert result["base"]["revenue_basis"] == "TTM Q4-2024"
+    assert result["base"]["fcf_margin"] == pytest.approx(0.1)
+    assert result["base"]["net_debt"] == -20.0
+    assert result["distribution"]["median"] == expected
+    assert result["margin_sensitivity"]["values"] == [expected]
+
+
+def test_value_document_without_free_cash_flow(make_facts):
+    assert "error" in value_document(make_facts(["FY2024"], revenue=[100]))
@@ -0,0 +1,66 @@
+"""
+Linear-time text normalization for extracted PDF text.
+
+normalize_text is a fixed pipeline of passes that are each O(n) in the input
+length. Every pass runs in C (regex scans, str.split/join); Python code only
+runs per line or per rare symbol match, never per character:
+
+1. Unicode NFKC (folds ligatures, full-width digits and compatibility spaces)
+2. financial symbols (minus signs, dashes, curly quotes) mapped to ASCII
+3. whitespace runs collapsed to one space, blank lines dropped, lines trimmed
+4. dehyphenation of line-wrapped words ("opera-\ntions" -> "operations");
+   a wrap inside a hyphenated compound keeps its hyphen ("non-\nrecurring" ->
+   "non-recurring", "year-\nover-year" -> "year-over-year")
+"""
+
+import re
+import unicodedata
+
+_FINANCIAL_SYMBOLS = {
+    "\u2212": "-",  # minus sign
+    "\u2010": "-",  # hyphen
+    "\u2011": "-",  # non-breaking hyphen
+    "\u2012": "-",  # figure dash
+    "\u2013": "-",  # en dash
+    "\u2014": "-",  # em dash (also used for "nil" in statement tables)
+    "\u2015": "-",  # horizontal bar
+    "\u2018": "'",  # curly single quotes
+    "\u2019": "'",
+    "\u201c": '"',  # curly double quotes
+    "\u201d": '"',
+    "\u00ad": "",  # soft hyphen
+    "\u200b": "",  # zero-width space
+    "\ufeff": "",  # byte order mark
+}
+_SYMBOLS = re.compile("[" + "".join(_FINANCIAL_SYMBOLS) + "]")
+
+# Match on the literal "-\n" first and check the letter behind it afterwards,
+# which lets the regex engine skip straight to candidate positions.
+_DEHYPHENATE = re.compile(r"-\n(?<=[^\W\d_]-\n)(?=[a-z])")
+
+# A wrap after one of these words, or before one of the suffixes (or before a word
+# that itself continues with a hyphen), splits a compound rather than a word: the
+# hyphen is kept and only the line break is removed. Also a C-level scan.
+COMPOUND_PREFIXES = ("non", "self", "cross", "well", "all", "half")
+COMPOUND_SUFFIXES = ("based", "related", "owned", "looking", "term", "party", "driven", "adjusted", "denominated")
+_COMPOUND_WRAP = re.compile(
+    r"-\n(?:(?<=[^\W\d_]-\n)(?=[a-z]+-|(?:" + "|".join(COMPOUND_SUFFIXES) + r")\b)|"
+    + "|".join(rf"(?<=\b(?i:{prefix})-\n)(?=[a-z])" for prefix in COMPOUND_PREFIXES)
+    + ")"
+)
+
+
+def _collapse_whitespace(text: str) -> str:
+    lines = (" ".join(line.split()) for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize extracted text in linear time. See module docstring for the rules."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text)
+    text = _SYMBOLS.sub(lambda m: _FINANCIAL_SYMBOLS[m.group()], text)
+    text = _collapse_whitespace(text)
+    text = _COMPOUND_WRAP.sub("-", text)
+    return _DEHYPHENATE.sub("", text)
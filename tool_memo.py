@@ -0,0 +1,120 @@
+"""
+Per-run memoization of CrewAI tool calls.
+
+Within one crew run, agents repeat identical tool calls: every task starts by
+reading the same document, and an agent often re-issues a call it already made
+in an earlier iteration. Wrapping a tool function with @memoized makes those
+repeats return the first call's output without running the tool again.
+
+The memo lives in a context variable set by tool_call_memo() around a run, so
+concurrent runs in different threads or worker processes never share results,
+and nothing is cached outside a run. The key is the tool name plus its bound
+arguments with defaults applied, so read_data_tool("x.pdf") and
+read_data_tool(path="x.pdf", start_page=1) are the same call. Exceptions are
+not cached. Every call, hit or not, is recorded as a "tool" span of the
+current run (see profiling.py).
+
+    with tool_call_memo("task-id") as memo:
+        crew.kickoff(...)
+    # logs: Tool memo for task-id: 7 hits / 5 misses (...)
+"""
+
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from profiling import span
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ToolStats:
+    hits: int = 0
+    misses: int = 0
+    saved_ms: float = 0.0  # time the hits would have spent re-running the tool
+
+
+@dataclass
+class ToolMemo:
+    """Results and counters of the tool calls made during one run."""
+
+    results: dict[tuple[str, str], tuple[str, float]] = field(default_factory=dict)
+    stats: dict[str, ToolStats] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def hits(self) -> int:
+        return sum(s.hits for s in self.stats.values())
+
+    @property
+    def misses(self) -> int:
+        return sum(s.misses for s in self.stats.values())
+
+    def summary(self) -> str:
+        per_tool = ", ".join(f"{name} {s.hits}/{s.misses}" for name, s in sorted(self.stats.items()))
+        saved = sum(s.saved_ms for s in self.stats.values())
+        return f"{self.hits} hits / {self.misses} misses, {saved:.0f} ms saved ({per_tool or 'no tool calls'})"
+
+
+_current_memo: ContextVar[ToolMemo | None] = ContextVar("tool_memo", default=None)
+
+
+@contextmanager
+def tool_call_memo(run_id: str = ""):
+    """Memoize @memoized tool calls made in this context; logs hit/miss counters when it exits."""
+    memo = ToolMemo()
+    token = _current_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _current_memo.reset(token)
+        logger.info("Tool memo for %s: %s", run_id or "run", memo.summary())
+
+
+def current_memo() -> ToolMemo | None:
+    return _current_memo.get()
+
+
+def memoized(func):
+    """Cache a tool function's output per run, keyed by its name and bound arguments.
+
+    Apply under @tool so the tool keeps the function's signature and docstring."""
+    signature = inspect.signature(func)
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span("tool", name) as fields:
+            memo = _current_memo.get()
+            if memo is None:
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (name, json.dumps(bound.arguments, sort_keys=True, default=str))
+
+            with memo.lock:
+                stats = memo.stats.setdefault(name, ToolStats())
+                cached = memo.results.get(key)
+                if cached is not None:
+                    stats.hits += 1
+                    stats.saved_ms += cached[1]
+                    fields["cached"] = True
+                    return cached[0]
+
+            fields["cached"] = False
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with memo.lock:
+                stats.misses += 1
+                memo.results.setdefault(key, (result, elapsed_ms))
+            return result
+
+    return wrapper
@@ -1,53 +1,248 @@
 ## Importing libraries and files
+import json
 import os
+from typing import Callable, Iterable
 from dotenv import load_dotenv
 load_dotenv()
 
 from crewai.tools import tool
 from crewai_tools import SerperDevTool
-from langchain_community.document_loaders import PyPDFLoader as Pdf
+from boilerplate import BoilerplateStats, find_boilerplate, strip_boilerplate
+from db import get_document_pages, store_document_pages
+from doc_cache import CACHE_FORMAT_VERSION, ParsedDocument, document_cache
+from doc_search import search_document
+from financial_facts import FactTable, get_facts
+from pdf_extract import extract_pages
+from peers import get_peer_store
+from price_store import normalize_ticker, risk_metrics
+from ratios import compute_ratios
+from risk_engine import MAX_HORIZON_DAYS, assess_risk, ticker_from_path
+from text_normalize import normalize_text
+from tool_memo import memoized
+from valuation import DCFParams, get_valuation
+
+# Default cap on characters returned by a single read_data_tool call
+READ_DATA_MAX_CHARS = int(os.getenv("READ_DATA_MAX_CHARS", "60000"))
 
 ## Creating search tool
 search_tool = SerperDevTool()
 
+## Parsing and caching pdf documents
+def _parse_pdf(path: str) -> list[str]:
+    """Parse a pdf into a list of cleaned page texts (in parallel for large documents)"""
+    return extract_pages(path, transform=normalize_text)
+
+
+def _load_pages(path: str, doc_hash: str) -> list[str]:
+    """Cache miss: reuse pages stored in the database, or parse the pdf and store them"""
+    pages = get_document_pages(doc_hash, CACHE_FORMAT_VERSION)
+    if pages is None:
+        pages = _parse_pdf(path)
+        store_document_pages(doc_hash, pages, CACHE_FORMAT_VERSION)
+    return pages
+
+
+def load_document(path: str) -> ParsedDocument:
+    """Load a pdf through the content-addressed cache and page store, parsing it only on a miss"""
+    return document_cache.get_or_parse(path, _load_pages)
+
+
+def get_boilerplate(doc_hash: str, pages: Callable[[], Iterable[str]]) -> dict[str, int]:
+    """Repeated header/footer lines of a document, detected once and cached with it.
+    pages() yields the document's cleaned page texts and is only called on a miss"""
+    payload = document_cache.get_artifact(doc_hash, "boilerplate")
+    if payload is None:
+        payload = {"lines": find_boilerplate(pages())}
+        document_cache.put_artifact(doc_hash, "boilerplate", payload)
+    return payload["lines"]
+
+
+def stream_document_pages(
+    path: str,
+    start_page: int = 1,
+    end_page: int | None = None,
+    stats: BoilerplateStats | None = None,
+):
+    """Yield (page_number, cleaned_text) lazily from the parsed document.
+    Repeated boilerplate is removed (counted in stats). Detecting it needs every page, so an
+    uncached document is parsed once through load_document, which fills the cache and page
+    store for later reads, instead of being read page by page and then parsed again."""
+    doc = load_document(path)
+    boilerplate = get_boilerplate(doc.doc_hash, lambda: doc.pages)
+    last = doc.page_count if end_page is None else min(end_page, doc.page_count)
+    for page_number in range(max(start_page, 1), last + 1):
+        yield page_number, strip_boilerplate(doc.pages[page_number - 1], page_number - 1, boilerplate, stats)
+
+
+def load_facts(path: str) -> FactTable:
+    """Statement line items of a pdf, extracted once per document and cached by its hash"""
+    return get_facts(load_document(path))
+
+
 ## Creating custom pdf reader tool
 @tool("Read Financial Document")
-def read_data_tool(path: str = 'data/sample.pdf') -> str:
-    """Tool to read data from a pdf file from a path"""
-    docs = Pdf(file_path=path).load()
-
-    full_report = ""
-    for data in docs:
-        # Clean and format the financial document data
-        content = data.page_content
-        
-        # Remove extra whitespaces and format properly
-        while "\n\n" in content:
-            content = content.replace("\n\n", "\n")
-            
-        full_report += content + "\n"
-        
-    return full_report
+@memoized
+def read_data_tool(
+    path: str = 'data/sample.pdf', start_page: int = 1, end_page: int = 0, max_chars: int = 0, start_char: int = 0
+) -> str:
+    """Tool to read data from a pdf file from a path.
+    Reads pages start_page..end_page (1-based, inclusive; end_page=0 means the last page),
+    starting start_char characters into start_page.
+    Output is capped at max_chars characters (0 uses the default cap); when the cap is hit,
+    the output ends with a note giving the start_page (and start_char) to continue from."""
+    end = end_page if end_page > 0 else None
+    budget = max_chars if max_chars > 0 else READ_DATA_MAX_CHARS
+    first = max(start_page, 1)
+
+    # Pages are taken one at a time until the budget is used; the parse task normally fills the cache
+    parts = []
+    used = 0
+    stats = BoilerplateStats()
+    for page_number, content in stream_document_pages(path, first, end, stats):
+        offset = max(start_char, 0) if page_number == first else 0
+        header = f"--- Page {page_number} (from character {offset}) ---\n" if offset else f"--- Page {page_number} ---\n"
+        content = content[offset:]
+        page_text = f"{header}{content}\n"
+        if used + len(page_text) > budget:
+            if parts:
+                parts.append(f"[Output truncated at {budget} characters. Continue with start_page={page_number}.]\n")
+            else:
+                # A single page longer than the budget: return what fits and continue within the page
+                room = max(budget - len(header) - 1, 1)
+                parts.append(f"{header}{content[:room]}\n")
+                parts.append(
+                    f"[Output truncated at {budget} characters. "
+                    f"Continue with start_page={page_number}, start_char={offset + room}.]\n"
+                )
+            break
+        parts.append(page_text)
+        used += len(page_text)
+
+    if stats.chars_removed:
+        parts.append(
+            f"[Removed {stats.lines_removed} repeated header/footer lines: "
+            f"{stats.chars_removed} characters, ~{stats.tokens_saved} tokens]\n"
+        )
+    return "".join(parts)
+
+
+## Creating document search tool
+@tool("Search Financial Document")
+@memoized
+def search_document_tool(path: str = 'data/sample.pdf', query: str = '', top_k: int = 5) -> str:
+    """Tool to find the passages of a pdf file most relevant to a query
+    (e.g. "free cash flow", "operating margin"), ranked by BM25.
+    Returns up to top_k passages with their page numbers. Use it to fetch specific
+    figures instead of reading the whole document."""
+    doc = load_document(path)
+    passages = search_document(doc, query, max(top_k, 1))
+    if not passages:
+        return f"No passages found for query: {query}"
+
+    return "".join(
+        f"--- Page {p.page} (score {p.score:.2f}) ---\n{p.text}\n" for p in passages
+    )
+
+
+## Creating financial facts tool
+@tool("Extract Financial Facts")
+@memoized
+def extract_facts_tool(path: str = 'data/sample.pdf') -> str:
+    """Tool to extract statement line items (revenue, gross profit, operating income,
+    net income, cash flow, balance sheet totals, ...) for every reported period of a pdf
+    file as compact JSON. Values are in USD millions except per-share items; null means
+    not reported. Prefer these numbers over reading raw tables."""
+    facts = load_facts(path)
+    if not facts.found_items():
+        return "No statement tables with recognizable line items were found in this document."
+    return json.dumps(facts.to_dict(), separators=(",", ":"))
+
 
 ## Creating Investment Analysis Tool
 class InvestmentTool:
-    async def analyze_investment_tool(financial_document_data):
-        # Process and analyze the financial document data
-        processed_data = financial_document_data
-        
-        # Clean up the data format
-        i = 0
-        while i < len(processed_data):
-            if processed_data[i:i+2] == "  ":  # Remove double spaces
-                processed_data = processed_data[:i] + processed_data[i+1:]
-            else:
-                i += 1
-                
-        # TODO: Implement investment analysis logic here
-        return "Investment analysis functionality to be implemented"
+    @tool("Analyze Investment Ratios")
+    @memoized
+    def analyze_investment_tool(path: str = 'data/sample.pdf') -> str:
+        """Tool to compute financial ratios for every reported period of a pdf file:
+        margins, cost structure, cash conversion, liquidity, leverage, returns (annualized),
+        efficiency, and quarter-over-quarter / year-over-year growth of key items.
+        Returns compact JSON; ratios are fractions (0.25 = 25%) except *_days ratios,
+        and null means the inputs were not reported for that period."""
+        facts = load_facts(path)
+        if not facts.found_items():
+            return "No statement tables with recognizable line items were found in this document."
+        return json.dumps(compute_ratios(facts).to_dict(), separators=(",", ":"))
+
+    @tool("DCF Valuation")
+    @memoized
+    def dcf_valuation_tool(
+        path: str = 'data/sample.pdf',
+        wacc_low: float = 0.07,
+        wacc_high: float = 0.13,
+        terminal_growth_low: float = 0.01,
+        terminal_growth_high: float = 0.04,
+    ) -> str:
+        """Tool to value the company in a pdf file with a discounted-cash-flow model built
+        from its extracted revenue and free cash flow (trailing twelve months as base year).
+        Evaluates a 50x50 WACC x terminal growth grid at five FCF margins and returns JSON
+        with the base inputs, the distribution of values, a per-share value table
+        (rows: WACC, columns: terminal growth) and the sensitivity to FCF margin.
+        Rates are fractions (0.09 = 9%)."""
+        params = DCFParams(
+            wacc_low=wacc_low, wacc_high=wacc_high, growth_low=terminal_growth_low, growth_high=terminal_growth_high
+        )
+        return json.dumps(get_valuation(load_document(path), load_facts(path), params), separators=(",", ":"))
+
+    @tool("Compare With Peers")
+    @memoized
+    def peer_comparison_tool(path: str = 'data/sample.pdf', ticker: str = '', sector: str = '') -> str:
+        """Tool to rank the latest financial ratios of the company in a pdf file against
+        the local peer dataset. Returns JSON with, for each ratio, the company's value, its
+        percentile rank among peers (0-100; higher means a larger value than peers) and the
+        peer median. Pass the company's ticker to exclude it from its own peer group and to
+        default the sector; pass a sector (e.g. "Automobiles") to choose the peer group.
+        Works offline."""
+        store = get_peer_store()
+        if store is None:
+            return "No peer dataset is installed (build one with `python peers.py build <peers.csv>`)."
+        ticker = ticker.strip().upper() or ticker_from_path(path) or ''
+        sector = sector.strip() or (store.sector_of(ticker) if ticker else None) or ''
+        group = store.peer_group(sector=sector or None, exclude=ticker or None)
+        ranks = store.percentile_ranks(compute_ratios(load_facts(path)).latest(), group)
+        if not ranks:
+            return f"No peers with comparable ratios were found for sector '{sector or 'all'}'."
+        return json.dumps(
+            {"sector": sector or "all", "peer_count": len(group.rows), "ratios": ranks}, separators=(",", ":")
+        )
+
 
 ## Creating Risk Assessment Tool
 class RiskTool:
-    async def create_risk_assessment_tool(financial_document_data):        
-        # TODO: Implement risk assessment logic here
-        return "Risk assessment functionality to be implemented"
\ No newline at end of file
+    @tool("Assess Financial Risk")
+    @memoized
+    def create_risk_assessment_tool(path: str = 'data/sample.pdf', ticker: str = '', horizon_days: int = 10) -> str:
+        """Tool to compute market and fundamental risk for the company in a pdf file.
+        Returns JSON with Monte Carlo value-at-risk and CVaR (100k seeded paths over
+        horizon_days trading days, 1 to 60, at 95%/99% and under 1x-3x volatility stress) and a
+        stress grid of revenue shocks x gross margin compression showing stressed
+        operating margin, interest coverage, free cash flow and cash runway.
+        Pass the company's ticker (e.g. "TSLA") to use its local price history; leave it
+        empty to infer it from the file name."""
+        horizon_days = horizon_days or 10
+        if not 1 <= horizon_days <= MAX_HORIZON_DAYS:
+            return f"horizon_days must be between 1 and {MAX_HORIZON_DAYS} trading days (got {horizon_days})."
+        try:
+            ticker = normalize_ticker(ticker) if ticker.strip() else ticker_from_path(path)
+        except ValueError as exc:
+            return f"{exc}."
+        return json.dumps(assess_risk(load_facts(path), ticker, horizon_days), separators=(",", ":"))
+
+    @tool("Market Risk Metrics")
+    @memoized
+    def market_risk_metrics_tool(ticker: str, benchmark: str = 'SPY', window_days: int = 63) -> str:
+        """Tool to compute historical market risk metrics for a ticker from the local price
+        history store: rolling and trailing annualized volatility (window_days window, at
+        least 2 and at most the length of the history),
+        current and maximum drawdown, and trailing one-year beta and correlation against
+        the benchmark ticker. Returns JSON; volatility and drawdown are fractions."""
+        return json.dumps(risk_metrics(ticker.strip(), benchmark.strip() or None, window_days or 63), separators=(",", ":"))
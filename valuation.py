@@ -0,0 +1,181 @@
+"""
+Discounted-cash-flow valuation with sensitivity grids.
+
+The base year is the trailing twelve months of the fact table (the last four
+consecutive quarters, else the latest fiscal year, else the latest quarter
+annualized). Revenue is projected for DCFParams.years years, with growth
+fading linearly from the starting rate to the terminal growth rate, and free
+cash flow is revenue times an FCF margin. A Gordon-growth terminal value
+closes the projection.
+
+Every WACC x terminal growth x FCF margin combination is evaluated in one
+NumPy broadcast over a (wacc, growth, margin, year) array; cells where WACC
+does not exceed terminal growth are NaN. Results are cached per document hash
+and parameter set as a "dcf-<params key>" artifact in the document cache.
+"""
+
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+from doc_cache import DocumentCache, ParsedDocument, document_cache
+from financial_facts import FactTable
+
+# Starting revenue growth inferred from the facts is clipped to this range
+AUTO_GROWTH_RANGE = (-0.10, 0.30)
+DEFAULT_REVENUE_GROWTH = 0.05
+# Default FCF margin range is the base margin +/- this much
+DEFAULT_MARGIN_SPREAD = 0.05
+# Rows/columns of the per-share table returned to the agent
+TABLE_SIZE = 7
+
+
+@dataclass(frozen=True)
+class DCFParams:
+    wacc_low: float = 0.07
+    wacc_high: float = 0.13
+    wacc_steps: int = 50
+    growth_low: float = 0.01
+    growth_high: float = 0.04
+    growth_steps: int = 50
+    margin_low: float | None = None  # None: base FCF margin - DEFAULT_MARGIN_SPREAD
+    margin_high: float | None = None
+    margin_steps: int = 5
+    years: int = 5
+    revenue_growth: float | None = None  # starting growth; None: inferred from the facts
+
+    def key(self) -> str:
+        return hashlib.sha256(json.dumps(asdict(self), sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _ttm(facts: FactTable, item: str) -> tuple[float, str | None]:
+    """Trailing-twelve-month value of a flow item and the period it ends in."""
+    row = facts.get(item)
+    quarters = [i for i, p in enumerate(facts.periods) if p.startswith("Q") and not np.isnan(row[i])]
+    if len(quarters) >= 4:
+        last = quarters[-4:]
+        labels = [facts.periods[i] for i in last]
+        ordinals = [int(p[3:]) * 4 + int(p[1]) for p in labels]
+        if ordinals[-1] - ordinals[0] == 3:
+            return float(row[last].sum()), f"TTM {labels[-1]}"
+    years = [i for i, p in enumerate(facts.periods) if p.startswith("FY") and not np.isnan(row[i])]
+    if years:
+        return float(row[years[-1]]), facts.periods[years[-1]]
+    if quarters:
+        return float(row[quarters[-1]] * 4), f"{facts.periods[quarters[-1]]} x4"
+    return np.nan, None
+
+
+def _starting_growth(facts: FactTable) -> float:
+    """Latest year-over-year revenue growth found in the facts, clipped to AUTO_GROWTH_RANGE."""
+    revenue = facts.get("revenue")
+    position = {p: i for i, p in enumerate(facts.periods)}
+    for i in reversed(range(len(facts.periods))):
+        period = facts.periods[i]
+        prior = f"FY{int(period[2:]) - 1}" if period.startswith("FY") else f"{period[:3]}{int(period[3:]) - 1}"
+        j = position.get(prior)
+        if j is not None and revenue[j] > 0 and not np.isnan(revenue[i]):
+            return float(np.clip(revenue[i] / revenue[j] - 1, *AUTO_GROWTH_RANGE))
+    return DEFAULT_REVENUE_GROWTH
+
+
+def dcf_grid(
+    base_revenue: float,
+    start_growth: float,
+    wacc: np.ndarray,
+    terminal_growth: np.ndarray,
+    margins: np.ndarray,
+    years: int,
+) -> np.ndarray:
+    """Enterprise value for every (wacc, terminal growth, margin), shape (len(wacc), len(growth), len(margins))."""
+    w = wacc[:, None, None, None]
+    g = terminal_growth[None, :, None, None]
+    m = margins[None, None, :, None]
+    t = np.arange(1, years + 1)[None, None, None, :]
+
+    growth = start_growth + (g - start_growth) * t / years  # fades to terminal growth
+    revenue = base_revenue * np.cumprod(1 + growth, axis=-1)
+    fcf = revenue * m
+    discount = (1 + w) ** -t
+    explicit = (fcf * discount).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terminal = fcf[..., -1] * (1 + g[..., 0]) / (w[..., 0] - g[..., 0]) * discount[..., -1]
+    enterprise = explicit + terminal
+    return np.where(w[..., 0] > g[..., 0], enterprise, np.nan)
+
+
+def _subsample(n: int, size: int = TABLE_SIZE) -> np.ndarray:
+    return np.unique(np.linspace(0, n - 1, min(n, size)).round().astype(int))
+
+
+def value_document(facts: FactTable, params: DCFParams = DCFParams()) -> dict:
+    """Run the DCF grid for a fact table and summarize it as a compact, JSON-ready dict."""
+    revenue, revenue_basis = _ttm(facts, "revenue")
+    fcf, _ = _ttm(facts, "free_cash_flow")
+    if np.isnan(revenue) or revenue <= 0 or np.isnan(fcf):
+        return {"error": "Revenue and free cash flow are needed for a DCF and were not found in this document."}
+
+    base_margin = fcf / revenue
+    start_growth = params.revenue_growth if params.revenue_growth is not None else _starting_growth(facts)
+    margin_low = params.margin_low if params.margin_low is not None else base_margin - DEFAULT_MARGIN_SPREAD
+    margin_high = params.margin_high if params.margin_high is not None else base_margin + DEFAULT_MARGIN_SPREAD
+    wacc = np.linspace(params.wacc_low, params.wacc_high, params.wacc_steps)
+    growth = np.linspace(params.growth_low, params.growth_high, params.growth_steps)
+    margins = np.linspace(margin_low, margin_high, params.margin_steps)
+
+    enterprise = dcf_grid(revenue, start_growth, wacc, growth, margins, params.years)
+    net_debt = np.nansum([facts.latest("current_debt"), facts.latest("long_term_debt")]) - np.nan_to_num(
+        facts.latest("cash")
+    )
+    equity = enterprise - net_debt
+    shares = facts.latest("shares_diluted")
+    per_share = equity / shares if shares > 0 else None
+    values = per_share if per_share is not None else equity
+
+    def rounded(a) -> list:
+        return [None if np.isnan(v) else round(float(v), 2) for v in np.ravel(a)]
+
+    rows, cols = _subsample(len(wacc)), _subsample(len(growth))
+    base_m = int(np.argmin(np.abs(margins - base_margin)))
+    mid_w, mid_g = len(wacc) // 2, len(growth) // 2
+    return {
+        "unit": "USD per share" if per_share is not None else "USD millions (equity value)",
+        "base": {
+            "revenue": round(revenue, 1),
+            "revenue_basis": revenue_basis,
+            "fcf_margin": round(base_margin, 4),
+            "starting_revenue_growth": round(start_growth, 4),
+            "net_debt": round(float(net_debt), 1),
+            "diluted_shares": round(shares, 1) if per_share is not None else None,
+            "years": params.years,
+        },
+        "grid_size": list(enterprise.shape),
+        "distribution": dict(
+            zip(("min", "p25", "median", "p75", "max"), rounded(np.nanpercentile(values, [0, 25, 50, 75, 100])))
+        ),
+        "value_at_base_margin": {
+            "wacc": [round(float(w), 4) for w in wacc[rows]],
+            "terminal_growth": [round(float(g), 4) for g in growth[cols]],
+            "values": [rounded(values[r, cols, base_m]) for r in rows],
+        },
+        "margin_sensitivity": {
+            "wacc": round(float(wacc[mid_w]), 4),
+            "terminal_growth": round(float(growth[mid_g]), 4),
+            "fcf_margin": [round(float(m), 4) for m in margins],
+            "values": rounded(values[mid_w, mid_g, :]),
+        },
+    }
+
+
+def get_valuation(
+    doc: ParsedDocument, facts: FactTable, params: DCFParams = DCFParams(), cache: DocumentCache = document_cache
+) -> dict:
+    """Valuation summary for a document, cached per (document hash, parameter set)."""
+    name = f"dcf-{params.key()}"
+    payload = cache.get_artifact(doc.doc_hash, name)
+    if payload is None:
+        payload = value_document(facts, params)
+        cache.put_artifact(doc.doc_hash, name, payload)
+    return payload